@@ -1,7 +1,11 @@
 from fastapi import APIRouter, HTTPException
+import asyncio
+import numpy as np
 import yfinance as yf
 import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+from app.utils.vol_surface_cache import vol_surface_cache
 
 router = APIRouter()
 
@@ -116,6 +120,31 @@ async def get_volatility(ticker: str, period: str = "1y"):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/implied-volatility/{ticker}")
+async def get_implied_volatility(ticker: str, strike: Optional[float] = None, maturity: Optional[float] = None):
+    """Implied volatility surface from the listed option chain (rebuilt once a day)"""
+    try:
+        ticker_lower = ticker.lower().strip()
+        if ticker_lower in INDICES_MAPPING:
+            ticker = INDICES_MAPPING[ticker_lower]
+        
+        surface = await asyncio.to_thread(vol_surface_cache.get, ticker)
+        moneyness = np.round(np.linspace(0.5, 1.5, 21), 4)
+        response = {
+            "ticker": ticker.upper(),
+            "spot": surface.spot,
+            "moneyness": moneyness.tolist(),  # Strike / spot
+            "maturities": surface.maturities.tolist(),  # Listed expiries, years
+            "volatilities": surface.grid(moneyness, surface.maturities).tolist()  # [moneyness][maturity]
+        }
+        if strike is not None and maturity is not None:
+            response["volatility"] = float(surface.volatility(strike / surface.spot, maturity))
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/trending")
 async def get_trending_stocks():
     """Get trending stocks with intraday sparklines (1 jour)"""
@@ -1,12 +1,40 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from functools import partial
+from pydantic import BaseModel, ValidationError
+from typing import Dict, List, Optional, Union
 import numpy as np
-from scipy.stats import norm
+from app.config import settings
+from app.pricing_core import (
+    barrier_option, binomial_american, black_scholes, compare_products, correlation_factor, get_vanilla_surface, heston_autocall, heston_down_and_in_put,
+    monte_carlo_autocall, monte_carlo_autocall_scenarios, monte_carlo_worst_of_autocall, pde_autocall,
+    knock_out_probability, lsm_american, pde_down_and_in_put
+)
+from app.pricing_core.american import BASES as LSM_BASES
+from app.pricing_core.kernels import KERNEL_BACKENDS
+from app.pricing_core.monte_carlo import PRECISIONS as MC_PRECISIONS, SAMPLERS as MC_SAMPLERS
+from app.pricing_core.surfaces import FIELDS as SURFACE_FIELDS
+from app.utils.executor import ExecutorSaturated, executor_stats, get_executor
+from app.utils.pricing_cache import pricing_cache
+from app.utils.vol_surface_cache import vol_surface_cache
 
 router = APIRouter()
 
+REVERSE_CONVERTIBLE_ENGINES = ("closed_form", "pde", "heston")
+AUTOCALL_ENGINES = ("monte_carlo", "pde", "heston")
+WARRANT_EXERCISES = ("european", "american", "bermudan")
+WARRANT_ENGINES = ("lsm", "binomial")
+# Turbo direction -> (option type, barrier type)
+TURBO_TYPES = {"long": ("call", "down-and-out"), "short": ("put", "up-and-out")}
+
 # ===== Models =====
+class HestonParameters(BaseModel):
+    v0: float  # Initial variance
+    kappa: float  # Mean reversion speed
+    theta: float  # Long-run variance
+    xi: float  # Volatility of variance
+    rho: float  # Spot / variance correlation
+
 class ReverseConvertibleInput(BaseModel):
     ticker: str
     principal: float
@@ -16,6 +44,11 @@ class ReverseConvertibleInput(BaseModel):
     spot_price: Optional[float] = None
     volatility: Optional[float] = None
     risk_free_rate: float = 0.04
+    engine: str = "closed_form"  # "closed_form" (barrier as vanilla put strike), "pde" or "heston" (down-and-in put)
+    barrier_monitoring: float = 1 / 252  # Barrier observation period in years (PDE and Heston engines, daily)
+    heston: Optional[HestonParameters] = None  # Heston engine, calibrated to the implied surface if omitted
+    pde_space_steps: Optional[int] = None  # Defaults to settings.PDE_SPACE_STEPS
+    pde_time_steps: Optional[int] = None  # Defaults to settings.PDE_TIME_STEPS
 
 class ReverseConvertibleOutput(BaseModel):
     product: str
@@ -43,6 +76,31 @@ class AutocallInput(BaseModel):
     spot_price: Optional[float] = None
     volatility: Optional[float] = None
     risk_free_rate: float = 0.04
+    n_simulations: Optional[int] = None  # Defaults to settings.MC_DEFAULT_SIMULATIONS
+    seed: Optional[int] = None  # Defaults to settings.MC_SEED
+    n_workers: Optional[int] = None  # Random streams (not processes), defaults to settings.MC_WORKERS; prices are reproducible per (seed, n_workers)
+    sampler: str = "pseudo"  # "pseudo" or "sobol" (scrambled Sobol + Brownian bridge)
+    antithetic: bool = False  # Simulate (z, -z) path pairs
+    control_variate: bool = False  # European put at the protection barrier as control
+    target_std_error: Optional[float] = None  # Simulate until the price standard error is below this
+    engine: str = "monte_carlo"  # "monte_carlo", "pde" (Crank-Nicolson, deterministic, grid Greeks) or "heston" (QE Monte Carlo)
+    barrier_monitoring: Optional[float] = None  # Knock-in observed continuously (0) or every n years (1/252: daily), None: at maturity only
+    heston: Optional[HestonParameters] = None  # Heston engine, calibrated to the implied surface if omitted
+    pde_space_steps: Optional[int] = None  # Defaults to settings.PDE_SPACE_STEPS
+    pde_time_steps: Optional[int] = None  # Defaults to settings.PDE_TIME_STEPS
+    precision: str = "float64"  # "float32": single-precision paths, float64 averages (monte_carlo engine)
+    backend: str = "numpy"  # "numba": compiled parallel path loops (monte_carlo engine, NumPy if not installed)
+    coupon_barrier: Optional[float] = None  # % of initial price: Phoenix coupon paid on each date at or above it (None: coupon accrued until the call)
+    memory_coupon: bool = False  # Phoenix: missed coupons paid on the next date above the coupon barrier
+    autocall_step_down: float = 0.0  # % of initial price removed from the autocall barrier at each observation date
+
+class PayoffDistributionOutput(BaseModel):
+    bin_edges: List[float]  # Redemption amounts (undiscounted), last bin includes anything above
+    probabilities: List[float]  # Share of paths per bin
+    mean: float
+    quantiles: Dict[str, float]  # p1, p5, p25, p50, p75, p95, p99 of the redemption
+    value_at_risk: Dict[str, float]  # "95", "99": principal minus the redemption quantile
+    expected_shortfall: Dict[str, float]  # Principal minus the mean redemption of the worst 5% / 1%
 
 class AutocallOutput(BaseModel):
     product: str
@@ -58,6 +116,50 @@ class AutocallOutput(BaseModel):
     gamma: float
     vega: float
     theta: float
+    std_error: float
+    ci_lower: float  # 95% confidence interval on fair_value
+    ci_upper: float
+    n_paths: int
+    variance_reduction: float  # Plain Monte Carlo variance / achieved variance
+    autocall_probabilities: Optional[List[float]] = None  # Monte Carlo engines: per observation date, last entry: held to maturity
+    payoff_distribution: Optional[PayoffDistributionOutput] = None  # Monte Carlo engines, same pass as the price
+    backend: Optional[str] = None  # monte_carlo engine: kernel backend that ran the paths
+
+class WorstOfAutocallInput(BaseModel):
+    tickers: List[str]  # Basket, up to settings.WORST_OF_MAX_ASSETS
+    principal: float
+    autocall_barrier: float  # % of each initial price, all assets must be above it
+    coupon_rate: float  # Annual coupon in %
+    barrier_level: float  # % of each initial price, applied to the worst performer at maturity
+    maturity_years: float
+    autocall_frequency: float = 0.25  # Quarterly observations
+    volatilities: Optional[List[float]] = None  # One per ticker
+    correlation: Optional[List[List[float]]] = None  # N x N matrix, defaults to average_correlation
+    average_correlation: float = 0.5  # Off-diagonal value when no matrix is given
+    risk_free_rate: float = 0.04
+    n_simulations: Optional[int] = None  # Defaults to settings.MC_DEFAULT_SIMULATIONS
+    seed: Optional[int] = None  # Defaults to settings.MC_SEED
+    n_workers: Optional[int] = None  # Random streams (not processes), defaults to settings.MC_WORKERS; prices are reproducible per (seed, n_workers)
+    sampler: str = "pseudo"  # "pseudo" or "sobol" (scrambled Sobol + Brownian bridge per asset)
+    antithetic: bool = False  # Simulate (z, -z) path pairs
+    target_std_error: Optional[float] = None  # Simulate until the price standard error is below this
+
+class WorstOfAutocallOutput(BaseModel):
+    product: str
+    tickers: List[str]
+    fair_value: float
+    coupon_value: float
+    max_gain: float
+    max_loss: float
+    risk_level: int
+    probability_profit: float  # Simulated redemption above principal
+    std_error: float
+    ci_lower: float  # 95% confidence interval on fair_value
+    ci_upper: float
+    n_paths: int
+    variance_reduction: float
+    autocall_probabilities: List[float]  # Per observation date, last entry: held to maturity
+    payoff_distribution: PayoffDistributionOutput
 
 class CapitalProtectedInput(BaseModel):
     ticker: str
@@ -94,6 +196,13 @@ class WarrantInput(BaseModel):
     spot_price: Optional[float] = None
     volatility: Optional[float] = None
     risk_free_rate: float = 0.04
+    exercise: str = "european"  # "european", "american" or "bermudan"
+    exercise_frequency: Optional[float] = None  # Years between Bermudan exercise dates
+    engine: str = "lsm"  # Early exercise: "lsm" (Longstaff-Schwartz Monte Carlo) or "binomial" (CRR tree reference)
+    basis: str = "laguerre"  # LSM regression basis: "laguerre", "polynomial" or "hermite"
+    basis_degree: int = 3
+    n_simulations: Optional[int] = None  # LSM paths, defaults to settings.MC_DEFAULT_SIMULATIONS
+    seed: Optional[int] = None  # Defaults to settings.MC_SEED
 
 class WarrantOutput(BaseModel):
     product: str
@@ -112,180 +221,637 @@ class WarrantOutput(BaseModel):
     vega: float
     theta: float
     break_even_price: float
+    early_exercise_premium: float = 0.0  # American / Bermudan value over the European option
+    std_error: float = 0.0  # Monte Carlo standard error of option_value (LSM engine)
+
+class TurboInput(BaseModel):
+    ticker: str
+    strike_price: float
+    barrier: Optional[float] = None  # Knock-out level, defaults to the strike (classic turbo)
+    turbo_type: str = "long"  # "long" (down-and-out call) or "short" (up-and-out put)
+    ratio: float = 1.0  # Underlying units per certificate (parity 10 = 0.1)
+    maturity_years: float
+    spot_price: Optional[float] = None
+    volatility: Optional[float] = None
+    risk_free_rate: float = 0.04
+    barrier_monitoring: Optional[float] = None  # Years between barrier observations, None: continuous
+    rebate: float = 0.0  # Residual value per underlying unit paid on knock-out
+
+class TurboOutput(BaseModel):
+    product: str
+    fair_value: float  # Per certificate
+    option_value: float  # Per underlying unit
+    vanilla_value: float  # Same option without barrier, per underlying unit
+    strike_price: float
+    barrier_price: float
+    leverage: float  # Delta x spot / option value
+    distance_to_barrier: float  # % of spot
+    prob_knock_out: float  # Risk-neutral, %
+    max_loss: float
+    risk_level: int
+    delta: float
+    gamma: float
+    vega: float
+    theta: float
+    break_even_price: float
 
-# ===== Helper Functions =====
+class TurboRangeInput(BaseModel):
+    ticker: str
+    strikes: List[float]
+    barriers: Optional[List[float]] = None  # One per strike, defaults to the strikes
+    turbo_type: str = "long"
+    ratio: float = 1.0
+    maturity_years: float
+    spot_price: Optional[float] = None
+    volatility: Optional[float] = None
+    risk_free_rate: float = 0.04
+    barrier_monitoring: Optional[float] = None
+    rebate: float = 0.0
 
-def black_scholes_call(S: float, K: float, T: float, r: float, sigma: float) -> float:
-    """Black-Scholes call option pricing"""
-    if T <= 0:
-        return max(S - K, 0)
+class TurboRangeOutput(BaseModel):
+    n_products: int
+    results: List[TurboOutput]  # In strike order of the input
+
+class BatchPricingItem(BaseModel):
+    product_type: str  # "reverse-convertible", "capital-protected", "warrant" or "turbo"
+    parameters: dict  # Same fields as the single-product input
+
+class BatchPricingInput(BaseModel):
+    products: List[BatchPricingItem]
+
+class BatchPricingOutput(BaseModel):
+    n_products: int
+    results: List[Union[ReverseConvertibleOutput, CapitalProtectedOutput, WarrantOutput, TurboOutput]]
+
+class CompareInput(BaseModel):
+    ticker: str
+    products: List[BatchPricingItem]  # "autocall", "reverse-convertible", "capital-protected" or "warrant" terms
+    spot_price: Optional[float] = None  # Market fields shared by every product (override the parameters)
+    volatility: Optional[float] = None
+    risk_free_rate: float = 0.04
+    n_simulations: Optional[int] = None  # Defaults to settings.MC_DEFAULT_SIMULATIONS
+    seed: Optional[int] = None  # Defaults to settings.MC_SEED
+
+class ComparedProduct(BaseModel):
+    product_type: str
+    fair_value: float  # Discounted expected payoff on the shared paths
+    std_error: float
+    invested: float  # Principal (notes) or quoted price (warrants)
+    probability_profit: float  # % of paths paying back more than invested
+    expected_return: float  # %, undiscounted cash over invested
+    return_quantiles: Dict[str, float]  # p5, p25, p50, p75, p95 of the return, %
+    payoff_distribution: PayoffDistributionOutput  # Undiscounted cash paid, against the amount invested
+
+class CompareOutput(BaseModel):
+    ticker: str
+    spot_price: float
+    volatility: float
+    n_paths: int
+    results: List[ComparedProduct]  # In input order
+    correlation: List[List[float]]  # Correlation of the discounted payoffs, same order
+
+class ScenarioRange(BaseModel):
+    start: float
+    stop: float
+    steps: int = 11  # Evenly spaced values from start to stop (inclusive)
+
+class ScenarioInput(BaseModel):
+    parameters: dict  # Same fields as the single-product input (base scenario, fixes strikes and barriers)
+    spot: Optional[ScenarioRange] = None  # Omitted axes stay at the base value
+    volatility: Optional[ScenarioRange] = None
+    maturity: Optional[ScenarioRange] = None
+    rate: Optional[ScenarioRange] = None
+
+class ScenarioOutput(BaseModel):
+    product: str
+    spot_prices: List[float]
+    volatilities: List[float]
+    maturities: List[float]
+    rates: List[float]
+    shape: List[int]  # Grid axes order: spot, volatility, maturity, rate
+    fair_value: list
+    delta: list
+    gamma: list
+    vega: list  # Autocall: embedded put at the barrier (Black-Scholes approximation)
+    theta: list  # Autocall: embedded put at the barrier (Black-Scholes approximation)
+    std_error: Optional[list] = None  # Monte Carlo products only
+
+# ===== Closed-form pricers (one array pass per product type) =====
+
+def _get_surface():
+    """Precomputed vanilla surface, or None if disabled or any measured error exceeds its configured bound"""
+    if not settings.PRICING_SURFACE_ENABLED:
+        return None
+    surface = get_vanilla_surface(settings.PRICING_SURFACE_PATH)
+    bounds = {**{field: settings.PRICING_SURFACE_MAX_ERROR for field in SURFACE_FIELDS},
+              "otm_relative": settings.PRICING_SURFACE_MAX_RELATIVE_ERROR}
+    if any(surface.max_error.get(field, np.inf) > bound for field, bound in bounds.items()):
+        return None
+    return surface
+
+def _vanilla_greeks(S, K, T, r, sigma, option_type):
+    """
+    Vanilla price and Greeks for the closed-form pricers
     
-    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
+    Single products are quoted from the interpolated surface when enabled
+    (microseconds instead of a full NumPy pass); lists use the exact array kernel.
+    """
+    surface = _get_surface()
+    if surface is not None and len(S) == 1:
+        quote = surface.quote(float(S[0]), float(K[0]), float(T[0]), float(r[0]), float(sigma[0]),
+                              str(np.asarray(option_type).ravel()[0]))
+        return {key: np.array([value]) for key, value in quote.items()}
+    return black_scholes(S, K, T, r, sigma, option_type)
+
+def _pv_annual_coupons(coupon_payment, T, r):
+    """Present value of annual coupons (at least one), on arrays of any broadcastable shape"""
+    coupon_payment, T, r = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in (coupon_payment, T, r)])
+    n_payments = np.maximum(1, np.trunc(T)).astype(int)
     
-    return S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
+    # Annual coupons discounted on a common 1..max(n_payments) grid
+    t = np.arange(1, n_payments.max() + 1)
+    return (coupon_payment[..., None] * np.exp(-r[..., None] * t)
+            * (t <= n_payments[..., None])).sum(axis=-1)
 
-def black_scholes_put(S: float, K: float, T: float, r: float, sigma: float) -> float:
-    """Black-Scholes put option pricing"""
-    if T <= 0:
-        return max(K - S, 0)
+def _price_reverse_convertibles(inputs: List[ReverseConvertibleInput]) -> List[ReverseConvertibleOutput]:
+    """Price a list of Reverse Convertibles with array kernels"""
+    spot = np.array([p.spot_price for p in inputs], dtype=float)
+    sigma = np.array([p.volatility for p in inputs], dtype=float)
+    principal = np.array([p.principal for p in inputs], dtype=float)
+    T = np.array([p.maturity_years for p in inputs], dtype=float)
+    r = np.array([p.risk_free_rate for p in inputs], dtype=float)
+    
+    barrier_strike = spot * np.array([p.barrier_level for p in inputs]) / 100
+    coupon_payment = principal * np.array([p.coupon_rate for p in inputs]) / 100
     
-    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
+    pv_coupons = _pv_annual_coupons(coupon_payment, T, r)
     
-    return K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+    greeks = _vanilla_greeks(spot, barrier_strike, T, r, sigma, "put")
+    # N(d1) at the barrier = 1 + put delta
+    probability_profit = (1 + greeks["delta"]) * 100
+    
+    # PDE / Heston engines: down-and-in put struck at the initial fixing, discretely monitored barrier
+    for i, p in enumerate(inputs):
+        if p.engine == "pde":
+            barrier_put = pde_down_and_in_put(
+                S0=p.spot_price, K=p.spot_price, B=barrier_strike[i], T=p.maturity_years,
+                r=p.risk_free_rate, sigma=p.volatility, monitoring=p.barrier_monitoring,
+                n_space=p.pde_space_steps or settings.PDE_SPACE_STEPS,
+                n_time=p.pde_time_steps or settings.PDE_TIME_STEPS
+            )
+            for key in ("price", "delta", "gamma", "vega", "theta"):
+                greeks[key][i] = barrier_put[key]
+            probability_profit[i] = (1 - barrier_put["prob_loss"]) * 100
+        elif p.engine == "heston":
+            barrier_put = heston_down_and_in_put(
+                S0=p.spot_price, K=p.spot_price, B=barrier_strike[i], T=p.maturity_years,
+                r=p.risk_free_rate, **p.heston.model_dump(), monitoring=p.barrier_monitoring,
+                n_sims=settings.MC_DEFAULT_SIMULATIONS, seed=settings.MC_SEED, n_workers=settings.MC_WORKERS,
+                max_chunk_mb=settings.MC_MAX_CHUNK_MB
+            )
+            for key in ("price", "delta", "gamma", "vega", "theta"):
+                greeks[key][i] = barrier_put[key]
+            probability_profit[i] = (1 - barrier_put["prob_loss"]) * 100
+    
+    n_shares = principal / spot
+    embedded_put_value = n_shares * greeks["price"]
+    fair_value = principal + pv_coupons - embedded_put_value
+    
+    total_coupons = coupon_payment * T
+    max_gain = total_coupons
+    max_loss = principal - total_coupons
+    
+    distance_to_barrier = (spot - barrier_strike) / spot
+    risk_level = np.clip(np.trunc((1 - distance_to_barrier) * 50 + sigma * 100), 0, 100).astype(int)
+    
+    break_even = spot * (1 - total_coupons / principal)
+    
+    return [
+        ReverseConvertibleOutput(
+            product="Reverse Convertible",
+            fair_value=round(float(fair_value[i]), 2),
+            coupon_value=round(float(pv_coupons[i]), 2),
+            embedded_put_value=round(float(embedded_put_value[i]), 2),
+            break_even_price=round(float(break_even[i]), 2),
+            max_gain=round(float(max_gain[i]), 2),
+            max_loss=round(float(max_loss[i]), 2),
+            risk_level=int(risk_level[i]),
+            probability_profit=round(float(probability_profit[i]), 2),
+            delta=round(float(greeks["delta"][i] * n_shares[i]), 4),
+            gamma=round(float(greeks["gamma"][i] * n_shares[i]), 6),
+            vega=round(float(greeks["vega"][i] * n_shares[i]), 2),
+            theta=round(float(greeks["theta"][i] * n_shares[i]), 2)
+        )
+        for i in range(len(inputs))
+    ]
 
-def calculate_greeks(S: float, K: float, T: float, r: float, sigma: float, option_type: str = "call"):
-    """Calculate Greeks"""
-    if T <= 0:
-        return {"delta": 0, "gamma": 0, "vega": 0, "theta": 0}
+def _price_capital_protected(inputs: List[CapitalProtectedInput]) -> List[CapitalProtectedOutput]:
+    """Price a list of Capital Protected notes with array kernels"""
+    spot = np.array([p.spot_price for p in inputs], dtype=float)
+    sigma = np.array([p.volatility for p in inputs], dtype=float)
+    principal = np.array([p.principal for p in inputs], dtype=float)
+    T = np.array([p.maturity_years for p in inputs], dtype=float)
+    r = np.array([p.risk_free_rate for p in inputs], dtype=float)
+    protection_level = np.array([p.protection_level for p in inputs], dtype=float)
+    participation_rate = np.array([p.participation_rate for p in inputs], dtype=float)
     
-    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
-    pdf_d1 = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi)
+    # Zero-coupon bond to guarantee capital, remaining budget buys ATM calls
+    protection_amount = principal * (protection_level / 100)
+    bond_cost = protection_amount * np.exp(-r * T)
+    call_budget = principal - bond_cost
     
-    if option_type == "call":
-        delta = norm.cdf(d1)
-        theta = (-(S * pdf_d1 * sigma) / (2 * np.sqrt(T)) - r * K * np.exp(-r * T) * norm.cdf(d2))
-    else:
-        delta = -norm.cdf(-d1)
-        theta = (-(S * pdf_d1 * sigma) / (2 * np.sqrt(T)) + r * K * np.exp(-r * T) * norm.cdf(-d2))
+    greeks = _vanilla_greeks(spot, spot, T, r, sigma, "call")
+    call_price = greeks["price"]
+    n_calls = np.divide(call_budget, call_price, out=np.zeros_like(call_budget), where=call_price > 0)
     
-    gamma = pdf_d1 / (S * sigma * np.sqrt(T))
-    vega = S * pdf_d1 * np.sqrt(T) / 100
+    effective_participation = n_calls * (participation_rate / 100) / (principal / spot)
+    fair_value = protection_amount + call_budget
     
-    return {
-        "delta": delta,
-        "gamma": gamma,
-        "vega": vega,
-        "theta": theta / 365
-    }
+    max_gain = principal * effective_participation * 1.0  # Assume 100% upside
+    max_loss = principal * (1 - protection_level / 100)
+    risk_level = np.trunc(np.divide(max_loss, principal, out=np.zeros_like(max_loss),
+                                    where=principal > 0) * 100).astype(int)
+    
+    # N(d1) at the money = call delta
+    probability_profit = 50 + greeks["delta"] * 50  # Au moins 50% car capital garanti
+    
+    return [
+        CapitalProtectedOutput(
+            product="Capital Garanti",
+            fair_value=round(float(fair_value[i]), 2),
+            guaranteed_capital=round(float(protection_amount[i]), 2),
+            call_budget=round(float(call_budget[i]), 2),
+            participation_rate=round(float(effective_participation[i] * 100), 2),
+            max_gain=round(float(max_gain[i]), 2),
+            max_loss=round(float(max_loss[i]), 2),
+            risk_level=int(risk_level[i]),
+            probability_profit=round(float(probability_profit[i]), 2),
+            delta=round(float(greeks["delta"][i] * n_calls[i]), 4),
+            gamma=round(float(greeks["gamma"][i] * n_calls[i]), 6),
+            vega=round(float(greeks["vega"][i] * n_calls[i]), 2),
+            theta=round(float(greeks["theta"][i] * n_calls[i]), 2),
+            break_even_price=round(float(spot[i]), 2)
+        )
+        for i in range(len(inputs))
+    ]
 
-def monte_carlo_autocall(S0, K_autocall, K_barrier, T, r, sigma, coupon, principal, frequency, n_sims=10000):
-    """Monte Carlo simulation for Autocall"""
-    np.random.seed(42)
-    dt = frequency
-    n_steps = int(T / dt)
-    payoffs = []
+def _price_warrants(inputs: List[WarrantInput]) -> List[WarrantOutput]:
+    """Price a list of call/put Warrants with array kernels"""
+    spot = np.array([p.spot_price for p in inputs], dtype=float)
+    sigma = np.array([p.volatility for p in inputs], dtype=float)
+    strike = np.array([p.strike_price for p in inputs], dtype=float)
+    leverage = np.array([p.leverage for p in inputs], dtype=float)
+    T = np.array([p.maturity_years for p in inputs], dtype=float)
+    r = np.array([p.risk_free_rate for p in inputs], dtype=float)
+    option_type = np.array(["call" if p.warrant_type.lower() == "call" else "put" for p in inputs])
+    is_call = option_type == "call"
     
-    for _ in range(n_sims):
-        S = S0
-        autocalled = False
-        
-        for step in range(1, n_steps + 1):
-            dW = np.random.normal(0, 1)
-            S = S * np.exp((r - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * dW)
-            
-            # Check autocall condition
-            if S >= K_autocall:
-                time_elapsed = step * dt
-                payoff = principal * (1 + coupon * time_elapsed)
-                payoffs.append(payoff)
-                autocalled = True
-                break
-        
-        # If not autocalled, check final payoff
-        if not autocalled:
-            if S >= K_barrier:
-                payoff = principal * (1 + coupon * T)
-            else:
-                payoff = principal * (S / S0)
-            payoffs.append(payoff)
+    greeks = _vanilla_greeks(spot, strike, T, r, sigma, option_type)
     
-    return np.mean(payoffs) * np.exp(-r * T)
+    # Early exercise: Longstaff-Schwartz or binomial tree, one product at a time
+    premium, std_error = np.zeros(len(inputs)), np.zeros(len(inputs))
+    for i, p in enumerate(inputs):
+        if p.exercise == "european":
+            continue
+        exercise_frequency = p.exercise_frequency if p.exercise == "bermudan" else None
+        if p.engine == "binomial":
+            american = binomial_american(p.spot_price, p.strike_price, p.maturity_years, p.risk_free_rate,
+                                         p.volatility, option_type[i], settings.BINOMIAL_STEPS, exercise_frequency)
+            estimates = american
+        else:
+            american = lsm_american(
+                p.spot_price, p.strike_price, p.maturity_years, p.risk_free_rate, p.volatility, option_type[i],
+                exercise_frequency=exercise_frequency, basis=p.basis, degree=p.basis_degree,
+                n_sims=_simulation_count(p.n_simulations, settings.MC_DEFAULT_SIMULATIONS),
+                seed=settings.MC_SEED if p.seed is None else p.seed, n_workers=settings.MC_WORKERS,
+                max_chunk_mb=settings.MC_MAX_CHUNK_MB, steps_per_year=settings.LSM_EXERCISE_STEPS_PER_YEAR
+            )
+            estimates = american["greeks"]
+            std_error[i] = american["std_error"]
+        greeks["price"][i] = american["price"]
+        for key in ("delta", "gamma", "vega", "theta"):
+            greeks[key][i] = estimates[key]
+        premium[i] = american["early_exercise_premium"]
+    
+    option_price = greeks["price"]
+    intrinsic = np.where(is_call, np.maximum(spot - strike, 0), np.maximum(strike - spot, 0))
+    
+    # Warrant price with leverage
+    warrant_price = option_price * leverage
+    time_value = option_price - intrinsic
+    
+    # Call: assume 50% upside, Put: max gain = strike price
+    max_gain = np.where(is_call, spot * 0.5, strike) * leverage
+    max_loss = warrant_price
+    risk_level = np.minimum(100, np.trunc(50 + leverage * 8)).astype(int)
+    
+    probability_profit = greeks["prob_itm"] * 100
+    
+    break_even = np.where(is_call, strike + option_price, strike - option_price)
+    
+    return [
+        WarrantOutput(
+            product=f"Warrant {p.warrant_type.upper()}",
+            fair_value=round(float(warrant_price[i]), 2),
+            option_value=round(float(option_price[i]), 2),
+            leverage=p.leverage,
+            strike_price=round(p.strike_price, 2),
+            intrinsic_value=round(float(intrinsic[i] * leverage[i]), 2),
+            time_value=round(float(time_value[i] * leverage[i]), 2),
+            max_gain=round(float(max_gain[i]), 2),
+            max_loss=round(float(max_loss[i]), 2),
+            risk_level=int(risk_level[i]),
+            probability_profit=round(float(probability_profit[i]), 2),
+            delta=round(float(greeks["delta"][i] * leverage[i]), 4),
+            gamma=round(float(greeks["gamma"][i] * leverage[i]), 6),
+            vega=round(float(greeks["vega"][i] * leverage[i]), 2),
+            theta=round(float(greeks["theta"][i] * leverage[i]), 2),
+            break_even_price=round(float(break_even[i]), 2),
+            early_exercise_premium=round(float(premium[i] * leverage[i]), 2),
+            std_error=round(float(std_error[i] * leverage[i]), 4)
+        )
+        for i, p in enumerate(inputs)
+    ]
+
+def _price_turbos(inputs: List[TurboInput]) -> List[TurboOutput]:
+    """Price a list of knock-out turbos with the closed-form barrier kernel"""
+    spot = np.array([p.spot_price for p in inputs], dtype=float)
+    sigma = np.array([p.volatility for p in inputs], dtype=float)
+    strike = np.array([p.strike_price for p in inputs], dtype=float)
+    barrier = np.array([p.strike_price if p.barrier is None else p.barrier for p in inputs], dtype=float)
+    ratio = np.array([p.ratio for p in inputs], dtype=float)
+    T = np.array([p.maturity_years for p in inputs], dtype=float)
+    r = np.array([p.risk_free_rate for p in inputs], dtype=float)
+    rebate = np.array([p.rebate for p in inputs], dtype=float)
+    option_type = np.array([TURBO_TYPES[p.turbo_type][0] for p in inputs])
+    barrier_type = np.array([TURBO_TYPES[p.turbo_type][1] for p in inputs])
+    is_long = option_type == "call"
+    # Observation period per product, 0 = continuous
+    monitoring = np.array([p.barrier_monitoring or 0.0 for p in inputs], dtype=float)
+    
+    greeks = barrier_option(spot, strike, barrier, T, r, sigma, option_type, barrier_type, rebate, monitoring)
+    option_price = greeks["price"]
+    vanilla = black_scholes(spot, strike, T, r, sigma, option_type)["price"]
+    prob_knock_out = knock_out_probability(spot, barrier, T, r, sigma, monitoring,
+                                           np.where(is_long, "down", "up")) * 100
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        leverage = np.where(option_price > 0, np.abs(greeks["delta"]) * spot / option_price, 0.0)
+    distance_to_barrier = np.abs(spot - barrier) / spot * 100
+    risk_level = np.clip(np.trunc(prob_knock_out), 0, 100).astype(int)
+    break_even = np.where(is_long, strike + option_price, strike - option_price)
+    
+    return [
+        TurboOutput(
+            product=f"Turbo {p.turbo_type.upper()}",
+            fair_value=round(float(option_price[i] * ratio[i]), 4),
+            option_value=round(float(option_price[i]), 4),
+            vanilla_value=round(float(vanilla[i]), 4),
+            strike_price=round(p.strike_price, 2),
+            barrier_price=round(float(barrier[i]), 2),
+            leverage=round(float(leverage[i]), 2),
+            distance_to_barrier=round(float(distance_to_barrier[i]), 2),
+            prob_knock_out=round(float(prob_knock_out[i]), 2),
+            max_loss=round(float((option_price[i] - rebate[i]) * ratio[i]), 4),
+            risk_level=int(risk_level[i]),
+            delta=round(float(greeks["delta"][i] * ratio[i]), 4),
+            gamma=round(float(greeks["gamma"][i] * ratio[i]), 6),
+            vega=round(float(greeks["vega"][i] * ratio[i]), 4),
+            theta=round(float(greeks["theta"][i] * ratio[i]), 4),
+            break_even_price=round(float(break_even[i]), 2)
+        )
+        for i, p in enumerate(inputs)
+    ]
+
+# ===== Cached dispatch =====
+
+def _price_one(pricer, input_data):
+    """Price a single product with a list pricer"""
+    return pricer([input_data])[0]
+
+async def _price_cached(product: str, input_data, pricer):
+    """
+    Serve a pricing from the cache, or price the normalized input on the pricing pool
+    
+    The key covers every input field, so Monte Carlo results are only reused
+    for the same seed, path count and engine options.
+    """
+    if not settings.PRICING_CACHE_ENABLED:
+        return await get_executor("pricing").run(pricer, input_data)
+    
+    normalized = pricing_cache.normalize(input_data)
+    key = pricing_cache.make_key(product, normalized)
+    output = pricing_cache.get(key)
+    if output is None:
+        output = await get_executor("pricing").run(pricer, normalized)
+        pricing_cache.set(key, output)
+    return output
+
+# ===== Implied volatility =====
+
+def _smile_moneyness(input_data: BaseModel) -> float:
+    """Strike of the option driving the product, as a fraction of spot (where the smile is read)"""
+    if isinstance(input_data, (WarrantInput, TurboInput, TurboRangeInput)):
+        strike = input_data.strikes[0] if isinstance(input_data, TurboRangeInput) else input_data.strike_price
+        return strike / input_data.spot_price
+    if isinstance(input_data, CapitalProtectedInput):
+        return 1.0  # At-the-money call
+    return input_data.barrier_level / 100  # Reverse convertible and autocall: put at the barrier
+
+async def _from_vol_surface(method, *args):
+    """
+    Run a vol_surface_cache lookup off the event loop, None if it takes longer than IMPLIED_VOL_TIMEOUT_SECONDS
+
+    A first lookup fetches the option chain (network); on timeout the thread
+    still finishes and caches the surface for the next requests.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(method, *args), settings.IMPLIED_VOL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return None
+
+async def _with_implied_volatility(input_data: BaseModel) -> BaseModel:
+    """Fill a missing volatility from the ticker's cached implied volatility surface (unchanged if unavailable)"""
+    if input_data.volatility is not None or input_data.spot_price is None or not settings.IMPLIED_VOL_ENABLED:
+        return input_data
+    sigma = await _from_vol_surface(vol_surface_cache.volatility, input_data.ticker,
+                                    _smile_moneyness(input_data), input_data.maturity_years)
+    if sigma is None:
+        return input_data
+    return input_data.model_copy(update={"volatility": sigma})
+
+async def _with_heston_parameters(input_data: BaseModel) -> BaseModel:
+    """Heston engine: calibrate missing parameters to the implied surface, default the volatility to sqrt(v0)"""
+    if getattr(input_data, "engine", None) != "heston":
+        return input_data
+    if input_data.heston is None:
+        parameters = await _from_vol_surface(vol_surface_cache.heston, input_data.ticker,
+                                             settings.HESTON_CALIBRATION_MAX_MATURITY)
+        if parameters is None:
+            raise HTTPException(status_code=400, detail="heston parameters required (no implied surface to calibrate)")
+        input_data = input_data.model_copy(update={"heston": HestonParameters(**parameters)})
+    if input_data.volatility is None:
+        input_data = input_data.model_copy(update={"volatility": float(np.sqrt(input_data.heston.v0))})
+    return input_data
 
 # ===== REVERSE CONVERTIBLE =====
+def _check_pde_grid(input_data: BaseModel) -> None:
+    """Requested PDE grid sizes within the configured bounds"""
+    if input_data.pde_space_steps is not None and not 10 <= input_data.pde_space_steps <= settings.PDE_MAX_SPACE_STEPS:
+        raise HTTPException(status_code=400, detail=f"pde_space_steps must be between 10 and {settings.PDE_MAX_SPACE_STEPS}")
+    if input_data.pde_time_steps is not None and not 1 <= input_data.pde_time_steps <= settings.PDE_MAX_TIME_STEPS:
+        raise HTTPException(status_code=400, detail=f"pde_time_steps must be between 1 and {settings.PDE_MAX_TIME_STEPS}")
+
+def _check_reverse_convertible(input_data: BaseModel) -> None:
+    if input_data.engine not in REVERSE_CONVERTIBLE_ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of {REVERSE_CONVERTIBLE_ENGINES}")
+    if input_data.engine != "closed_form" and input_data.barrier_monitoring <= 0:
+        raise HTTPException(status_code=400, detail="barrier_monitoring must be positive (years between observations)")
+    _check_pde_grid(input_data)
+
 @router.post("/reverse-convertible", response_model=ReverseConvertibleOutput)
 async def price_reverse_convertible(input_data: ReverseConvertibleInput):
     """Price a Reverse Convertible structured product"""
     try:
-        spot = input_data.spot_price
-        if spot is None:
+        if input_data.spot_price is None:
             raise HTTPException(status_code=400, detail="spot_price required")
+        _check_reverse_convertible(input_data)
         
-        sigma = input_data.volatility
-        if sigma is None:
+        input_data = await _with_implied_volatility(input_data)
+        input_data = await _with_heston_parameters(input_data)
+        if input_data.volatility is None:
             raise HTTPException(status_code=400, detail="volatility required")
         
-        barrier_strike = spot * (input_data.barrier_level / 100)
-        
-        coupon_payment = input_data.principal * (input_data.coupon_rate / 100)
-        n_payments = max(1, int(input_data.maturity_years))
-        
-        pv_coupons = sum([
-            coupon_payment * np.exp(-input_data.risk_free_rate * t)
-            for t in range(1, n_payments + 1)
-        ])
-        
-        put_value = black_scholes_put(
-            S=spot,
-            K=barrier_strike,
-            T=input_data.maturity_years,
-            r=input_data.risk_free_rate,
-            sigma=sigma
-        )
-        
-        n_shares = input_data.principal / spot
-        embedded_put_value = n_shares * put_value
-        
-        fair_value = input_data.principal + pv_coupons - embedded_put_value
-        
-        greeks = calculate_greeks(spot, barrier_strike, input_data.maturity_years, 
-                                 input_data.risk_free_rate, sigma, "put")
-        
-        total_coupons = coupon_payment * input_data.maturity_years
-        max_gain = total_coupons
-        max_loss = input_data.principal - total_coupons
-        
-        distance_to_barrier = (spot - barrier_strike) / spot
-        risk_level = min(100, max(0, int((1 - distance_to_barrier) * 50 + sigma * 100)))
-        
-        d1 = (np.log(spot / barrier_strike) + 
-              (input_data.risk_free_rate + 0.5 * sigma**2) * input_data.maturity_years) / \
-             (sigma * np.sqrt(input_data.maturity_years))
-        probability_profit = norm.cdf(d1) * 100
-        
-        break_even = spot * (1 - (total_coupons / input_data.principal))
-        
-        return ReverseConvertibleOutput(
-            product="Reverse Convertible",
-            fair_value=round(fair_value, 2),
-            coupon_value=round(pv_coupons, 2),
-            embedded_put_value=round(embedded_put_value, 2),
-            break_even_price=round(break_even, 2),
-            max_gain=round(max_gain, 2),
-            max_loss=round(max_loss, 2),
-            risk_level=risk_level,
-            probability_profit=round(probability_profit, 2),
-            delta=round(greeks["delta"] * n_shares, 4),
-            gamma=round(greeks["gamma"] * n_shares, 6),
-            vega=round(greeks["vega"] * n_shares, 2),
-            theta=round(greeks["theta"] * n_shares, 2)
-        )
+        return await _price_cached("reverse-convertible", input_data, partial(_price_one, _price_reverse_convertibles))
         
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 # ===== AUTOCALL =====
-@router.post("/autocall", response_model=AutocallOutput)
-async def price_autocall(input_data: AutocallInput):
-    """Price Autocall / Phoenix structured product"""
-    try:
-        spot = input_data.spot_price
-        if spot is None:
-            raise HTTPException(status_code=400, detail="spot_price required")
-        
-        sigma = input_data.volatility
-        if sigma is None:
-            raise HTTPException(status_code=400, detail="volatility required")
-        
-        K_autocall = spot * (input_data.autocall_barrier / 100)
-        K_barrier = spot * (input_data.barrier_level / 100)
-        
+def _simulation_count(n_simulations: Optional[int], default: int) -> int:
+    """Requested path count (default if None): at least 1, capped at settings.MC_MAX_SIMULATIONS"""
+    if n_simulations is None:
+        return default
+    if n_simulations < 1:
+        raise HTTPException(status_code=400, detail="n_simulations must be at least 1")
+    return min(n_simulations, settings.MC_MAX_SIMULATIONS)
+
+def _with_mc_defaults(input_data: BaseModel) -> BaseModel:
+    """Resolve path count, seed and worker count from settings so they are part of the cache key"""
+    return input_data.model_copy(update={
+        # Path budget when a target standard error is given
+        "n_simulations": _simulation_count(input_data.n_simulations, (
+            settings.MC_MAX_SIMULATIONS if input_data.target_std_error else settings.MC_DEFAULT_SIMULATIONS
+        )),
+        "seed": settings.MC_SEED if input_data.seed is None else input_data.seed,
+        "n_workers": input_data.n_workers or settings.MC_WORKERS
+    })
+
+def _check_monte_carlo(input_data: BaseModel) -> None:
+    """Monte Carlo options of the autocall inputs"""
+    if input_data.n_workers is not None and not 1 <= input_data.n_workers <= settings.MC_MAX_WORKERS:
+        raise HTTPException(status_code=400, detail=f"n_workers must be between 1 and {settings.MC_MAX_WORKERS}")
+    if input_data.sampler not in MC_SAMPLERS:
+        raise HTTPException(status_code=400, detail=f"sampler must be one of {MC_SAMPLERS}")
+    if input_data.target_std_error is not None and input_data.target_std_error <= 0:
+        raise HTTPException(status_code=400, detail="target_std_error must be positive")
+
+def _check_autocall_frequency(input_data: BaseModel) -> None:
+    """At least one observation date: 0 < autocall_frequency <= maturity_years"""
+    if not 0 < input_data.autocall_frequency <= input_data.maturity_years:
+        raise HTTPException(status_code=400, detail="autocall_frequency must be positive and at most maturity_years")
+
+def _distribution_output(distribution: dict) -> PayoffDistributionOutput:
+    """Rounded payoff distribution of a Monte Carlo result"""
+    return PayoffDistributionOutput(
+        bin_edges=np.round(distribution["bin_edges"], 2).tolist(),
+        probabilities=np.round(distribution["probabilities"], 6).tolist(),
+        mean=round(distribution["mean"], 2),
+        quantiles={key: round(value, 2) for key, value in distribution["quantiles"].items()},
+        value_at_risk={key: round(value, 2) for key, value in distribution["value_at_risk"].items()},
+        expected_shortfall={key: round(value, 2) for key, value in distribution["expected_shortfall"].items()}
+    )
+
+def _tail_risk_level(distribution: dict, principal: float) -> int:
+    """Risk level from the simulated tail: 95% expected shortfall in % of principal (0-100)"""
+    shortfall = distribution["expected_shortfall"]["95"] / principal * 100 if principal > 0 else 0.0
+    return min(100, max(0, int(shortfall)))
+
+def _autocall_schedule(input_data: AutocallInput, spot: float, n_steps: int):
+    """Autocall level, or one level per observation date with a step-down"""
+    if not input_data.autocall_step_down:
+        return spot * input_data.autocall_barrier / 100
+    return spot * (input_data.autocall_barrier - input_data.autocall_step_down * np.arange(n_steps)) / 100
+
+def _phoenix_terms(input_data: AutocallInput, spot: float) -> dict:
+    """coupon_barrier / memory arguments of the Monte Carlo engines"""
+    coupon_barrier = None if input_data.coupon_barrier is None else spot * input_data.coupon_barrier / 100
+    return {"coupon_barrier": coupon_barrier, "memory": input_data.memory_coupon}
+
+def _price_autocall(input_data: AutocallInput) -> AutocallOutput:
+    """Price an Autocall with the Monte Carlo engine"""
+    input_data = _with_mc_defaults(input_data)
+    spot = input_data.spot_price
+    sigma = input_data.volatility
+    
+    # Observation dates as counted by each engine (Heston tolerates rounding in T / frequency)
+    ratio = input_data.maturity_years / input_data.autocall_frequency
+    n_steps = int(ratio + 1e-9) if input_data.engine == "heston" else int(ratio)
+    K_autocall = _autocall_schedule(input_data, spot, n_steps)
+    K_barrier = spot * (input_data.barrier_level / 100)
+    
+    if input_data.engine == "pde":
+        # Deterministic price, Greeks read from the grid
+        pde = pde_autocall(
+            S0=spot,
+            K_autocall=K_autocall,
+            K_barrier=K_barrier,
+            T=input_data.maturity_years,
+            r=input_data.risk_free_rate,
+            sigma=sigma,
+            coupon=input_data.coupon_rate / 100,
+            principal=input_data.principal,
+            frequency=input_data.autocall_frequency,
+            n_space=input_data.pde_space_steps or settings.PDE_SPACE_STEPS,
+            n_time=input_data.pde_time_steps or settings.PDE_TIME_STEPS
+        )
+        simulation = {"price": pde["price"], "std_error": 0.0, "ci_lower": pde["price"],
+                      "ci_upper": pde["price"], "n_paths": 0, "variance_reduction": 1.0}
+    elif input_data.engine == "heston":
+        # Stochastic volatility paths (QE scheme), vega on the volatility level
+        simulation = heston_autocall(
+            S0=spot,
+            K_autocall=K_autocall,
+            K_barrier=K_barrier,
+            T=input_data.maturity_years,
+            r=input_data.risk_free_rate,
+            coupon=input_data.coupon_rate / 100,
+            principal=input_data.principal,
+            frequency=input_data.autocall_frequency,
+            **input_data.heston.model_dump(),
+            n_sims=input_data.n_simulations,
+            seed=input_data.seed,
+            n_workers=input_data.n_workers,
+            antithetic=input_data.antithetic,
+            control_variate=input_data.control_variate,
+            target_std_error=input_data.target_std_error,
+            batch_size=settings.MC_ADAPTIVE_BATCH,
+            max_chunk_mb=settings.MC_MAX_CHUNK_MB,
+            barrier_monitoring=input_data.barrier_monitoring,
+            max_dt=1 / settings.HESTON_STEPS_PER_YEAR,
+            greeks=True,
+            histogram_bins=settings.MC_HISTOGRAM_BINS,
+            **_phoenix_terms(input_data, spot)
+        )
+    else:
         # Monte Carlo pricing
-        fair_value = monte_carlo_autocall(
+        simulation = monte_carlo_autocall(
             S0=spot,
             K_autocall=K_autocall,
             K_barrier=K_barrier,
@@ -294,47 +860,229 @@ async def price_autocall(input_data: AutocallInput):
             sigma=sigma,
             coupon=input_data.coupon_rate / 100,
             principal=input_data.principal,
-            frequency=input_data.autocall_frequency
+            frequency=input_data.autocall_frequency,
+            n_sims=input_data.n_simulations,
+            seed=input_data.seed,
+            n_workers=input_data.n_workers,
+            sampler=input_data.sampler,
+            antithetic=input_data.antithetic,
+            control_variate=input_data.control_variate,
+            target_std_error=input_data.target_std_error,
+            batch_size=settings.MC_ADAPTIVE_BATCH,
+            max_chunk_mb=settings.MC_MAX_CHUNK_MB,
+            barrier_monitoring=input_data.barrier_monitoring,
+            greeks=True,
+            histogram_bins=settings.MC_HISTOGRAM_BINS,
+            precision=input_data.precision,
+            backend=input_data.backend,
+            **_phoenix_terms(input_data, spot)
         )
+    fair_value = simulation["price"]
+    
+    coupon_value = input_data.principal * (input_data.coupon_rate / 100) * input_data.maturity_years
+    
+    # Greeks of the note: from the grid with the PDE engine, bumped on common random numbers otherwise
+    embedded_put = black_scholes(spot, K_barrier, input_data.maturity_years, 
+                                 input_data.risk_free_rate, sigma, "put")
+    greeks = pde if input_data.engine == "pde" else simulation["greeks"]
+    
+    # Max gain: coupon full term
+    max_gain = coupon_value
+    
+    # Max loss: lose below barrier
+    max_loss = input_data.principal * (1 - input_data.barrier_level / 100)
+    
+    distribution = simulation.get("payoff_distribution")
+    if distribution is not None:
+        # Monte Carlo engines: read from the simulated redemptions
+        probability_profit = distribution["probability_profit"] * 100
+        risk_level = _tail_risk_level(distribution, input_data.principal)
+    else:
+        # Probability of profit (stay above barrier): N(d1) = 1 + put delta
+        probability_profit = (1 + embedded_put["delta"]) * 100
+        distance_to_barrier = (spot - K_barrier) / spot
+        risk_level = min(100, max(0, int((1 - distance_to_barrier) * 40 + sigma * 80)))
+    
+    return AutocallOutput(
+        product="Autocall/Phoenix",
+        fair_value=round(fair_value, 2),
+        coupon_value=round(coupon_value, 2),
+        autocall_barrier_price=round(spot * input_data.autocall_barrier / 100, 2),
+        protection_barrier_price=round(K_barrier, 2),
+        max_gain=round(max_gain, 2),
+        max_loss=round(max_loss, 2),
+        risk_level=risk_level,
+        probability_profit=round(float(probability_profit), 2),
+        delta=round(greeks["delta"], 4),
+        gamma=round(greeks["gamma"], 6),
+        vega=round(greeks["vega"], 2),
+        theta=round(greeks["theta"], 2),
+        std_error=round(float(simulation["std_error"]), 4),
+        ci_lower=round(float(simulation["ci_lower"]), 2),
+        ci_upper=round(float(simulation["ci_upper"]), 2),
+        n_paths=int(simulation["n_paths"]),
+        variance_reduction=round(float(simulation["variance_reduction"]), 2),
+        autocall_probabilities=(None if distribution is None
+                                else np.round(simulation["autocall_probabilities"], 4).tolist()),
+        payoff_distribution=None if distribution is None else _distribution_output(distribution),
+        backend=simulation.get("backend")
+    )
+
+@router.post("/autocall", response_model=AutocallOutput)
+async def price_autocall(input_data: AutocallInput):
+    """Price Autocall / Phoenix structured product"""
+    try:
+        if input_data.spot_price is None:
+            raise HTTPException(status_code=400, detail="spot_price required")
         
-        coupon_value = input_data.principal * (input_data.coupon_rate / 100) * input_data.maturity_years
+        if input_data.engine not in AUTOCALL_ENGINES:
+            raise HTTPException(status_code=400, detail=f"engine must be one of {AUTOCALL_ENGINES}")
+        _check_pde_grid(input_data)
+        _check_monte_carlo(input_data)
         
-        # Greeks (approximation via embedded put)
-        greeks = calculate_greeks(spot, K_barrier, input_data.maturity_years, 
-                                 input_data.risk_free_rate, sigma, "put")
+        if input_data.barrier_monitoring is not None and input_data.engine == "pde":
+            raise HTTPException(status_code=400, detail="barrier_monitoring requires a Monte Carlo engine")
         
-        # Max gain: coupon full term
-        max_gain = coupon_value
+        if input_data.barrier_monitoring is not None and input_data.barrier_monitoring < 0:
+            raise HTTPException(status_code=400, detail="barrier_monitoring must be >= 0 (0: continuous) or null")
         
-        # Max loss: lose below barrier
-        max_loss = input_data.principal * (1 - input_data.barrier_level / 100)
+        if input_data.engine == "heston" and input_data.barrier_monitoring == 0:
+            raise HTTPException(status_code=400, detail="heston engine monitors the knock-in discretely (barrier_monitoring > 0)")
         
-        # Risk level
-        distance_to_barrier = (spot - K_barrier) / spot
-        risk_level = min(100, max(0, int((1 - distance_to_barrier) * 40 + sigma * 80)))
+        if input_data.engine == "heston" and input_data.sampler != "pseudo":
+            raise HTTPException(status_code=400, detail="heston engine only supports the pseudo sampler")
         
-        # Probability of profit (stay above barrier)
-        d1 = (np.log(spot / K_barrier) + 
-              (input_data.risk_free_rate + 0.5 * sigma**2) * input_data.maturity_years) / \
-             (sigma * np.sqrt(input_data.maturity_years))
-        probability_profit = norm.cdf(d1) * 100
-        
-        return AutocallOutput(
-            product="Autocall/Phoenix",
-            fair_value=round(fair_value, 2),
-            coupon_value=round(coupon_value, 2),
-            autocall_barrier_price=round(K_autocall, 2),
-            protection_barrier_price=round(K_barrier, 2),
-            max_gain=round(max_gain, 2),
-            max_loss=round(max_loss, 2),
-            risk_level=risk_level,
-            probability_profit=round(probability_profit, 2),
-            delta=round(greeks["delta"], 4),
-            gamma=round(greeks["gamma"], 6),
-            vega=round(greeks["vega"], 2),
-            theta=round(greeks["theta"], 2)
-        )
+        if input_data.precision not in MC_PRECISIONS:
+            raise HTTPException(status_code=400, detail=f"precision must be one of {MC_PRECISIONS}")
+        
+        if input_data.precision != "float64" and input_data.engine != "monte_carlo":
+            raise HTTPException(status_code=400, detail="float32 precision requires the monte_carlo engine")
+        
+        if input_data.backend not in KERNEL_BACKENDS:
+            raise HTTPException(status_code=400, detail=f"backend must be one of {KERNEL_BACKENDS}")
+        
+        if input_data.backend != "numpy" and input_data.engine != "monte_carlo":
+            raise HTTPException(status_code=400, detail="numba backend requires the monte_carlo engine")
         
+        phoenix = input_data.coupon_barrier is not None or input_data.autocall_step_down != 0
+        if phoenix and input_data.engine == "pde":
+            raise HTTPException(status_code=400, detail="coupon_barrier and autocall_step_down require a Monte Carlo engine")
+        
+        if input_data.memory_coupon and input_data.coupon_barrier is None:
+            raise HTTPException(status_code=400, detail="memory_coupon requires a coupon_barrier")
+        
+        _check_autocall_frequency(input_data)
+        last_level = input_data.autocall_barrier - input_data.autocall_step_down * (
+            int(input_data.maturity_years / input_data.autocall_frequency) - 1)
+        if input_data.autocall_step_down < 0 or last_level <= 0:
+            raise HTTPException(status_code=400, detail="autocall_step_down must be >= 0 and keep the autocall barrier above 0")
+        
+        input_data = await _with_implied_volatility(input_data)
+        input_data = await _with_heston_parameters(input_data)
+        if input_data.volatility is None:
+            raise HTTPException(status_code=400, detail="volatility required")
+        
+        return await _price_cached("autocall", _with_mc_defaults(input_data), _price_autocall)
+        
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ===== WORST-OF AUTOCALL =====
+def _basket_correlation(input_data: WorstOfAutocallInput) -> np.ndarray:
+    """Correlation matrix of the basket (uniform average_correlation if none was given)"""
+    if input_data.correlation is not None:
+        return np.array(input_data.correlation, dtype=float)
+    n_assets = len(input_data.tickers)
+    correlation = np.full((n_assets, n_assets), input_data.average_correlation)
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+def _price_worst_of_autocall(input_data: WorstOfAutocallInput) -> WorstOfAutocallOutput:
+    """Price a worst-of Autocall with the correlated multi-asset Monte Carlo engine"""
+    input_data = _with_mc_defaults(input_data)
+    vols = np.array(input_data.volatilities, dtype=float)
+    
+    simulation = monte_carlo_worst_of_autocall(
+        vols=vols,
+        correlation=_basket_correlation(input_data),
+        autocall_level=input_data.autocall_barrier / 100,
+        barrier_level=input_data.barrier_level / 100,
+        T=input_data.maturity_years,
+        r=input_data.risk_free_rate,
+        coupon=input_data.coupon_rate / 100,
+        principal=input_data.principal,
+        frequency=input_data.autocall_frequency,
+        n_sims=input_data.n_simulations,
+        seed=input_data.seed,
+        n_workers=input_data.n_workers,
+        sampler=input_data.sampler,
+        antithetic=input_data.antithetic,
+        target_std_error=input_data.target_std_error,
+        batch_size=settings.MC_ADAPTIVE_BATCH,
+        max_chunk_mb=settings.MC_MAX_CHUNK_MB,
+        histogram_bins=settings.MC_HISTOGRAM_BINS
+    )
+    
+    coupon_value = input_data.principal * (input_data.coupon_rate / 100) * input_data.maturity_years
+    max_loss = input_data.principal * (1 - input_data.barrier_level / 100)
+    distribution = simulation["payoff_distribution"]
+    
+    return WorstOfAutocallOutput(
+        product="Worst-of Autocall",
+        tickers=input_data.tickers,
+        fair_value=round(float(simulation["price"]), 2),
+        coupon_value=round(coupon_value, 2),
+        max_gain=round(coupon_value, 2),
+        max_loss=round(max_loss, 2),
+        risk_level=_tail_risk_level(distribution, input_data.principal),
+        probability_profit=round(distribution["probability_profit"] * 100, 2),
+        std_error=round(float(simulation["std_error"]), 4),
+        ci_lower=round(float(simulation["ci_lower"]), 2),
+        ci_upper=round(float(simulation["ci_upper"]), 2),
+        n_paths=int(simulation["n_paths"]),
+        variance_reduction=round(float(simulation["variance_reduction"]), 2),
+        autocall_probabilities=np.round(simulation["autocall_probabilities"], 4).tolist(),
+        payoff_distribution=_distribution_output(distribution)
+    )
+
+@router.post("/worst-of-autocall", response_model=WorstOfAutocallOutput)
+async def price_worst_of_autocall(input_data: WorstOfAutocallInput):
+    """Price a worst-of Autocall on a basket of correlated underlyings"""
+    try:
+        n_assets = len(input_data.tickers)
+        if not 1 <= n_assets <= settings.WORST_OF_MAX_ASSETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Basket must hold 1 to {settings.WORST_OF_MAX_ASSETS} tickers (got {n_assets})"
+            )
+        
+        if input_data.volatilities is None:
+            raise HTTPException(status_code=400, detail="volatilities required")
+        if len(input_data.volatilities) != n_assets:
+            raise HTTPException(status_code=400, detail="volatilities must have one entry per ticker")
+        _check_monte_carlo(input_data)
+        _check_autocall_frequency(input_data)
+        
+        try:
+            correlation = _basket_correlation(input_data)
+            if correlation.shape != (n_assets, n_assets):
+                raise ValueError(f"correlation must be {n_assets}x{n_assets}")
+            correlation_factor(correlation)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return await _price_cached("worst-of-autocall", _with_mc_defaults(input_data), _price_worst_of_autocall)
+        
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -345,163 +1093,535 @@ async def price_autocall(input_data: AutocallInput):
 async def price_capital_protected(input_data: CapitalProtectedInput):
     """Price Capital Protected structured product"""
     try:
-        spot = input_data.spot_price
-        if spot is None:
+        if input_data.spot_price is None:
             raise HTTPException(status_code=400, detail="spot_price required")
         
-        sigma = input_data.volatility
-        if sigma is None:
+        input_data = await _with_implied_volatility(input_data)
+        if input_data.volatility is None:
             raise HTTPException(status_code=400, detail="volatility required")
         
-        # Zero-coupon bond to guarantee capital
-        protection_amount = input_data.principal * (input_data.protection_level / 100)
-        bond_cost = protection_amount * np.exp(-input_data.risk_free_rate * input_data.maturity_years)
+        return await _price_cached("capital-protected", input_data, partial(_price_one, _price_capital_protected))
         
-        # Budget for calls
-        call_budget = input_data.principal - bond_cost
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ===== WARRANT =====
+def _check_warrant(input_data: BaseModel) -> None:
+    if input_data.exercise not in WARRANT_EXERCISES:
+        raise HTTPException(status_code=400, detail=f"exercise must be one of {WARRANT_EXERCISES}")
+    if input_data.engine not in WARRANT_ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of {WARRANT_ENGINES}")
+    if input_data.basis not in LSM_BASES or input_data.basis_degree < 1:
+        raise HTTPException(status_code=400, detail=f"basis must be one of {LSM_BASES} with basis_degree >= 1")
+    if input_data.exercise == "bermudan" and not (input_data.exercise_frequency or 0) > 0:
+        raise HTTPException(status_code=400, detail="bermudan exercise requires exercise_frequency > 0")
+
+@router.post("/warrant", response_model=WarrantOutput)
+async def price_warrant(input_data: WarrantInput):
+    """Price Warrant with leverage (knock-out turbos: /turbo)"""
+    try:
+        if input_data.spot_price is None:
+            raise HTTPException(status_code=400, detail="spot_price required")
+        _check_warrant(input_data)
         
-        # Call option price (ATM)
-        call_price = black_scholes_call(spot, spot, input_data.maturity_years, 
-                                       input_data.risk_free_rate, sigma)
+        input_data = input_data.model_copy(update={
+            "n_simulations": _simulation_count(input_data.n_simulations, settings.MC_DEFAULT_SIMULATIONS)
+        })
+        input_data = await _with_implied_volatility(input_data)
+        if input_data.volatility is None:
+            raise HTTPException(status_code=400, detail="volatility required")
         
-        # Number of call options we can buy
-        n_calls = call_budget / call_price if call_price > 0 else 0
+        return await _price_cached("warrant", input_data, partial(_price_one, _price_warrants))
         
-        # Effective participation (adjusted)
-        effective_participation = n_calls * (input_data.participation_rate / 100) / (input_data.principal / spot)
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ===== TURBO =====
+def _check_turbo(input_data: BaseModel) -> None:
+    if input_data.turbo_type not in TURBO_TYPES:
+        raise HTTPException(status_code=400, detail=f"turbo_type must be one of {tuple(TURBO_TYPES)}")
+    if input_data.barrier_monitoring is not None and input_data.barrier_monitoring < 0:
+        raise HTTPException(status_code=400, detail="barrier_monitoring must be positive (or null: continuous)")
+
+@router.post("/turbo", response_model=TurboOutput)
+async def price_turbo(input_data: TurboInput):
+    """Price a knock-out turbo certificate (Reiner-Rubinstein closed form)"""
+    try:
+        if input_data.spot_price is None:
+            raise HTTPException(status_code=400, detail="spot_price required")
+        _check_turbo(input_data)
         
-        # Fair value
-        fair_value = protection_amount + call_budget
+        input_data = await _with_implied_volatility(input_data)
+        if input_data.volatility is None:
+            raise HTTPException(status_code=400, detail="volatility required")
         
-        # Greeks
-        greeks = calculate_greeks(spot, spot, input_data.maturity_years, 
-                                 input_data.risk_free_rate, sigma, "call")
+        return await _price_cached("turbo", input_data, partial(_price_one, _price_turbos))
         
-        # Max gain: si le sous-jacent double
-        max_gain = input_data.principal * effective_participation * 1.0  # Assume 100% upside
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/turbo/range", response_model=TurboRangeOutput)
+async def price_turbo_range(input_data: TurboRangeInput):
+    """Price a whole range of turbos on one underlying (one strike / barrier pair each) in one array pass"""
+    try:
+        if input_data.spot_price is None:
+            raise HTTPException(status_code=400, detail="spot_price required")
+        _check_turbo(input_data)
+        if not input_data.strikes:
+            raise HTTPException(status_code=400, detail="strikes required")
+        barriers = input_data.barriers or input_data.strikes
+        if len(barriers) != len(input_data.strikes):
+            raise HTTPException(status_code=400, detail="barriers must have one entry per strike")
         
-        # Max loss: 0 si 100% protected
-        max_loss = input_data.principal * (1 - input_data.protection_level / 100)
+        input_data = await _with_implied_volatility(input_data)
+        if input_data.volatility is None:
+            raise HTTPException(status_code=400, detail="volatility required")
         
-        # Risk level: très bas car capital protégé
-        risk_level = int(max_loss / input_data.principal * 100) if input_data.principal > 0 else 0
+        common = input_data.model_dump(exclude={"strikes", "barriers"})
+        turbos = [TurboInput(**common, strike_price=strike, barrier=barrier)
+                  for strike, barrier in zip(input_data.strikes, barriers)]
+        results = await get_executor("pricing").run(_price_turbos, turbos)
+        return TurboRangeOutput(n_products=len(results), results=results)
         
-        # Probability: toujours élevée car capital garanti
-        d1 = (np.log(spot / spot) + 
-              (input_data.risk_free_rate + 0.5 * sigma**2) * input_data.maturity_years) / \
-             (sigma * np.sqrt(input_data.maturity_years))
-        probability_profit = 50 + norm.cdf(d1) * 50  # Au moins 50% car capital garanti
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ===== BATCH =====
+BATCH_PRICERS = {
+    "reverse-convertible": (ReverseConvertibleInput, _price_reverse_convertibles),
+    "capital-protected": (CapitalProtectedInput, _price_capital_protected),
+    "warrant": (WarrantInput, _price_warrants),
+    "turbo": (TurboInput, _price_turbos),
+}
+# Per-product checks of the single-product endpoints, run on each batch entry
+BATCH_CHECKS = {
+    "reverse-convertible": _check_reverse_convertible,
+    "warrant": _check_warrant,
+    "turbo": _check_turbo,
+}
+
+@router.post("/batch", response_model=BatchPricingOutput)
+async def price_batch(input_data: BatchPricingInput):
+    """
+    Price a list of mixed closed-form products in one request
+    
+    Products are grouped by type and each group is priced in a single array pass.
+    Results are returned in input order.
+    """
+    try:
+        groups = {}
+        for i, item in enumerate(input_data.products):
+            if item.product_type not in BATCH_PRICERS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"products[{i}]: unsupported product_type '{item.product_type}'"
+                )
+            
+            model, _ = BATCH_PRICERS[item.product_type]
+            try:
+                product = model(**item.parameters)
+            except ValidationError as e:
+                raise HTTPException(status_code=422, detail=f"products[{i}]: {e}")
+            
+            if product.spot_price is None:
+                raise HTTPException(status_code=400, detail=f"products[{i}]: spot_price required")
+            if item.product_type in BATCH_CHECKS:
+                try:
+                    BATCH_CHECKS[item.product_type](product)
+                except HTTPException as e:
+                    raise HTTPException(status_code=e.status_code, detail=f"products[{i}]: {e.detail}")
+            product = await _with_implied_volatility(product)
+            product = await _with_heston_parameters(product)
+            if product.volatility is None:
+                raise HTTPException(status_code=400, detail=f"products[{i}]: volatility required")
+            
+            groups.setdefault(item.product_type, []).append((i, product))
         
-        return CapitalProtectedOutput(
-            product="Capital Garanti",
-            fair_value=round(fair_value, 2),
-            guaranteed_capital=round(protection_amount, 2),
-            call_budget=round(call_budget, 2),
-            participation_rate=round(effective_participation * 100, 2),
-            max_gain=round(max_gain, 2),
-            max_loss=round(max_loss, 2),
-            risk_level=risk_level,
-            probability_profit=round(probability_profit, 2),
-            delta=round(greeks["delta"] * n_calls, 4),
-            gamma=round(greeks["gamma"] * n_calls, 6),
-            vega=round(greeks["vega"] * n_calls, 2),
-            theta=round(greeks["theta"] * n_calls, 2),
-            break_even_price=round(spot, 2)
-        )
+        results = [None] * len(input_data.products)
+        for product_type, entries in groups.items():
+            _, pricer = BATCH_PRICERS[product_type]
+            indices = [i for i, _ in entries]
+            outputs = await get_executor("pricing").run(pricer, [product for _, product in entries])
+            for i, output in zip(indices, outputs):
+                results[i] = output
         
+        return BatchPricingOutput(n_products=len(results), results=results)
+        
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
-# ===== WARRANT =====
-@router.post("/warrant", response_model=WarrantOutput)
-async def price_warrant(input_data: WarrantInput):
-    """Price Warrant / Turbo with leverage"""
+# ===== COMPARE =====
+COMPARE_MODELS = {
+    "autocall": AutocallInput,
+    "reverse-convertible": ReverseConvertibleInput,
+    "capital-protected": CapitalProtectedInput,
+    "warrant": WarrantInput,
+}
+
+# Engine options the shared GBM paths cannot honor per product (path count and seed are set on the request)
+COMPARE_UNSUPPORTED = {
+    AutocallInput: ("barrier_monitoring", "precision", "sampler", "antithetic", "control_variate",
+                    "target_std_error", "backend", "n_workers", "n_simulations", "seed"),
+}
+
+def _compare_terms(input_data: CompareInput) -> List[BaseModel]:
+    """Validate each product's terms with its single-product input model, market fields from the request"""
+    market = {"ticker": input_data.ticker, "spot_price": input_data.spot_price,
+              "volatility": input_data.volatility, "risk_free_rate": input_data.risk_free_rate}
+    return [COMPARE_MODELS[item.product_type](**{**item.parameters, **market}) for item in input_data.products]
+
+def _compare_spec(product: BaseModel) -> dict:
+    """Payoff spec of compare_products() with the conventions of the single-product pricers"""
+    S0, T, r = product.spot_price, product.maturity_years, product.risk_free_rate
+    if isinstance(product, AutocallInput):
+        return {"type": "autocall", "T": T, "S0": S0,
+                "K_autocall": _autocall_schedule(product, S0, int(T / product.autocall_frequency)),
+                "K_barrier": S0 * product.barrier_level / 100, "coupon": product.coupon_rate / 100,
+                "principal": product.principal, "frequency": product.autocall_frequency,
+                "invested": product.principal, **_phoenix_terms(product, S0)}
+    if isinstance(product, ReverseConvertibleInput):
+        return {"type": "reverse-convertible", "T": T, "principal": product.principal,
+                "coupon_payment": product.principal * product.coupon_rate / 100,
+                "n_shares": product.principal / S0, "barrier": S0 * product.barrier_level / 100,
+                "invested": product.principal}
+    if isinstance(product, CapitalProtectedInput):
+        # Bond for the protected amount, the rest buys at-the-money calls
+        protection = product.principal * product.protection_level / 100
+        call_budget = product.principal - protection * np.exp(-r * T)
+        call_price = float(black_scholes(S0, S0, T, r, product.volatility, "call")["price"])
+        n_calls = call_budget / call_price if call_price > 0 else 0.0
+        return {"type": "capital-protected", "T": T, "protection": protection, "strike": S0,
+                "n_calls": n_calls * product.participation_rate / 100, "invested": product.principal}
+    is_call = product.warrant_type.lower() == "call"
+    quote = float(black_scholes(S0, product.strike_price, T, r, product.volatility,
+                                "call" if is_call else "put")["price"]) * product.leverage
+    return {"type": "warrant", "T": T, "strike": product.strike_price, "is_call": is_call,
+            "leverage": product.leverage, "invested": quote}
+
+def _price_comparison(input_data: CompareInput) -> CompareOutput:
+    """Price every product of the request on one set of simulated paths"""
+    products = _compare_terms(input_data)
+    comparison = compare_products(
+        S0=input_data.spot_price,
+        r=input_data.risk_free_rate,
+        sigma=input_data.volatility,
+        products={str(i): _compare_spec(product) for i, product in enumerate(products)},
+        n_sims=_simulation_count(input_data.n_simulations, settings.MC_DEFAULT_SIMULATIONS),
+        seed=settings.MC_SEED if input_data.seed is None else input_data.seed,
+        max_chunk_mb=settings.MC_MAX_CHUNK_MB,
+        histogram_bins=settings.MC_HISTOGRAM_BINS
+    )
+    results = []
+    for i, item in enumerate(input_data.products):
+        result = comparison["products"][str(i)]
+        results.append(ComparedProduct(
+            product_type=item.product_type,
+            fair_value=round(result["fair_value"], 2),
+            std_error=round(result["std_error"], 4),
+            invested=round(result["invested"], 2),
+            probability_profit=round(result["probability_profit"], 2),
+            expected_return=round(result["expected_return"], 2),
+            return_quantiles={key: round(value, 2) for key, value in result["return_quantiles"].items()},
+            payoff_distribution=_distribution_output(result["payoff_distribution"])
+        ))
+    return CompareOutput(
+        ticker=input_data.ticker,
+        spot_price=input_data.spot_price,
+        volatility=input_data.volatility,
+        n_paths=comparison["n_paths"],
+        results=results,
+        correlation=[[round(c, 4) for c in row] for row in comparison["correlation"]]
+    )
+
+@router.post("/compare", response_model=CompareOutput)
+async def price_compare(input_data: CompareInput):
+    """
+    Compare structured products on the same simulated paths
+
+    Every payoff is evaluated on one set of GBM paths of the underlying, so fair
+    values, return distributions and probabilities of profit are consistent
+    across products, for about the cost of a single autocall pricing.
+    """
     try:
-        spot = input_data.spot_price
-        if spot is None:
+        if not input_data.products:
+            raise HTTPException(status_code=400, detail="at least one product required")
+        if input_data.spot_price is None:
             raise HTTPException(status_code=400, detail="spot_price required")
-        
-        sigma = input_data.volatility
-        if sigma is None:
+        input_data = input_data.model_copy(update={
+            "n_simulations": _simulation_count(input_data.n_simulations, settings.MC_DEFAULT_SIMULATIONS)
+        })
+
+        for i, item in enumerate(input_data.products):
+            if item.product_type not in COMPARE_MODELS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"products[{i}]: unsupported product_type '{item.product_type}' (expected one of {tuple(COMPARE_MODELS)})"
+                )
+        try:
+            products = _compare_terms(input_data)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+        # Shared GBM paths: single-volatility engines and terminal payoffs only
+        for i, product in enumerate(products):
+            if getattr(product, "engine", None) not in (None, "closed_form", "monte_carlo", "lsm"):
+                raise HTTPException(status_code=400, detail=f"products[{i}]: engine '{product.engine}' not supported")
+            for field in COMPARE_UNSUPPORTED.get(type(product), ()):
+                if getattr(product, field) != type(product).model_fields[field].default:
+                    raise HTTPException(status_code=400, detail=f"products[{i}]: {field} not supported")
+            if isinstance(product, AutocallInput):
+                try:
+                    _check_autocall_frequency(product)
+                except HTTPException as e:
+                    raise HTTPException(status_code=400, detail=f"products[{i}]: {e.detail}")
+            if isinstance(product, WarrantInput) and product.exercise != "european":
+                raise HTTPException(status_code=400, detail=f"products[{i}]: only european warrants supported")
+
+        if input_data.volatility is None and settings.IMPLIED_VOL_ENABLED:
+            # One volatility for all paths: at the money, longest maturity
+            maturity = max(product.maturity_years for product in products)
+            sigma = await _from_vol_surface(vol_surface_cache.volatility, input_data.ticker, 1.0, maturity)
+            if sigma is not None:
+                input_data = input_data.model_copy(update={"volatility": sigma})
+        if input_data.volatility is None:
             raise HTTPException(status_code=400, detail="volatility required")
+
+        return await _price_cached("compare", input_data, _price_comparison)
+
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ===== SCENARIOS =====
+# Each pricer reprices the product issued at the base inputs (strikes, barriers and
+# initial fixing stay at the base spot) on broadcast spot/vol/maturity/rate axes
+# of shapes (n,1,1,1), (1,n,1,1), (1,1,n,1) and (1,1,1,n).
+
+def _reverse_convertible_scenarios(p: ReverseConvertibleInput, S, sigma, T, r) -> dict:
+    barrier_strike = p.spot_price * p.barrier_level / 100
+    n_shares = p.principal / p.spot_price
+    pv_coupons = _pv_annual_coupons(p.principal * p.coupon_rate / 100, T, r)
+    greeks = black_scholes(S, barrier_strike, T, r, sigma, "put")
+    return {
+        "product": "Reverse Convertible",
+        "fair_value": p.principal + pv_coupons - n_shares * greeks["price"],
+        **{greek: greeks[greek] * n_shares for greek in ("delta", "gamma", "vega", "theta")}
+    }
+
+def _capital_protected_scenarios(p: CapitalProtectedInput, S, sigma, T, r) -> dict:
+    # Number of ATM calls bought at issue with the budget left after the bond
+    protection_amount = p.principal * p.protection_level / 100
+    call_budget = p.principal - protection_amount * np.exp(-p.risk_free_rate * p.maturity_years)
+    issue_call = black_scholes(p.spot_price, p.spot_price, p.maturity_years, p.risk_free_rate,
+                               p.volatility, "call")["price"]
+    n_calls = call_budget / issue_call if issue_call > 0 else 0.0
+    
+    greeks = black_scholes(S, p.spot_price, T, r, sigma, "call")
+    return {
+        "product": "Capital Garanti",
+        "fair_value": protection_amount + n_calls * greeks["price"],
+        **{greek: greeks[greek] * n_calls for greek in ("delta", "gamma", "vega", "theta")}
+    }
+
+def _warrant_scenarios(p: WarrantInput, S, sigma, T, r) -> dict:
+    option_type = "call" if p.warrant_type.lower() == "call" else "put"
+    greeks = black_scholes(S, p.strike_price, T, r, sigma, option_type)
+    return {
+        "product": f"Warrant {p.warrant_type.upper()}",
+        "fair_value": greeks["price"] * p.leverage,
+        **{greek: greeks[greek] * p.leverage for greek in ("delta", "gamma", "vega", "theta")}
+    }
+
+def _turbo_scenarios(p: TurboInput, S, sigma, T, r) -> dict:
+    option_type, barrier_type = TURBO_TYPES[p.turbo_type]
+    barrier = p.strike_price if p.barrier is None else p.barrier
+    greeks = barrier_option(S, p.strike_price, barrier, T, r, sigma, option_type, barrier_type,
+                            p.rebate, p.barrier_monitoring)
+    return {
+        "product": f"Turbo {p.turbo_type.upper()}",
+        "fair_value": greeks["price"] * p.ratio,
+        **{greek: greeks[greek] * p.ratio for greek in ("delta", "gamma", "vega", "theta")}
+    }
+
+def _autocall_scenarios(p: AutocallInput, S, sigma, T, r) -> dict:
+    p = _with_mc_defaults(p)
+    K_autocall = p.spot_price * p.autocall_barrier / 100
+    K_barrier = p.spot_price * p.barrier_level / 100
+    simulation = monte_carlo_autocall_scenarios(
+        spots=S.ravel(), vols=sigma.ravel(), maturities=T.ravel(), rates=r.ravel(),
+        S_ref=p.spot_price,
+        K_autocall=K_autocall,
+        K_barrier=K_barrier,
+        coupon=p.coupon_rate / 100,
+        principal=p.principal,
+        frequency=p.autocall_frequency,
+        n_sims=p.n_simulations,
+        seed=p.seed,
+        sampler=p.sampler,
+        antithetic=p.antithetic,
+        max_chunk_mb=settings.MC_MAX_CHUNK_MB,
+        greeks=True
+    )
+    # Delta and gamma of the note on common random numbers. Vega and theta from the embedded
+    # put: bumping the vol and maturity axes would multiply the grid cost
+    put = black_scholes(S, K_barrier, T, r, sigma, "put")
+    return {
+        "product": "Autocall/Phoenix",
+        "fair_value": simulation["price"],
+        "std_error": simulation["std_error"],
+        "delta": simulation["delta"],
+        "gamma": simulation["gamma"],
+        "vega": put["vega"],
+        "theta": put["theta"]
+    }
+
+SCENARIO_PRICERS = {
+    "reverse-convertible": (ReverseConvertibleInput, _reverse_convertible_scenarios),
+    "capital-protected": (CapitalProtectedInput, _capital_protected_scenarios),
+    "warrant": (WarrantInput, _warrant_scenarios),
+    "turbo": (TurboInput, _turbo_scenarios),
+    "autocall": (AutocallInput, _autocall_scenarios),
+}
+
+# Options the grid pricers do not model: rejected unless left at their default
+# (engine: closed form for reverse convertibles, Monte Carlo for autocalls)
+SCENARIO_UNSUPPORTED = {
+    "reverse-convertible": ("engine", "barrier_monitoring", "heston", "pde_space_steps", "pde_time_steps"),
+    "warrant": ("exercise",),
+    "autocall": ("engine", "barrier_monitoring", "precision", "backend", "control_variate", "target_std_error", "n_workers",
+                 "coupon_barrier", "memory_coupon", "autocall_step_down", "heston", "pde_space_steps", "pde_time_steps"),
+}
+# Checks of the single-product endpoints, run on the base scenario
+SCENARIO_CHECKS = {
+    "reverse-convertible": (_check_reverse_convertible,),
+    "warrant": (_check_warrant,),
+    "turbo": (_check_turbo,),
+    "autocall": (_check_monte_carlo, _check_autocall_frequency),
+}
+
+# Rounding of the single-product outputs
+SCENARIO_DECIMALS = {"fair_value": 2, "delta": 4, "gamma": 6, "vega": 2, "theta": 2, "std_error": 4}
+
+def _price_scenarios(scenario_pricer, base, spots, vols, maturities, rates) -> ScenarioOutput:
+    """Evaluate a scenario pricer on the full grid in one array pass"""
+    shape = (len(spots), len(vols), len(maturities), len(rates))
+    result = scenario_pricer(
+        base,
+        spots.reshape(-1, 1, 1, 1),
+        vols.reshape(1, -1, 1, 1),
+        maturities.reshape(1, 1, -1, 1),
+        rates.reshape(1, 1, 1, -1)
+    )
+    grids = {
+        key: np.round(np.broadcast_to(result[key], shape), decimals).tolist()
+        for key, decimals in SCENARIO_DECIMALS.items() if key in result
+    }
+    return ScenarioOutput(
+        product=result["product"],
+        spot_prices=spots.tolist(),
+        volatilities=vols.tolist(),
+        maturities=maturities.tolist(),
+        rates=rates.tolist(),
+        shape=list(shape),
+        **grids
+    )
+
+@router.post("/{product}/scenarios", response_model=ScenarioOutput)
+async def price_scenarios(product: str, input_data: ScenarioInput):
+    """
+    Fair value and Greeks on a spot x volatility x maturity x rate grid
+    
+    The product is issued at the base parameters and repriced at every grid
+    point in one pass. For autocalls, every point reuses the same normal draws.
+    Options the grid pricers do not model (SCENARIO_UNSUPPORTED) are rejected.
+    """
+    try:
+        if product not in SCENARIO_PRICERS:
+            raise HTTPException(status_code=404, detail=f"Unsupported product '{product}'")
         
-        # Option price
-        if input_data.warrant_type.lower() == "call":
-            option_price = black_scholes_call(spot, input_data.strike_price, 
-                                             input_data.maturity_years, 
-                                             input_data.risk_free_rate, sigma)
-            option_type = "call"
-            intrinsic = max(spot - input_data.strike_price, 0)
-        else:
-            option_price = black_scholes_put(spot, input_data.strike_price, 
-                                            input_data.maturity_years, 
-                                            input_data.risk_free_rate, sigma)
-            option_type = "put"
-            intrinsic = max(input_data.strike_price - spot, 0)
-        
-        # Warrant price with leverage
-        warrant_price = option_price * input_data.leverage
-        
-        # Greeks
-        greeks = calculate_greeks(spot, input_data.strike_price, input_data.maturity_years, 
-                                 input_data.risk_free_rate, sigma, option_type)
-        
-        # Time value
-        time_value = option_price - intrinsic
-        
-        # Max gain: théoriquement illimité pour call, strike pour put
-        if input_data.warrant_type.lower() == "call":
-            # Assume 50% upside
-            max_gain = (spot * 0.5) * input_data.leverage
-        else:
-            # Put: max gain = strike price
-            max_gain = input_data.strike_price * input_data.leverage
+        model, scenario_pricer = SCENARIO_PRICERS[product]
+        try:
+            base = model(**input_data.parameters)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"parameters: {e}")
         
-        # Max loss: prime payée × leverage
-        max_loss = warrant_price
+        if base.spot_price is None:
+            raise HTTPException(status_code=400, detail="spot_price required")
+        for field in SCENARIO_UNSUPPORTED.get(product, ()):
+            if getattr(base, field) != model.model_fields[field].default:
+                raise HTTPException(status_code=400, detail=f"{field} is not supported on scenario grids")
+        for check in SCENARIO_CHECKS.get(product, ()):
+            check(base)
+        base = await _with_implied_volatility(base)
+        if base.volatility is None:
+            raise HTTPException(status_code=400, detail="volatility required")
         
-        # Risk level: très élevé (leverage)
-        risk_level = min(100, int(50 + input_data.leverage * 8))
+        axes = {}
+        for name, base_value in (("spot", base.spot_price), ("volatility", base.volatility),
+                                 ("maturity", base.maturity_years), ("rate", base.risk_free_rate)):
+            scenario_range = getattr(input_data, name)
+            if scenario_range is None:
+                axes[name] = np.array([base_value], dtype=float)
+            elif scenario_range.steps < 1:
+                raise HTTPException(status_code=400, detail=f"{name}.steps must be at least 1")
+            else:
+                axes[name] = np.linspace(scenario_range.start, scenario_range.stop, scenario_range.steps)
         
-        # Probability ITM
-        if input_data.warrant_type.lower() == "call":
-            d2 = (np.log(spot / input_data.strike_price) + 
-                  (input_data.risk_free_rate - 0.5 * sigma**2) * input_data.maturity_years) / \
-                 (sigma * np.sqrt(input_data.maturity_years))
-        else:
-            d2 = (np.log(input_data.strike_price / spot) + 
-                  (input_data.risk_free_rate - 0.5 * sigma**2) * input_data.maturity_years) / \
-                 (sigma * np.sqrt(input_data.maturity_years))
+        for name in ("spot", "volatility", "maturity"):
+            if np.any(axes[name] <= 0):
+                raise HTTPException(status_code=400, detail=f"{name} values must be positive")
         
-        probability_profit = norm.cdf(d2) * 100
+        n_points = int(np.prod([len(values) for values in axes.values()]))
+        if n_points > settings.SCENARIO_MAX_POINTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Scenario grid has {n_points} points (max {settings.SCENARIO_MAX_POINTS})"
+            )
         
-        # Break-even
-        if input_data.warrant_type.lower() == "call":
-            break_even = input_data.strike_price + option_price
-        else:
-            break_even = input_data.strike_price - option_price
-        
-        return WarrantOutput(
-            product=f"Warrant {input_data.warrant_type.upper()}",
-            fair_value=round(warrant_price, 2),
-            option_value=round(option_price, 2),
-            leverage=input_data.leverage,
-            strike_price=round(input_data.strike_price, 2),
-            intrinsic_value=round(intrinsic * input_data.leverage, 2),
-            time_value=round(time_value * input_data.leverage, 2),
-            max_gain=round(max_gain, 2),
-            max_loss=round(max_loss, 2),
-            risk_level=risk_level,
-            probability_profit=round(probability_profit, 2),
-            delta=round(greeks["delta"] * input_data.leverage, 4),
-            gamma=round(greeks["gamma"] * input_data.leverage, 6),
-            vega=round(greeks["vega"] * input_data.leverage, 2),
-            theta=round(greeks["theta"] * input_data.leverage, 2),
-            break_even_price=round(break_even, 2)
+        return await get_executor("pricing").run(
+            _price_scenarios, scenario_pricer, base,
+            axes["spot"], axes["volatility"], axes["maturity"], axes["rate"]
         )
         
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -511,7 +1631,7 @@ async def price_warrant(input_data: WarrantInput):
 @router.get("/")
 async def pricing_info():
     return {
-        "available_products": ["reverse-convertible", "autocall", "capital-protected", "warrant"],
+        "available_products": ["reverse-convertible", "autocall", "worst-of-autocall", "capital-protected", "warrant", "turbo"],
         "status": "operational"
     }
 
@@ -519,5 +1639,28 @@ async def pricing_info():
 async def health_check():
     return {
         "status": "healthy",
-        "products_available": ["autocall", "reverse_convertible", "capital_protected", "warrant"]
+        "products_available": ["autocall", "worst_of_autocall", "reverse_convertible", "capital_protected", "warrant", "turbo"]
+    }
+
+@router.get("/executors")
+async def get_executor_stats():
+    """Utilization statistics of the CPU-bound pricing pools"""
+    return executor_stats()
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Hit/miss metrics of the pricing result cache"""
+    return pricing_cache.stats()
+
+@router.get("/surface")
+async def get_surface_info():
+    """Grid and measured interpolation error of the precomputed vanilla surface"""
+    surface = _get_surface()
+    if surface is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "u_nodes": surface.u_axis[2],
+        "vol_nodes": surface.log_v_axis[2],
+        "max_error": surface.max_error
     }
\ No newline at end of file
@@ -7,7 +7,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
 import numpy as np
-from scipy.stats import norm
+from app.pricing_core import black_scholes
+from app.utils.executor import ExecutorSaturated, get_executor
 
 router = APIRouter()
 
@@ -44,24 +45,6 @@ class ProductBuilderResponse(BaseModel):
     proposed_products: List[ProductProposal]
     recommendation: str
 
-# ==================== HELPER FUNCTIONS ====================
-
-def black_scholes_call(S, K, T, r, sigma):
-    """Black-Scholes Call"""
-    if T <= 0:
-        return max(S - K, 0)
-    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
-    return S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
-
-def black_scholes_put(S, K, T, r, sigma):
-    """Black-Scholes Put"""
-    if T <= 0:
-        return max(K - S, 0)
-    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
-    return K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
-
 # ==================== PRODUCT BUILDERS ====================
 
 def build_capital_protected(objectives: InvestorObjectives):
@@ -80,8 +63,9 @@ def build_capital_protected(objectives: InvestorObjectives):
     bond_cost = protected_amount * np.exp(-r * T)
     call_budget = principal - bond_cost
     
-    # Prix d'un call ATM
-    call_price = black_scholes_call(S, S, T, r, sigma)
+    # Prix d'un call ATM (et ses Greeks en une passe)
+    atm_call = black_scholes(S, S, T, r, sigma, "call")
+    call_price = atm_call["price"]
     
     # Nombre de calls qu'on peut acheter
     n_calls = call_budget / call_price if call_price > 0 else 0
@@ -94,9 +78,8 @@ def build_capital_protected(objectives: InvestorObjectives):
     max_gain = principal * participation_rate / 100 * expected_upside
     max_loss = principal * (1 - protection_level / 100)
     
-    # Probabilité de profit
-    d1 = (0 + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    prob_profit = 50 + norm.cdf(d1) * 50
+    # Probabilité de profit : N(d1) ATM = delta du call
+    prob_profit = 50 + atm_call["delta"] * 50
     
     # Score de match
     gain_match = min(100, (max_gain / (principal * objectives.min_gain_pct / 100)) * 100) if objectives.min_gain_pct > 0 else 50
@@ -162,10 +145,9 @@ def build_autocall(objectives: InvestorObjectives):
     max_gain = total_coupon
     max_loss = principal * (objectives.max_loss_pct / 100)
     
-    # Probabilité de profit
+    # Probabilité de profit : N(d1) à la barrière = delta du call
     K_barrier = S * (barrier_level / 100)
-    d1 = (np.log(S / K_barrier) + (objectives.risk_free_rate + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    prob_profit = norm.cdf(d1) * 100
+    prob_profit = black_scholes(S, K_barrier, T, objectives.risk_free_rate, sigma, "call")["delta"] * 100
     
     # Score de match
     gain_match = min(100, (max_gain / (principal * objectives.min_gain_pct / 100)) * 100) if objectives.min_gain_pct > 0 else 50
@@ -230,10 +212,9 @@ def build_reverse_convertible(objectives: InvestorObjectives):
     max_gain = total_coupon
     max_loss = principal - total_coupon
     
-    # Probabilité
+    # Probabilité : N(d1) à la barrière = delta du call
     K_barrier = S * (barrier_level / 100)
-    d1 = (np.log(S / K_barrier) + (objectives.risk_free_rate + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    prob_profit = norm.cdf(d1) * 100
+    prob_profit = black_scholes(S, K_barrier, T, objectives.risk_free_rate, sigma, "call")["delta"] * 100
     
     # Score de match
     gain_match = min(100, (max_gain / (principal * objectives.min_gain_pct / 100)) * 100) if objectives.min_gain_pct > 0 else 50
@@ -293,8 +274,9 @@ def build_warrant(objectives: InvestorObjectives):
     # Levier basé sur la tolérance au risque
     leverage = 3 + (objectives.risk_tolerance / 100) * 7
     
-    # Prix de l'option
-    call_price = black_scholes_call(S, strike_price, T, objectives.risk_free_rate, sigma)
+    # Prix de l'option et probabilité ITM en une passe
+    call = black_scholes(S, strike_price, T, objectives.risk_free_rate, sigma, "call")
+    call_price = call["price"]
     warrant_price = call_price * leverage
     
     # Résultats
@@ -302,8 +284,7 @@ def build_warrant(objectives: InvestorObjectives):
     max_loss = warrant_price * 100
     
     # Probabilité ITM
-    d2 = (np.log(S / strike_price) + (objectives.risk_free_rate - 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    prob_profit = norm.cdf(d2) * 100
+    prob_profit = call["prob_itm"] * 100
     
     # Score de match
     gain_match = min(100, (max_gain / (principal * objectives.min_gain_pct / 100)) * 150) if objectives.min_gain_pct > 0 else 50
@@ -348,56 +329,63 @@ def build_warrant(objectives: InvestorObjectives):
 
 # ==================== MAIN ENDPOINT ====================
 
+def _build_products(objectives: InvestorObjectives) -> ProductBuilderResponse:
+    """Construit et classe les propositions (exécuté hors de la boucle asyncio)"""
+    products = []
+    
+    # Capital Protégé (toujours proposé)
+    products.append(build_capital_protected(objectives))
+    
+    # Autocall si tolérance au risque modérée à élevée
+    if objectives.risk_tolerance >= 30:
+        products.append(build_autocall(objectives))
+    
+    # Reverse Convertible si tolérance au risque modérée et intérêt pour revenus
+    if objectives.risk_tolerance >= 40 or objectives.prefer_income:
+        products.append(build_reverse_convertible(objectives))
+    
+    # Warrant si tolérance au risque élevée
+    if objectives.risk_tolerance >= 70:
+        products.append(build_warrant(objectives))
+    
+    # Trier par match_score
+    products.sort(key=lambda x: x.match_score, reverse=True)
+    
+    # Générer une recommandation
+    best_product = products[0]
+    recommendation = f"Nous recommandons le **{best_product.product_name}** (score: {best_product.match_score}/100) qui correspond le mieux à vos objectifs. "
+    
+    if objectives.risk_tolerance < 30:
+        recommendation += "Votre profil conservateur privilégie la protection du capital."
+    elif objectives.risk_tolerance < 60:
+        recommendation += "Votre profil équilibré recherche un bon compromis risque/rendement."
+    else:
+        recommendation += "Votre profil dynamique recherche des gains potentiels élevés."
+    
+    return ProductBuilderResponse(
+        objectives_summary={
+            "capital": objectives.principal,
+            "gain_minimum": f"+{objectives.min_gain_pct}%",
+            "perte_maximum": f"-{objectives.max_loss_pct}%",
+            "tolerance_risque": f"{objectives.risk_tolerance}/100",
+            "horizon": f"{objectives.time_horizon_years} an(s)",
+            "preference_revenus": objectives.prefer_income
+        },
+        proposed_products=products,
+        recommendation=recommendation
+    )
+
+
 @router.post("/build", response_model=ProductBuilderResponse)
 async def build_products(objectives: InvestorObjectives):
     """
     Construit des produits structurés sur-mesure basés sur les objectifs
     """
     try:
-        products = []
-        
-        # Capital Protégé (toujours proposé)
-        products.append(build_capital_protected(objectives))
-        
-        # Autocall si tolérance au risque modérée à élevée
-        if objectives.risk_tolerance >= 30:
-            products.append(build_autocall(objectives))
-        
-        # Reverse Convertible si tolérance au risque modérée et intérêt pour revenus
-        if objectives.risk_tolerance >= 40 or objectives.prefer_income:
-            products.append(build_reverse_convertible(objectives))
-        
-        # Warrant si tolérance au risque élevée
-        if objectives.risk_tolerance >= 70:
-            products.append(build_warrant(objectives))
-        
-        # Trier par match_score
-        products.sort(key=lambda x: x.match_score, reverse=True)
-        
-        # Générer une recommandation
-        best_product = products[0]
-        recommendation = f"Nous recommandons le **{best_product.product_name}** (score: {best_product.match_score}/100) qui correspond le mieux à vos objectifs. "
-        
-        if objectives.risk_tolerance < 30:
-            recommendation += "Votre profil conservateur privilégie la protection du capital."
-        elif objectives.risk_tolerance < 60:
-            recommendation += "Votre profil équilibré recherche un bon compromis risque/rendement."
-        else:
-            recommendation += "Votre profil dynamique recherche des gains potentiels élevés."
-        
-        return ProductBuilderResponse(
-            objectives_summary={
-                "capital": objectives.principal,
-                "gain_minimum": f"+{objectives.min_gain_pct}%",
-                "perte_maximum": f"-{objectives.max_loss_pct}%",
-                "tolerance_risque": f"{objectives.risk_tolerance}/100",
-                "horizon": f"{objectives.time_horizon_years} an(s)",
-                "preference_revenus": objectives.prefer_income
-            },
-            proposed_products=products,
-            recommendation=recommendation
-        )
+        return await get_executor("product_builder").run(_build_products, objectives)
         
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
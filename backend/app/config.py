@@ -37,6 +37,55 @@ class Settings(BaseSettings):
     # ==================== MONTE CARLO SETTINGS ====================
     MC_DEFAULT_SIMULATIONS: int = 10000
     MC_SEED: int = 42  # For reproducibility in tests
+    MC_WORKERS: int = 1  # Process pool streams per simulation (1 = in-process)
+    MC_MAX_WORKERS: int = 64  # Largest stream count accepted from a request (the pool has os.cpu_count() processes)
+    MC_MAX_SIMULATIONS: int = 1000000  # Path budget when a target standard error is requested
+    MC_ADAPTIVE_BATCH: int = 5000  # Minimum paths per round in adaptive mode
+    MC_MAX_CHUNK_MB: float = 64  # Memory ceiling for path generation, per worker
+    MC_HISTOGRAM_BINS: int = 50  # Bins of the payoff histogram returned with Monte Carlo prices
+    WORST_OF_MAX_ASSETS: int = 10  # Largest basket accepted by the worst-of autocall
+
+    # ==================== PDE SETTINGS ====================
+    PDE_SPACE_STEPS: int = 300  # ln S grid nodes (about 0.15% price accuracy, tens of ms)
+    PDE_TIME_STEPS: int = 200  # Time steps to maturity (at least one per observation date)
+    PDE_MAX_SPACE_STEPS: int = 5000  # Largest grid accepted from a request
+    PDE_MAX_TIME_STEPS: int = 5000
+
+    # ==================== AMERICAN EXERCISE ====================
+    LSM_EXERCISE_STEPS_PER_YEAR: int = 50  # Exercise dates a year approximating American exercise
+    BINOMIAL_STEPS: int = 1000  # Reference tree depth (about 1 ms per 100 steps)
+
+    # ==================== HESTON SETTINGS ====================
+    HESTON_STEPS_PER_YEAR: int = 52  # QE time steps per year (weekly, finer if the knock-in is monitored)
+    HESTON_CALIBRATION_MAX_MATURITY: float = 5.0  # Listed expiries beyond this are left out of the fit
+    
+    # ==================== EXECUTORS ====================
+    EXECUTOR_KIND: str = "thread"  # "thread" or "process" pool for CPU-bound pricing
+    PRICING_EXECUTOR_WORKERS: int = 4
+    PRODUCT_BUILDER_EXECUTOR_WORKERS: int = 2
+    EXECUTOR_MAX_QUEUE: int = 64  # Waiting tasks per pool before requests get 503
+    
+    # ==================== PRICING CACHE ====================
+    PRICING_CACHE_ENABLED: bool = True
+    PRICING_CACHE_MAX_ENTRIES: int = 2048
+    PRICING_CACHE_MAX_MB: float = 32
+    PRICING_CACHE_TTL_SECONDS: float = 300
+    PRICING_CACHE_SPOT_TOLERANCE: float = 0.01  # Spot rounded to this step before pricing/hashing
+    PRICING_CACHE_VOL_TOLERANCE: float = 0.0001  # Volatility rounded to this step
+
+    # ==================== PRICING SURFACE ====================
+    PRICING_SURFACE_ENABLED: bool = False  # Interpolated vanilla quotes for single products
+    PRICING_SURFACE_PATH: str = ""  # .npz file loaded at startup (built and saved there if missing)
+    PRICING_SURFACE_MAX_ERROR: float = 1e-4  # Max interpolation error of every field (fraction of discounted strike for prices, probability / density units for the Greek inputs)
+    PRICING_SURFACE_MAX_RELATIVE_ERROR: float = 5e-3  # Max OTM price error relative to the price (deep out-of-the-money quotes)
+    SCENARIO_MAX_POINTS: int = 10000  # Largest spot x vol x maturity x rate grid per request
+    
+    # ==================== IMPLIED VOLATILITY ====================
+    IMPLIED_VOL_ENABLED: bool = False  # Read a missing pricing volatility from the ticker's implied surface (off: missing volatility is a 400)
+    IMPLIED_VOL_TIMEOUT_SECONDS: float = 5.0  # Longest wait for an option chain fetch / calibration on the request path
+    IMPLIED_VOL_TTL_SECONDS: float = 86400  # Surfaces are rebuilt from the option chain once a day
+    IMPLIED_VOL_RATE: float = 0.04  # Rate used to invert listed option prices
+    IMPLIED_VOL_MAX_EXPIRIES: int = 12  # Listed expiries loaded per ticker
     
     # ==================== MARKET DATA (YFINANCE) ====================
     YFINANCE_PERIOD: str = "1y"  # Default period for historical data
@@ -87,7 +136,8 @@ class Settings(BaseSettings):
         """Get Monte Carlo configuration"""
         return {
             "n_simulations": self.MC_DEFAULT_SIMULATIONS,
-            "seed": self.MC_SEED
+            "seed": self.MC_SEED,
+            "n_workers": self.MC_WORKERS
         }
     
     def get_yfinance_params(self) -> dict:
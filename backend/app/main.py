@@ -1,12 +1,22 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.pricing_core import get_vanilla_surface
 from app.api import pricing, market_data, simulations, search, users ,product_builder # 🆕 Ajoute users
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build or load the interpolated vanilla surface before the first quote"""
+    if settings.PRICING_SURFACE_ENABLED:
+        get_vanilla_surface(settings.PRICING_SURFACE_PATH)
+    yield
+
 app = FastAPI(
     title="Metron API",
     description="API for structured products pricing and simulation",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for React frontend
@@ -33,9 +43,16 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "autocall": "/api/pricing/autocall",
+            "worst_of_autocall": "/api/pricing/worst-of-autocall",
             "reverse_convertible": "/api/pricing/reverse-convertible",
             "capital_protected": "/api/pricing/capital-protected",
             "warrant": "/api/pricing/warrant",
+            "turbo": "/api/pricing/turbo",
+            "turbo_range": "/api/pricing/turbo/range",
+            "batch": "/api/pricing/batch",
+            "compare": "/api/pricing/compare",
+            "scenarios": "/api/pricing/{product}/scenarios",
+            "implied_volatility": "/api/market/implied-volatility/{ticker}",
             "health": "/api/pricing/health"
     }
 }
@@ -0,0 +1,22 @@
+"""
+Pricing core
+Noyaux de calcul partagés par les routers pricing et product builder
+"""
+
+from app.pricing_core.american import binomial_american, lsm_american
+from app.pricing_core.barrier import barrier_option, knock_out_probability
+from app.pricing_core.black_scholes import black_scholes, black_scholes_call, black_scholes_put
+from app.pricing_core.compare import compare_products
+from app.pricing_core.heston import calibrate_heston, heston_autocall, heston_down_and_in_put, heston_price
+from app.pricing_core.implied_vol import ImpliedVolSurface, implied_volatility
+from app.pricing_core.monte_carlo import (
+    correlation_factor, monte_carlo_autocall, monte_carlo_autocall_scenarios, monte_carlo_worst_of_autocall
+)
+from app.pricing_core.pde import pde_autocall, pde_down_and_in_put
+from app.pricing_core.surfaces import VanillaSurface, get_vanilla_surface
+
+__all__ = ['barrier_option', 'binomial_american', 'black_scholes', 'black_scholes_call', 'black_scholes_put',
+           'calibrate_heston', 'compare_products', 'correlation_factor', 'heston_autocall', 'heston_down_and_in_put',
+           'heston_price', 'ImpliedVolSurface', 'implied_volatility', 'knock_out_probability', 'lsm_american',
+           'monte_carlo_autocall', 'monte_carlo_autocall_scenarios', 'monte_carlo_worst_of_autocall',
+           'pde_autocall', 'pde_down_and_in_put', 'VanillaSurface', 'get_vanilla_surface']
@@ -0,0 +1,282 @@
+"""
+American and Bermudan options
+Longstaff-Schwartz (régression vectorisée par date d'exercice) et arbre binomial de référence
+
+The Monte Carlo engine works in two phases. The exercise policy is first
+estimated on a regression set: paths are built backward from maturity with a
+Brownian bridge, so only the current date is held in memory, and at every
+exercise date the discounted realized cash flows of the in-the-money paths are
+regressed on basis functions of the moneyness S/K. The option is then priced
+on fresh, independent paths that follow that policy, in chunks through the
+shared Monte Carlo driver, which gives an unbiased (low) estimate of the
+policy value with its standard error. Greeks bump spot, volatility and time
+on the same draws with the policy frozen.
+"""
+
+import numpy as np
+from app.pricing_core.black_scholes import black_scholes
+from app.pricing_core.monte_carlo import (
+    _SPOT_BUMP, _TIME_BUMP, _VOL_BUMP, RunningMoments, _bump_greeks, _run_monte_carlo
+)
+
+BASES = ("laguerre", "polynomial", "hermite")
+
+# Per path and exercise date: log path, intrinsic and continuation values, exercise mask and the basis matrix
+_BYTES_PER_DATE = 40
+
+
+def _payoff(S, K, is_call):
+    return np.maximum(S - K, 0) if is_call else np.maximum(K - S, 0)
+
+def _basis(moneyness, basis="laguerre", degree=3):
+    """
+    Regression features of the moneyness S/K, shape moneyness.shape + (degree + 1,)
+
+    laguerre: constant and exp(-x/2) L_0..L_{degree-1} (Longstaff-Schwartz),
+    polynomial: 1, x, ..., x^degree, hermite: probabilists' Hermite of x - 1.
+    """
+    if basis == "laguerre":
+        weighted = np.exp(-0.5 * moneyness)[..., None] * np.polynomial.laguerre.lagvander(moneyness, degree - 1)
+        return np.concatenate([np.ones(moneyness.shape + (1,)), weighted], axis=-1)
+    if basis == "hermite":
+        return np.polynomial.hermite_e.hermevander(moneyness - 1, degree)
+    if basis == "polynomial":
+        return np.polynomial.polynomial.polyvander(moneyness, degree)
+    raise ValueError(f"Unknown basis '{basis}' (expected one of {BASES})")
+
+def _exercise_dates(T, exercise_frequency):
+    """Exercise dates every exercise_frequency years, maturity included (last period may be shorter)"""
+    n_dates = max(1, int(np.ceil(T / exercise_frequency - 1e-9)))
+    return np.minimum(np.arange(1, n_dates + 1) * exercise_frequency, T)
+
+
+# ==================== REGRESSION ====================
+
+def _continuation_coefficients(S0, K, times, r, sigma, is_call, basis, degree, n_paths, rng):
+    """
+    Least-squares continuation value coefficients at every exercise date before maturity
+
+    Paths are generated backward (terminal value, then Brownian bridge), so the
+    memory is one vector per path whatever the number of dates. Rows are NaN
+    where too few paths are in the money to regress (never exercise there).
+    """
+    drift = r - 0.5 * sigma**2
+    W = np.sqrt(times[-1]) * rng.standard_normal(n_paths)
+    cashflow = _payoff(S0 * np.exp(drift * times[-1] + sigma * W), K, is_call)
+
+    coefficients = np.full((len(times) - 1, degree + 1), np.nan)
+    for k in range(len(times) - 2, -1, -1):
+        t, t_next = times[k], times[k + 1]
+        W = W * (t / t_next) + np.sqrt(t * (t_next - t) / t_next) * rng.standard_normal(n_paths)
+        cashflow *= np.exp(-r * (t_next - t))
+
+        S = S0 * np.exp(drift * t + sigma * W)
+        exercise_value = _payoff(S, K, is_call)
+        itm = np.flatnonzero(exercise_value > 0)
+        if len(itm) <= 2 * (degree + 1):
+            continue
+        X = _basis(S[itm] / K, basis, degree)
+        coefficients[k] = np.linalg.lstsq(X, cashflow[itm], rcond=None)[0]
+        exercise = exercise_value[itm] > X @ coefficients[k]
+        cashflow[itm[exercise]] = exercise_value[itm[exercise]]
+    return coefficients
+
+
+# ==================== PRICING ====================
+
+def _exercise_policy(S, K, is_call, times, r, coefficients, basis, degree):
+    """
+    Payoffs of the exercise policy on paths S (n_paths, n_dates), compounded to
+    the last date, and the exercise date index (n_dates when never exercised)
+    """
+    intrinsic = _payoff(S, K, is_call)
+    continuation = np.einsum("pdk,dk->pd", _basis(S[:, :-1] / K, basis, degree), coefficients)
+    exercise = intrinsic > 0
+    exercise[:, :-1] &= intrinsic[:, :-1] > continuation  # NaN (no regression) never exercises
+
+    first = np.argmax(exercise, axis=1)
+    rows = np.arange(len(S))
+    exercised = exercise[rows, first]
+    payoffs = np.where(exercised, intrinsic[rows, first] * np.exp(r * (times[-1] - times[first])), 0.0)
+    return payoffs, np.where(exercised, first, len(times))
+
+def _simulate_american(seed_seq, n_paths, S0, K, T, r, sigma, is_call, times, coefficients, basis, degree,
+                       antithetic=False, max_chunk_mb=64, greeks=False):
+    """
+    Simulate n_paths payoffs of the exercise policy on an independent random stream
+
+    Unit moments hold the payoff (compounded to maturity), the European payoff
+    (control) and, with greeks=True, the payoffs with spot up / down, volatility
+    up / down and one day later. Per-path moments hold the payoff and the early
+    exercise indicator; the histogram counts exercises per date.
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_dates = len(times)
+    n_units = (n_paths + 1) // 2 if antithetic else n_paths
+    rows_per_unit = 2 if antithetic else 1
+    dt = np.diff(times, prepend=0.0)
+
+    # (volatility, time scale) of the simulated scenarios: price, vol up, vol down, one day later
+    scenarios = [(sigma, 1.0)]
+    if greeks:
+        scenarios += [(sigma + _VOL_BUMP, 1.0), (max(sigma - _VOL_BUMP, 1e-4), 1.0), (sigma, (T - _TIME_BUMP) / T)]
+
+    bytes_per_unit = rows_per_unit * n_dates * (_BYTES_PER_DATE + 8 * (degree + 1))
+    per_chunk = max(1, int(max_chunk_mb * 2**20 // bytes_per_unit))
+    unit_moments, path_moments = RunningMoments(7 if greeks else 2), RunningMoments(2)
+    exercise_counts = np.zeros(n_dates + 1, dtype=np.int64)
+    remaining = n_units
+    while remaining > 0:
+        chunk = min(per_chunk, remaining)
+        remaining -= chunk
+        z = rng.standard_normal((chunk, n_dates))
+        if antithetic:
+            z = np.concatenate([z, -z])
+        W = np.cumsum(z * np.sqrt(dt), axis=1)
+
+        columns = []
+        for i, (vol, scale) in enumerate(scenarios):
+            S = S0 * np.exp((r - 0.5 * vol**2) * times * scale + vol * np.sqrt(scale) * W)
+            payoffs, exercise_date = _exercise_policy(S, K, is_call, times * scale, r, coefficients, basis, degree)
+            if i == 0:
+                exercise_counts += np.bincount(exercise_date, minlength=n_dates + 1)
+                path_moments.update(payoffs, exercise_date < n_dates - 1)
+                columns += [payoffs, _payoff(S[:, -1], K, is_call)]
+                if greeks:
+                    columns += [_exercise_policy(S * (1 + bump), K, is_call, times, r, coefficients, basis, degree)[0]
+                                for bump in (_SPOT_BUMP, -_SPOT_BUMP)]
+            else:
+                # Compounded to T like the other columns
+                columns.append(payoffs * np.exp(r * T * (1 - scale)))
+        if antithetic:
+            columns = [0.5 * (column[:chunk] + column[chunk:]) for column in columns]
+        unit_moments.update(*columns)
+
+    return unit_moments, path_moments, exercise_counts, None
+
+def lsm_american(S0, K, T, r, sigma, option_type="put", exercise_frequency=None, basis="laguerre", degree=3,
+                 n_sims=10000, seed=42, n_workers=1, antithetic=False, control_variate=True,
+                 target_std_error=None, batch_size=5000, max_chunk_mb=64, regression_paths=None,
+                 steps_per_year=50, greeks=True):
+    """
+    Longstaff-Schwartz price of an American or Bermudan call/put
+
+    Bermudan options exercise every exercise_frequency years (and at
+    maturity); American ones are approximated by steps_per_year exercise
+    dates a year, plus exercise at inception when it beats the simulated
+    value. Holding to maturity is priced in closed form and kept when it
+    beats the estimated policy. The policy is regressed on regression_paths
+    paths (n_sims by default) drawn apart from the pricing paths, with the
+    selected basis of the given degree. The European option is the control variate.
+
+    Returns:
+        dict with the monte_carlo_autocall() statistics, european_price,
+        early_exercise_premium, exercise_probabilities (per date, last entry:
+        never exercised), prob_early_exercise and, with greeks=True, greeks
+        and greeks_std_error
+    """
+    if basis not in BASES:
+        raise ValueError(f"Unknown basis '{basis}' (expected one of {BASES})")
+    is_call = option_type.lower() == "call"
+    american = exercise_frequency is None
+    times = _exercise_dates(T, 1 / steps_per_year if american else exercise_frequency)
+
+    # Regression set on its own stream, the pricing rounds spawn theirs from the seed
+    rng = np.random.default_rng(np.random.SeedSequence([seed, len(times)]))
+    coefficients = _continuation_coefficients(S0, K, times, r, sigma, is_call, basis, degree,
+                                              regression_paths or n_sims, rng)
+
+    european = black_scholes(S0, K, T, r, sigma, "call" if is_call else "put")
+    params = (S0, K, T, r, sigma, is_call, times, coefficients, basis, degree)
+    options = {"antithetic": antithetic, "max_chunk_mb": max_chunk_mb, "greeks": greeks}
+    control_mean = float(european["price"]) * np.exp(r * T) if control_variate else None
+    result, paths, units = _run_monte_carlo(_simulate_american, params, options, len(times), np.exp(-r * T),
+                                            n_sims, seed, n_workers, control_mean, target_std_error, batch_size)
+    result["exercise_probabilities"] = result.pop("autocall_probabilities")
+    del result["payoff_distribution"]  # Exercise values, not tracked
+    result["prob_early_exercise"] = float(paths.mean[1])
+    if greeks:
+        vol_points = (sigma + _VOL_BUMP - max(sigma - _VOL_BUMP, 1e-4)) / 0.01
+        result["greeks"], result["greeks_std_error"] = _bump_greeks(units, S0, vol_points, np.exp(-r * T))
+
+    # Both exercising now (American only) and never exercising early are admissible
+    # policies: the estimate is a lower bound, keep the best of the three
+    intrinsic = float(_payoff(S0, K, is_call)) if american else 0.0
+    exact = max((intrinsic, "now"), (float(european["price"]), "hold"))
+    if exact[0] > result["price"]:
+        price = exact[0]
+        result.update(price=price, std_error=0.0, ci_lower=price, ci_upper=price,
+                      prob_early_exercise=1.0 if exact[1] == "now" else 0.0)
+        if greeks:
+            if exact[1] == "now":
+                result["greeks"] = {"delta": 1.0 if is_call else -1.0, "gamma": 0.0, "vega": 0.0, "theta": 0.0}
+            else:
+                result["greeks"] = {key: float(european[key]) for key in ("delta", "gamma", "vega", "theta")}
+            result["greeks_std_error"] = dict.fromkeys(result["greeks"], 0.0)
+
+    result["european_price"] = float(european["price"])
+    result["early_exercise_premium"] = result["price"] - result["european_price"]
+    return result
+
+
+# ==================== BINOMIAL REFERENCE ====================
+
+def _binomial_values(S0, K, T, r, sigma, is_call, n_steps, exercise_frequency):
+    """Cox-Ross-Rubinstein backward induction, returns the option values at steps 0, 1 and 2"""
+    dt = T / n_steps
+    u = np.exp(sigma * np.sqrt(dt))
+    p = (np.exp(r * dt) - 1 / u) / (u - 1 / u)
+    discount = np.exp(-r * dt)
+
+    if exercise_frequency is None:
+        exercisable = np.ones(n_steps + 1, dtype=bool)
+    else:
+        exercisable = np.zeros(n_steps + 1, dtype=bool)
+        exercisable[np.rint(_exercise_dates(T, exercise_frequency) / dt).astype(int)] = True
+
+    V = _payoff(S0 * u**(n_steps - 2.0 * np.arange(n_steps + 1)), K, is_call)
+    levels = {}
+    for i in range(n_steps - 1, -1, -1):
+        V = discount * (p * V[:-1] + (1 - p) * V[1:])
+        if exercisable[i]:
+            np.maximum(V, _payoff(S0 * u**(i - 2.0 * np.arange(i + 1)), K, is_call), out=V)
+        if i <= 2:
+            levels[i] = V
+    return levels, u, dt
+
+def binomial_american(S0, K, T, r, sigma, option_type="put", n_steps=1000, exercise_frequency=None):
+    """
+    American (or Bermudan, every exercise_frequency years) price on a Cox-Ross-Rubinstein tree
+
+    Reference for the Longstaff-Schwartz engine on small cases: each time level
+    is one array operation, so the cost is n_steps^2 / 2 node updates. Delta,
+    gamma and theta are read from the first levels of the tree, vega comes from
+    two more trees with the volatility bumped by one point.
+
+    Returns:
+        dict with price, delta, gamma, vega (per vol point), theta (per day),
+        european_price and early_exercise_premium
+    """
+    is_call = option_type.lower() == "call"
+    n_steps = max(int(n_steps), 2)
+    levels, u, dt = _binomial_values(S0, K, T, r, sigma, is_call, n_steps, exercise_frequency)
+    V0, V1, V2 = levels[0][0], levels[1], levels[2]
+
+    S1 = S0 * np.array([u, 1 / u])
+    S2 = S0 * np.array([u**2, 1.0, u**-2])
+    delta = (V1[0] - V1[1]) / (S1[0] - S1[1])
+    gamma = ((V2[0] - V2[1]) / (S2[0] - S2[1]) - (V2[1] - V2[2]) / (S2[1] - S2[2])) / (0.5 * (S2[0] - S2[2]))
+    vega = np.diff([_binomial_values(S0, K, T, r, vol, is_call, n_steps, exercise_frequency)[0][0][0]
+                    for vol in (max(sigma - _VOL_BUMP, 1e-4), sigma + _VOL_BUMP)])[0]
+    vega /= (sigma + _VOL_BUMP - max(sigma - _VOL_BUMP, 1e-4)) / 0.01
+
+    european = float(black_scholes(S0, K, T, r, sigma, "call" if is_call else "put")["price"])
+    return {
+        "price": float(V0),
+        "delta": float(delta),
+        "gamma": float(gamma),
+        "vega": float(vega),
+        "theta": float((V2[1] - V0) / (2 * dt) / 365),
+        "european_price": european,
+        "early_exercise_premium": float(V0) - european
+    }
@@ -0,0 +1,67 @@
+"""
+Black-Scholes kernels
+Fonctionnent sur des scalaires ou des tableaux NumPy (broadcasting)
+"""
+
+import numpy as np
+from scipy.stats import norm
+
+def _as_arrays(*values):
+    """Broadcast scalar or array inputs to float arrays of a common shape"""
+    return np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])
+
+def black_scholes(S, K, T, r, sigma, option_type="call"):
+    """
+    Black-Scholes price, Greeks and ITM probability in a single pass
+    
+    d1/d2, the normal pdf and the normal cdf are evaluated once and shared
+    by every output. option_type may be a string or an array of "call"/"put".
+    
+    Returns:
+        dict with price, delta, gamma, vega (per vol point), theta (per day)
+        and prob_itm (risk-neutral probability of finishing in the money)
+    """
+    S, K, T, r, sigma = _as_arrays(S, K, T, r, sigma)
+    is_call = np.char.lower(np.asarray(option_type, dtype=str)) == "call"
+    expired = T <= 0
+    T = np.where(expired, 1.0, T)
+    
+    sqrt_T = np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * sqrt_T)
+    d2 = d1 - sigma * sqrt_T
+    pdf_d1 = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi)
+    cdf_d1 = norm.cdf(d1)
+    cdf_d2 = norm.cdf(d2)
+    # Put side from N(-x) directly: 1 - N(x) cancels for out-of-the-money puts
+    cdf_minus_d1 = norm.cdf(-d1)
+    cdf_minus_d2 = norm.cdf(-d2)
+    discounted_K = K * np.exp(-r * T)
+    
+    call_price = S * cdf_d1 - discounted_K * cdf_d2
+    put_price = discounted_K * cdf_minus_d2 - S * cdf_minus_d1
+    
+    decay = -(S * pdf_d1 * sigma) / (2 * sqrt_T)
+    price = np.where(is_call, call_price, put_price)
+    delta = np.where(is_call, cdf_d1, -cdf_minus_d1)
+    theta = np.where(is_call, decay - r * discounted_K * cdf_d2, decay + r * discounted_K * cdf_minus_d2)
+    gamma = pdf_d1 / (S * sigma * sqrt_T)
+    vega = S * pdf_d1 * sqrt_T / 100
+    prob_itm = np.where(is_call, cdf_d2, cdf_minus_d2)
+    
+    intrinsic = np.where(is_call, np.maximum(S - K, 0), np.maximum(K - S, 0))
+    return {
+        "price": np.where(expired, intrinsic, price)[()],
+        "delta": np.where(expired, 0.0, delta)[()],
+        "gamma": np.where(expired, 0.0, gamma)[()],
+        "vega": np.where(expired, 0.0, vega)[()],
+        "theta": np.where(expired, 0.0, theta / 365)[()],
+        "prob_itm": np.where(expired, (intrinsic > 0).astype(float), prob_itm)[()]
+    }
+
+def black_scholes_call(S, K, T, r, sigma):
+    """Black-Scholes call option pricing"""
+    return black_scholes(S, K, T, r, sigma, "call")["price"]
+
+def black_scholes_put(S, K, T, r, sigma):
+    """Black-Scholes put option pricing"""
+    return black_scholes(S, K, T, r, sigma, "put")["price"]
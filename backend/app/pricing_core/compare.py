@@ -0,0 +1,137 @@
+"""
+Product comparison on common random numbers
+Un seul jeu de trajectoires du sous-jacent, tous les payoffs évalués dessus
+
+Paths are simulated once on the union of the dates every product needs
+(autocall observations and maturities), chunk by chunk, and each product
+reads its own columns. Fair values, payoff distributions and probabilities of
+profit therefore come from the same scenarios, so differences between
+products are not blurred by independent simulation noise.
+"""
+
+import numpy as np
+from app.pricing_core.monte_carlo import PayoffDistribution, RunningMoments, _autocall_redemptions
+
+PRODUCT_TYPES = ("autocall", "reverse-convertible", "capital-protected", "warrant")
+QUANTILES = (5, 25, 50, 75, 95)
+
+# Path matrix, its increments and one payoff vector per product, per path and date
+_BYTES_PER_DATE = 24
+# Standard deviations of the terminal log spot covered by the histograms of open-ended payoffs
+_HISTOGRAM_WIDTH = 5
+
+
+def _product_dates(spec):
+    """Dates (years) whose spots the product reads"""
+    if spec["type"] == "autocall":
+        n_steps = int(spec["T"] / spec["frequency"])
+        return spec["frequency"] * np.arange(1, n_steps + 1)
+    return np.array([spec["T"]])
+
+def _cash_range(spec, S0, r, sigma):
+    """Bounds of the undiscounted cash a product pays (open-ended payoffs: up to a far terminal spot)"""
+    kind, T = spec["type"], spec["T"]
+    S_high = S0 * np.exp(r * T + _HISTOGRAM_WIDTH * sigma * np.sqrt(T))
+    if kind == "autocall":
+        return 0.0, spec["principal"] * (1 + spec["coupon"] * T)
+    if kind == "reverse-convertible":
+        coupons = spec["coupon_payment"] * max(1, int(T))
+        return spec["principal"] - spec["n_shares"] * spec["barrier"] + coupons, spec["principal"] + coupons
+    if kind == "capital-protected":
+        return spec["protection"], spec["protection"] + spec["n_calls"] * max(S_high - spec["strike"], 0)
+    return 0.0, spec["leverage"] * (max(S_high - spec["strike"], 0) if spec["is_call"] else spec["strike"])
+
+def _cashflows(spec, S, r):
+    """
+    Present value and undiscounted total cash of one product on its dates S (n_paths, n_dates)
+
+    Conventions follow the single-product endpoints: autocall redemptions are
+    discounted from maturity like monte_carlo_autocall(), the reverse
+    convertible pays annual coupons and loses the put struck at the barrier.
+    """
+    kind, T = spec["type"], spec["T"]
+    if kind == "autocall":
+        redemption = _autocall_redemptions(S, spec["S0"], spec["K_autocall"], spec["K_barrier"], T,
+                                           spec["coupon"], spec["principal"], spec["frequency"],
+                                           coupon_barrier=spec.get("coupon_barrier"),
+                                           memory=spec.get("memory", False))[0]
+        return redemption * np.exp(-r * T), redemption
+    S_T = S[:, -1]
+    if kind == "reverse-convertible":
+        n_payments = max(1, int(T))
+        pv_coupons = spec["coupon_payment"] * np.exp(-r * np.arange(1, n_payments + 1)).sum()
+        redemption = spec["principal"] - spec["n_shares"] * np.maximum(spec["barrier"] - S_T, 0)
+        return redemption * np.exp(-r * T) + pv_coupons, redemption + spec["coupon_payment"] * n_payments
+    if kind == "capital-protected":
+        payoff = spec["protection"] + spec["n_calls"] * np.maximum(S_T - spec["strike"], 0)
+        return payoff * np.exp(-r * T), payoff
+    if kind == "warrant":
+        intrinsic = S_T - spec["strike"] if spec["is_call"] else spec["strike"] - S_T
+        payoff = spec["leverage"] * np.maximum(intrinsic, 0)
+        return payoff * np.exp(-r * T), payoff
+    raise ValueError(f"Unknown product type '{kind}' (expected one of {PRODUCT_TYPES})")
+
+def compare_products(S0, r, sigma, products, n_sims=10000, seed=42, max_chunk_mb=64, quantiles=QUANTILES,
+                     histogram_bins=50):
+    """
+    Fair values and payoff distributions of several products on one set of GBM paths
+
+    products maps a name to a payoff spec: a dict with "type" (one of
+    PRODUCT_TYPES), maturity "T", "invested" (the amount paid, e.g. a note's
+    principal) and the terms read by _cashflows(). The cash each product pays
+    is accumulated in a PayoffDistribution, so no per-path payoff is kept.
+
+    Returns:
+        dict with n_paths, per-product results (fair_value, std_error,
+        invested, probability_profit, expected_return and return_quantiles, in
+        %, and payoff_distribution, the PayoffDistribution.summary() of the
+        cash paid against the amount invested) and the correlation matrix of
+        the discounted payoffs (names order)
+    """
+    names = list(products)
+    dates = np.unique(np.concatenate([_product_dates(spec) for spec in products.values()]))
+    columns = {name: np.searchsorted(dates, _product_dates(spec)) for name, spec in products.items()}
+    dt = np.diff(dates, prepend=0.0)
+
+    rng = np.random.default_rng(seed)
+    per_chunk = max(1, int(max_chunk_mb * 2**20 // (len(dates) * _BYTES_PER_DATE + 8 * len(names))))
+    moments = RunningMoments(len(names))
+    cash = {name: PayoffDistribution(*_cash_range(spec, S0, r, sigma), spec["invested"], histogram_bins)
+            for name, spec in products.items()}
+    remaining = n_sims
+    while remaining > 0:
+        chunk = min(per_chunk, remaining)
+        remaining -= chunk
+        log_paths = rng.standard_normal((chunk, len(dates)))
+        log_paths *= sigma * np.sqrt(dt)
+        log_paths += (r - 0.5 * sigma**2) * dt
+        S = S0 * np.exp(np.cumsum(log_paths, axis=1, out=log_paths))
+
+        present_values = []
+        for name in names:
+            pv, total = _cashflows(products[name], S[:, columns[name]], r)
+            present_values.append(pv)
+            cash[name].update(total)
+        moments.update(*present_values)
+
+    covariance = moments.covariance()
+    scale = np.sqrt(np.diag(covariance))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = np.where(np.outer(scale, scale) > 0, covariance / np.outer(scale, scale), 0.0)
+    np.fill_diagonal(correlation, 1.0)
+
+    results = {}
+    for i, name in enumerate(names):
+        distribution = cash[name].summary()
+        invested = products[name]["invested"]
+        to_return = (lambda amount: (amount / invested - 1) * 100) if invested > 0 else (lambda amount: 0.0)
+        results[name] = {
+            "fair_value": float(moments.mean[i]),
+            "std_error": float(scale[i] / np.sqrt(moments.n)),
+            "invested": float(invested),
+            "probability_profit": distribution["probability_profit"] * 100,
+            "expected_return": to_return(distribution["mean"]),
+            "return_quantiles": {f"p{q}": to_return(cash[name].quantile(q / 100)) for q in quantiles},
+            "payoff_distribution": distribution
+        }
+    return {"n_paths": int(moments.n), "products": results, "correlation": correlation.tolist()}
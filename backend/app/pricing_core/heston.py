@@ -0,0 +1,432 @@
+"""
+Heston stochastic volatility engine
+Schéma QE d'Andersen vectorisé sur les chemins, vanilles semi-analytiques et calibration sur la surface implicite
+
+    dS = r S dt + sqrt(v) S dW,   dv = kappa (theta - v) dt + xi sqrt(v) dZ,   d<W, Z> = rho dt
+
+Paths are advanced one time step at a time for every path of a chunk (and
+every bumped scenario of the Greeks) at once, so memory only holds the current
+state and the observation dates. The variance follows Andersen's Quadratic
+Exponential scheme, the log spot his central discretization with the martingale
+correction, so the discounted spot stays a martingale on any grid. Vanilla
+prices come from the characteristic function (Lewis formula, Gauss-Legendre
+quadrature) for all strikes and maturities in one array expression; they serve
+as control variates and for the calibration.
+"""
+
+import numpy as np
+from scipy.optimize import least_squares
+from scipy.special import ndtri
+from app.pricing_core.black_scholes import _as_arrays, black_scholes
+from app.pricing_core.monte_carlo import (
+    _SPOT_BUMP, _TIME_BUMP, _VOL_BUMP, PayoffDistribution, RunningMoments, _autocall_redemptions, _bump_greeks,
+    _check_autocall_schedule, _run_monte_carlo
+)
+
+HESTON_PARAMETERS = ("v0", "kappa", "theta", "xi", "rho")
+
+# Andersen's switch between the quadratic and the exponential variance sampling
+_PSI_CRITICAL = 1.5
+
+# State kept per path and scenario while stepping (log spot, variance, running minimum, temporaries)
+_STATE_BYTES_PER_PATH = 8 * 16
+
+_NODES, _WEIGHTS = np.polynomial.legendre.leggauss(256)
+_U_MAX = 200.0
+_U = 0.5 * _U_MAX * (_NODES + 1)
+_W = 0.5 * _U_MAX * _WEIGHTS
+
+
+# ==================== VANILLAS ====================
+
+def _characteristic_function(w, T, v0, kappa, theta, xi, rho):
+    """E[exp(i w ln(S_T / F))] in the 'little trap' form (no branch cut), w complex"""
+    beta = kappa - rho * xi * 1j * w
+    d = np.sqrt(beta**2 + xi**2 * (1j * w + w**2))
+    g = (beta - d) / (beta + d)
+    decay = np.exp(-d * T)
+    C = kappa * theta / xi**2 * ((beta - d) * T - 2 * np.log((1 - g * decay) / (1 - g)))
+    D = (beta - d) / xi**2 * (1 - decay) / (1 - g * decay)
+    return np.exp(C + D * v0)
+
+def heston_price(S, K, T, r, v0, kappa, theta, xi, rho, option_type="call"):
+    """
+    Heston vanilla prices (Lewis formula), vectorized over strikes and maturities
+
+    Inputs broadcast like black_scholes(); the quadrature runs on a trailing
+    axis, so a whole surface costs one array expression.
+    """
+    S, K, T, r = _as_arrays(S, K, T, r)
+    is_call = np.char.lower(np.asarray(option_type, dtype=str)) == "call"
+    T_live = np.maximum(T, 1e-8)
+    forward = S * np.exp(r * T_live)
+    x = np.log(forward / K)[..., None]
+
+    phi = _characteristic_function(_U - 0.5j, T_live[..., None], v0, kappa, theta, xi, rho)
+    integral = (np.real(np.exp(1j * _U * x) * phi) / (_U**2 + 0.25)) @ _W
+    call = np.exp(-r * T_live) * (forward - np.sqrt(forward * K) / np.pi * integral)
+    call = np.clip(call, np.maximum(S - K * np.exp(-r * T_live), 0), S)
+
+    price = np.where(is_call, call, call - S + K * np.exp(-r * T_live))
+    intrinsic = np.where(is_call, np.maximum(S - K, 0), np.maximum(K - S, 0))
+    return np.where(T > 0, price, intrinsic)[()]
+
+def calibrate_heston(surface, moneyness=np.linspace(0.7, 1.3, 13), max_maturity: float = 5.0) -> dict:
+    """
+    Heston parameters fitted to an ImpliedVolSurface
+
+    Every quote of the moneyness x listed maturity grid is priced in one
+    vectorized call per iteration; residuals are price errors divided by the
+    Black-Scholes vega, i.e. implied volatility errors to first order.
+
+    Returns:
+        dict with v0, kappa, theta, xi, rho and rmse (implied volatility, vol points)
+    """
+    maturities = surface.maturities[surface.maturities <= max_maturity]
+    if len(maturities) == 0:
+        maturities = surface.maturities[:1]
+    strikes = surface.spot * np.asarray(moneyness, dtype=float)[:, None]
+    T = np.broadcast_to(maturities[None], np.broadcast_shapes(strikes.shape, maturities[None].shape))
+    market_vols = surface.grid(moneyness, maturities)
+    option_type = np.where(strikes >= surface.spot, "call", "put")
+    market = black_scholes(surface.spot, strikes, T, surface.rate, market_vols, option_type)
+    vega = np.maximum(market["vega"] * 100, 1e-4 * surface.spot)
+
+    def residuals(params):
+        model = heston_price(surface.spot, strikes, T, surface.rate, *params, option_type)
+        return ((model - market["price"]) / vega).ravel()
+
+    atm = float(surface.volatility(1.0, maturities[0]))**2
+    fit = least_squares(
+        residuals,
+        x0=[atm, 2.0, float(np.mean(market_vols))**2, 0.5, -0.5],
+        bounds=([1e-4, 1e-2, 1e-4, 1e-2, -0.99], [4.0, 20.0, 4.0, 5.0, 0.99]),
+        method="trf", x_scale=[0.05, 1.0, 0.05, 0.5, 0.5]
+    )
+    return {
+        **dict(zip(HESTON_PARAMETERS, map(float, fit.x))),
+        "rmse": float(np.sqrt(np.mean(fit.fun**2)) * 100)
+    }
+
+
+# ==================== PATHS ====================
+
+def _qe_coefficients(dt, r, kappa, theta, xi, rho):
+    """Per-step constants of the QE scheme (dt and theta may be per-scenario columns)"""
+    decay = np.exp(-kappa * dt)
+    # Central discretization of the integrated variance (gamma1 = gamma2 = 1/2)
+    k1 = 0.5 * dt * (kappa * rho / xi - 0.5) - rho / xi
+    k2 = 0.5 * dt * (kappa * rho / xi - 0.5) + rho / xi
+    k3 = 0.5 * dt * (1 - rho**2)
+    return {
+        "mean": (theta * (1 - decay), decay),  # E[v'] = m0 + m1 v
+        "variance": (theta * xi**2 * (1 - decay)**2 / (2 * kappa), xi**2 * decay * (1 - decay) / kappa),
+        "drift": r * dt, "k1": k1, "k2": k2, "k3": k3, "A": k2 + 0.5 * k3,
+        "k0": -rho * kappa * theta * dt / xi  # Uncorrected drift, used where the correction is undefined
+    }
+
+def _qe_step(X, v, c, u, z):
+    """
+    One Andersen QE step of the log spot X = ln(S / S0) and variance v (returns the new pair)
+
+    c comes from _qe_coefficients(); u (uniform) drives the variance, z
+    (standard normal) the spot. The exponential branch (psi > 1.5, variance
+    close to zero) is only evaluated on the paths that take it.
+    """
+    m = c["mean"][0] + c["mean"][1] * v
+    psi = (c["variance"][0] + c["variance"][1] * v) / (m * m)
+    A = np.broadcast_to(c["A"], m.shape)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Quadratic branch: v' = a (b + Z_v)^2
+        inverse = 2 / psi
+        b2 = inverse - 1 + np.sqrt(inverse * np.maximum(inverse - 1, 0))
+        a = m / (1 + b2)
+        v_new = a * (np.sqrt(b2) + np.broadcast_to(ndtri(u), m.shape))**2
+        # Martingale correction: E[exp(X')] = exp(X + r dt) exactly under the scheme
+        denominator = 1 - 2 * A * a
+        log_mgf = A * b2 * a / denominator - 0.5 * np.log(denominator)
+
+        exponential = np.flatnonzero(psi > _PSI_CRITICAL)
+        if exponential.size:
+            # Exponential branch: mass p at zero, exponential tail
+            psi_e, m_e = psi.ravel()[exponential], m.ravel()[exponential]
+            u_e = np.broadcast_to(u, m.shape).ravel()[exponential]
+            p = (psi_e - 1) / (psi_e + 1)
+            beta = (1 - p) / m_e
+            v_new.ravel()[exponential] = np.where(u_e <= p, 0.0, np.log((1 - p) / (1 - u_e)) / beta)
+            log_mgf.ravel()[exponential] = np.log(p + beta * (1 - p) / (beta - A.ravel()[exponential]))
+            denominator.ravel()[exponential] = beta - A.ravel()[exponential]
+
+        corrected = (denominator > 0) & np.isfinite(log_mgf)
+        k0 = np.where(corrected, -log_mgf - (c["k1"] + 0.5 * c["k3"]) * v, c["k0"])
+
+    X = X + c["drift"] + k0 + c["k1"] * v + c["k2"] * v_new + np.sqrt(c["k3"] * (v + v_new)) * z
+    return X, v_new
+
+def _scenarios(v0, kappa, theta, xi, rho, greeks):
+    """
+    Parameter rows of the simulated scenarios: price, then (Greeks) volatility
+    level up / down (sqrt(v0) and sqrt(theta) shifted by _VOL_BUMP) and one day later
+
+    Returns (v0, theta) columns and the distance between the volatility scenarios in vol points.
+    """
+    if not greeks:
+        return np.array([[v0]]), np.array([[theta]]), 1.0
+    levels = [(np.sqrt(v0), np.sqrt(theta))]
+    up = (np.sqrt(v0) + _VOL_BUMP, np.sqrt(theta) + _VOL_BUMP)
+    down = (max(np.sqrt(v0) - _VOL_BUMP, 1e-3), max(np.sqrt(theta) - _VOL_BUMP, 1e-3))
+    levels += [up, down, levels[0]]
+    vol_points = (up[0] - down[0]) / 0.01
+    v0s, thetas = (np.array([[level[i]**2] for level in levels]) for i in (0, 1))
+    return v0s, thetas, vol_points
+
+def _heston_paths(rng, n_units, antithetic, period, n_periods, substeps, r, v0, theta, kappa, xi, rho,
+                  time_shift=0.0, track_minimum=True, stub=0.0, observe=True, monitored=None):
+    """
+    Log spots X = ln(S / S0) of every scenario on the period ends, and their running minimum on the grid
+
+    The grid has substeps steps per period, then one last step of stub years
+    when stub > 0 (maturity between two periods). Row s of v0 / theta is one
+    scenario; the last one is valued time_shift years later (shorter first
+    step(s)) when time_shift > 0. All scenarios share the same draws (common
+    random numbers). Returns (observations (scenarios, paths, n_periods), minimum (scenarios, paths)),
+    the minimum staying at zero with track_minimum=False, taken on the steps
+    flagged in monitored (one flag per step of the periods, None: every step).
+    observe=False only keeps the final log spot: observations is then
+    (scenarios, paths, 1).
+    """
+    n_scenarios = len(v0)
+    n_paths = 2 * n_units if antithetic else n_units
+    X = np.zeros((n_scenarios, n_paths))
+    v = np.repeat(v0, n_paths, axis=1)
+    minimum = np.zeros((n_scenarios, n_paths))
+    observations = np.empty((n_scenarios, n_paths, n_periods if observe else 1))
+
+    def coefficients(length, n_steps, shift):
+        dt = np.full((n_scenarios, 1), length / n_steps)
+        dt[-1] = max(length - shift, 0.0) / n_steps
+        return _qe_coefficients(dt, r, kappa, theta, xi, rho)
+
+    def advance(X, v, step, n_steps, first_index):
+        for i in range(first_index, first_index + n_steps):
+            u = rng.random(n_units)
+            z = rng.standard_normal(n_units)
+            if antithetic:
+                u, z = np.concatenate([u, 1 - u]), np.concatenate([z, -z])
+            X, v = _qe_step(X, v, step, u, z)
+            if track_minimum and (monitored is None or i >= len(monitored) or monitored[i]):
+                np.minimum(minimum, X, out=minimum)
+        return X, v
+
+    step = coefficients(period, substeps, 0.0)
+    first_step = coefficients(period, substeps, time_shift) if time_shift else step
+    for k in range(n_periods):
+        X, v = advance(X, v, first_step if k == 0 else step, substeps, k * substeps)
+        if observe:
+            observations[:, :, k] = X
+    if stub > 0:
+        # The time shift falls on the stub when there is no whole period before it
+        X, v = advance(X, v, coefficients(stub, 1, 0.0 if n_periods else time_shift), 1, n_periods * substeps)
+    if not observe:
+        observations[:, :, 0] = X
+    return observations, minimum
+
+def _grid(T, period, max_dt):
+    """Whole periods to T and substeps per period so that no step exceeds max_dt"""
+    n_periods = int(T / period + 1e-9)
+    substeps = max(1, int(np.ceil(period / max_dt - 1e-9)))
+    return n_periods, substeps
+
+def _monitored_steps(n_steps, dt, monitoring):
+    """Steps of a grid of n_steps steps of dt years closest to each monitoring date, and the last one (maturity)"""
+    dates = np.arange(1, int(n_steps * dt / monitoring + 1e-9) + 1) * monitoring
+    monitored = np.zeros(n_steps, dtype=bool)
+    if n_steps:
+        monitored[np.clip(np.round(dates / dt).astype(int), 1, n_steps) - 1] = True
+        monitored[-1] = True
+    return monitored
+
+def _chunks(n_units, rows_per_unit, n_scenarios, n_periods, max_chunk_mb):
+    bytes_per_unit = rows_per_unit * n_scenarios * (_STATE_BYTES_PER_PATH + 8 * n_periods)
+    per_chunk = max(1, int(max_chunk_mb * 2**20 // bytes_per_unit))
+    full, rest = divmod(n_units, per_chunk)
+    return [per_chunk] * full + ([rest] if rest else [])
+
+
+# ==================== AUTOCALL ====================
+
+def _simulate_heston_autocall(seed_seq, n_paths, S0, K_autocall, K_barrier, T, r, coupon, principal, frequency,
+                              v0, kappa, theta, xi, rho, antithetic=False, max_chunk_mb=64,
+                              barrier_monitoring=None, max_dt=1 / 52, greeks=False, histogram_bins=50,
+                              coupon_barrier=None, memory=False):
+    """
+    Simulate n_paths Heston autocall payoffs on an independent random stream
+
+    Same contract as monte_carlo._simulate_autocall(): unit moments (payoff,
+    put control at the barrier, then the bumped payoffs with greeks=True),
+    per-path payoff moments, the autocall date histogram and the payoff
+    distribution. A knock-in
+    barrier (barrier_monitoring) is observed on the grid steps closest to its
+    monitoring dates and at maturity; the grid step is at most
+    min(max_dt, barrier_monitoring).
+    """
+    rng = np.random.default_rng(seed_seq)
+    if barrier_monitoring is not None:
+        max_dt = min(max_dt, barrier_monitoring)
+    n_periods, substeps = _grid(T, frequency, max_dt)
+    monitored = (None if barrier_monitoring is None
+                 else _monitored_steps(n_periods * substeps, frequency / substeps, barrier_monitoring))
+    n_units = (n_paths + 1) // 2 if antithetic else n_paths
+    rows_per_unit = 2 if antithetic else 1
+    v0s, thetas, _ = _scenarios(v0, kappa, theta, xi, rho, greeks)
+    log_barrier = np.log(K_barrier / S0)
+
+    def redemptions(X, minimum, shift=0.0):
+        survival = None if barrier_monitoring is None else (minimum + shift > log_barrier).astype(float)
+        return _autocall_redemptions(S0 * np.exp(X + shift), S0, K_autocall, K_barrier, T,
+                                     coupon, principal, frequency, survival, coupon_barrier, memory)
+
+    unit_moments, path_moments = RunningMoments(7 if greeks else 2), RunningMoments(1)
+    autocall_counts = np.zeros(n_periods + 1, dtype=np.int64)
+    distribution = PayoffDistribution(0.0, principal * (1 + coupon * T), principal, histogram_bins)
+    for chunk in _chunks(n_units, rows_per_unit, len(v0s), n_periods, max_chunk_mb):
+        observations, minimum = _heston_paths(rng, chunk, antithetic, frequency, n_periods, substeps, r,
+                                              v0s, thetas, kappa, xi, rho, _TIME_BUMP if greeks else 0.0,
+                                              track_minimum=barrier_monitoring is not None, monitored=monitored)
+        payoffs, S_T, call_step = redemptions(observations[0], minimum[0])
+        control = np.maximum(K_barrier - S_T, 0)
+        autocall_counts += np.bincount(call_step, minlength=n_periods + 1)
+        path_moments.update(payoffs)
+        distribution.update(payoffs)
+
+        columns = [payoffs, control]
+        if greeks:
+            columns += [redemptions(observations[0], minimum[0], np.log(1 + _SPOT_BUMP))[0],
+                        redemptions(observations[0], minimum[0], np.log(1 - _SPOT_BUMP))[0],
+                        redemptions(observations[1], minimum[1])[0],
+                        redemptions(observations[2], minimum[2])[0],
+                        redemptions(observations[3], minimum[3])[0] * np.exp(r * _TIME_BUMP)]
+        if antithetic:
+            columns = [0.5 * (column[:chunk] + column[chunk:]) for column in columns]
+        unit_moments.update(*columns)
+
+    return unit_moments, path_moments, autocall_counts, distribution
+
+def heston_autocall(S0, K_autocall, K_barrier, T, r, coupon, principal, frequency,
+                    v0, kappa, theta, xi, rho, n_sims=10000, seed=42, n_workers=1,
+                    antithetic=False, control_variate=False, target_std_error=None, batch_size=5000,
+                    max_chunk_mb=64, barrier_monitoring=None, max_dt=1 / 52, greeks=False, histogram_bins=50,
+                    coupon_barrier=None, memory=False):
+    """
+    Autocall under Heston dynamics, same payoff conventions and outputs as monte_carlo_autocall()
+
+    Each autocall period is split in steps of at most max_dt years (weekly by
+    default). barrier_monitoring > 0 makes the protection barrier a knock-in
+    observed every barrier_monitoring years (nearest grid step) and at
+    maturity; it only refines the grid when finer than max_dt.
+    The control variate is the European put at the barrier, priced with
+    heston_price(). With greeks=True the volatility level (sqrt(v0) and
+    sqrt(theta)) is bumped for vega, on the same draws. Phoenix terms
+    (step-down K_autocall, coupon_barrier, memory) as in monte_carlo_autocall().
+    """
+    if barrier_monitoring is not None and barrier_monitoring <= 0:
+        raise ValueError("Heston knock-in monitoring must be discrete (barrier_monitoring > 0)")
+
+    params = (S0, K_autocall, K_barrier, T, r, coupon, principal, frequency, v0, kappa, theta, xi, rho)
+    options = {"antithetic": antithetic, "max_chunk_mb": max_chunk_mb, "barrier_monitoring": barrier_monitoring,
+               "max_dt": max_dt, "greeks": greeks, "histogram_bins": histogram_bins,
+               "coupon_barrier": coupon_barrier, "memory": memory}
+    n_periods = int(T / frequency + 1e-9)
+    _check_autocall_schedule(K_autocall, n_periods)
+
+    control_mean = None
+    if control_variate:
+        T_grid = n_periods * frequency
+        control_mean = heston_price(S0, K_barrier, T_grid, r, v0, kappa, theta, xi, rho, "put") * np.exp(r * T_grid)
+
+    result, _, units = _run_monte_carlo(_simulate_heston_autocall, params, options, n_periods, np.exp(-r * T),
+                                        n_sims, seed, n_workers, control_mean, target_std_error, batch_size)
+    if greeks:
+        vol_points = _scenarios(v0, kappa, theta, xi, rho, True)[2]
+        result["greeks"], result["greeks_std_error"] = _bump_greeks(units, S0, vol_points, np.exp(-r * T))
+    return result
+
+
+# ==================== BARRIER REVERSE CONVERTIBLE ====================
+
+def _simulate_heston_barrier_put(seed_seq, n_paths, S0, K, B, T, r, v0, kappa, theta, xi, rho,
+                                 monitoring=1 / 252, antithetic=False, max_chunk_mb=64, greeks=False):
+    """
+    Simulate n_paths down-and-in put payoffs (barrier observed every monitoring years)
+
+    Unit moments hold the payoff, the vanilla put control and the bumped
+    payoffs (greeks=True); per-path moments hold the payoff and the loss
+    indicator (knocked in and S_T < K).
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_periods, substeps = _grid(T, monitoring, monitoring)
+    n_units = (n_paths + 1) // 2 if antithetic else n_paths
+    rows_per_unit = 2 if antithetic else 1
+    v0s, thetas, _ = _scenarios(v0, kappa, theta, xi, rho, greeks)
+    log_barrier = np.log(B / S0)
+
+    def payoff(X_T, minimum, shift=0.0):
+        put = np.maximum(K - S0 * np.exp(X_T + shift), 0)
+        return np.where(minimum + shift <= log_barrier, put, 0.0)
+
+    unit_moments, path_moments = RunningMoments(7 if greeks else 2), RunningMoments(2)
+    stub = T - n_periods * monitoring
+    stub = stub if stub > 1e-9 else 0.0
+    # Only S_T and the running minimum are kept: one observation column per path
+    for chunk in _chunks(n_units, rows_per_unit, len(v0s), 1, max_chunk_mb):
+        # Whole monitoring periods, the final stub (if any) is one more step to T
+        observations, minimum = _heston_paths(rng, chunk, antithetic, monitoring, n_periods, 1, r,
+                                              v0s, thetas, kappa, xi, rho, _TIME_BUMP if greeks else 0.0,
+                                              stub=stub, observe=False)
+        X_T = observations[:, :, 0]
+
+        payoffs = payoff(X_T[0], minimum[0])
+        control = np.maximum(K - S0 * np.exp(X_T[0]), 0)
+        path_moments.update(payoffs, payoffs > 0)
+
+        columns = [payoffs, control]
+        if greeks:
+            columns += [payoff(X_T[0], minimum[0], np.log(1 + _SPOT_BUMP)),
+                        payoff(X_T[0], minimum[0], np.log(1 - _SPOT_BUMP)),
+                        payoff(X_T[1], minimum[1]), payoff(X_T[2], minimum[2]),
+                        payoff(X_T[3], minimum[3]) * np.exp(r * _TIME_BUMP)]
+        if antithetic:
+            columns = [0.5 * (column[:chunk] + column[chunk:]) for column in columns]
+        unit_moments.update(*columns)
+
+    return unit_moments, path_moments, np.array([n_paths], dtype=np.int64), None  # No early redemption
+
+def heston_down_and_in_put(S0, K, B, T, r, v0, kappa, theta, xi, rho, monitoring=1 / 252,
+                           n_sims=10000, seed=42, n_workers=1, antithetic=False, control_variate=True,
+                           max_chunk_mb=64, greeks=True):
+    """
+    Down-and-in put under Heston dynamics, barrier observed every `monitoring` years
+
+    Counterpart of pde.pde_down_and_in_put() for the barrier reverse
+    convertible; the vanilla put (heston_price) is the control variate.
+
+    Returns:
+        dict with price, std_error, prob_loss and, with greeks=True, delta,
+        gamma, vega (volatility level, per vol point) and theta (per day)
+    """
+    if monitoring <= 0:
+        raise ValueError("Heston barrier monitoring must be discrete (monitoring > 0)")
+
+    params = (S0, K, B, T, r, v0, kappa, theta, xi, rho)
+    options = {"monitoring": monitoring, "antithetic": antithetic, "max_chunk_mb": max_chunk_mb, "greeks": greeks}
+    control_mean = heston_price(S0, K, T, r, v0, kappa, theta, xi, rho, "put") * np.exp(r * T) if control_variate else None
+
+    result, paths, units = _run_monte_carlo(_simulate_heston_barrier_put, params, options, 0, np.exp(-r * T),
+                                            n_sims, seed, n_workers, control_mean)
+    output = {"price": result["price"], "std_error": result["std_error"], "prob_loss": float(paths.mean[1])}
+    if greeks:
+        vol_points = _scenarios(v0, kappa, theta, xi, rho, True)[2]
+        estimates, _ = _bump_greeks(units, S0, vol_points, np.exp(-r * T))
+        output.update(estimates)
+    return output
@@ -0,0 +1,178 @@
+"""
+Implied volatility
+Inversion vectorisée de Black-Scholes (Newton sur prix normalisé) et surface de volatilité implicite
+
+Prices are normalized by the undiscounted strike. With the forward log-moneyness
+x = ln(F/K) and the total volatility v = sigma * sqrt(T), an out-of-the-money
+call is worth c(x, v) = e^x N(x/v + v/2) - N(x/v - v/2) for x <= 0, and any
+call or put maps to such a price by put-call parity and the reflection
+put(x) = e^x call(-x). Newton's method then runs on ln c, which stays well
+scaled for deep out-of-the-money quotes, inside a bracket that falls back to
+bisection whenever a step leaves it.
+"""
+
+import numpy as np
+from scipy.special import ndtr
+from app.pricing_core.black_scholes import _as_arrays
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def _normalized_otm_call(x, v):
+    """Out-of-the-money normalized call c(x, v) (x <= 0) and its vega dc/dv"""
+    d1 = x / v + 0.5 * v
+    d2 = d1 - v
+    vega = np.exp(x - 0.5 * d1**2) / _SQRT_2PI
+    return np.exp(x) * ndtr(d1) - ndtr(d2), vega
+
+
+def _rational_guess(x, c):
+    """Corrado-Miller approximation of the total volatility (normalized units: forward e^x, strike 1)"""
+    gap = np.expm1(x)
+    centered = c - 0.5 * gap
+    root = np.sqrt(np.maximum(centered**2 - gap**2 / np.pi, 0.0))
+    return _SQRT_2PI / (np.exp(x) + 1) * (centered + root)
+
+
+def implied_volatility(price, S, K, T, r, option_type="call", tol=1e-10, max_iter=50):
+    """
+    Black-Scholes implied volatility of whole option chains at once
+
+    Every input may be a scalar or an array (broadcasting), option_type a
+    string or an array of "call"/"put". Quotes outside the no-arbitrage bounds
+    (below intrinsic value or above the forward/strike bound) and expired
+    options give NaN.
+
+    Returns:
+        implied volatility, same shape as the broadcast inputs
+    """
+    price, S, K, T, r = _as_arrays(price, S, K, T, r)
+    is_call = np.broadcast_to(np.char.lower(np.asarray(option_type, dtype=str)) == "call", price.shape)
+    live = T > 0
+    T_live = np.where(live, T, 1.0)
+
+    # Undiscounted prices in units of the strike
+    x = np.log(S / K) + r * T_live
+    call = price * np.exp(r * T_live) / K
+    call = np.where(is_call, call, call + np.expm1(x))  # C - P = F - K
+    target = np.where(x > 0, (call - np.expm1(x)) * np.exp(-x), call)
+    x = -np.abs(x)
+
+    valid = live & (target > 0) & (target < np.exp(x))
+    sigma = np.full(price.shape, np.nan)
+    if not valid.any():
+        return sigma[()]
+
+    x, target = x[valid], target[valid]
+    log_target = np.log(target)
+    v = np.maximum(_rational_guess(x, target), 1e-4)
+    low, high = np.zeros_like(v), np.full_like(v, np.inf)
+    active = np.arange(len(v))
+    for _ in range(max_iter):
+        xa, va = x[active], v[active]
+        c, vega = _normalized_otm_call(xa, va)
+        above = c > target[active]
+        high[active] = np.where(above, va, high[active])
+        low[active] = np.where(above, low[active], va)
+
+        # Newton step on ln c, bisection (doubling while unbounded) when it leaves the bracket
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = (np.log(np.maximum(c, 1e-300)) - log_target[active]) * c / vega
+        candidate = va - step
+        la, ha = low[active], high[active]
+        fallback = np.where(np.isfinite(ha), 0.5 * (la + ha), 2 * va)
+        candidate = np.where(np.isfinite(candidate) & (candidate > la) & (candidate < ha), candidate, fallback)
+        v[active] = candidate
+
+        converged = np.abs(candidate - va) <= tol * np.maximum(va, 1.0)
+        active = active[~converged]
+        if active.size == 0:
+            break
+
+    sigma[valid] = v / np.sqrt(T_live[valid])
+    return sigma[()]
+
+
+# ==================== SURFACE ====================
+
+class ImpliedVolSurface:
+    """
+    Strike x maturity implied volatility surface of one underlying
+
+    Each listed maturity keeps its smile as implied volatility against forward
+    log-moneyness k = ln(K/F), interpolated linearly in k and flat beyond the
+    quoted strikes. Between maturities the total variance sigma^2 T is
+    interpolated linearly in T (flat volatility before the first and after the
+    last maturity), so lookups are plain array operations.
+    """
+
+    def __init__(self, spot: float, rate: float, maturities: np.ndarray, smiles: list):
+        self.spot = spot
+        self.rate = rate
+        self.maturities = np.asarray(maturities, dtype=float)  # Increasing, one smile each
+        self.smiles = smiles  # [(log_moneyness, vols)] with increasing log_moneyness
+
+    @classmethod
+    def from_quotes(cls, spot, rate, maturities, strikes, prices, option_types, min_points=3) -> "ImpliedVolSurface":
+        """
+        Invert a whole option chain in one call and keep the out-of-the-money side
+
+        Quotes are grouped by maturity. Calls are kept above the forward and
+        puts below it, where prices are the most informative. Maturities with
+        fewer than min_points valid quotes are dropped.
+        """
+        maturities, strikes, prices = (np.asarray(a, dtype=float) for a in (maturities, strikes, prices))
+        option_types = np.char.lower(np.asarray(option_types, dtype=str))
+        vols = implied_volatility(prices, spot, strikes, maturities, rate, option_types)
+
+        log_moneyness = np.log(strikes / spot) - rate * maturities
+        out_of_the_money = np.where(option_types == "call", log_moneyness >= 0, log_moneyness < 0)
+        keep = np.isfinite(vols) & out_of_the_money
+
+        kept_maturities, smiles = [], []
+        for T in np.unique(maturities[keep]):
+            in_slice = keep & (maturities == T)
+            k = log_moneyness[in_slice]
+            if len(np.unique(k)) < min_points:
+                continue
+            order = np.argsort(k)
+            kept_maturities.append(T)
+            smiles.append((k[order], vols[in_slice][order]))
+        if not smiles:
+            raise ValueError("No maturity with enough valid quotes to build an implied volatility surface")
+        return cls(spot, rate, np.array(kept_maturities), smiles)
+
+    def volatility(self, moneyness, T) -> np.ndarray:
+        """
+        Implied volatility at strike moneyness K/S and maturity T (arrays broadcast)
+
+        Moneyness is relative to the spot, so a request priced at another spot
+        reads the smile at the same K/S (sticky moneyness).
+        """
+        moneyness, T = _as_arrays(moneyness, T)
+        T = np.maximum(T, 1e-6)
+        k = np.log(moneyness) - self.rate * T
+
+        # Total variance of every smile at k (flat volatility outside the quoted strikes)
+        variances = np.stack([np.interp(k, strikes, vols)**2 * T_i
+                              for T_i, (strikes, vols) in zip(self.maturities, self.smiles)])
+
+        n = len(self.maturities)
+        upper = np.clip(np.searchsorted(self.maturities, T), 1, max(n - 1, 1))
+        lower = upper - 1
+        if n == 1:
+            total_variance = variances[0] * T / self.maturities[0]
+        else:
+            w_low = np.take_along_axis(variances, lower[None], 0)[0]
+            w_high = np.take_along_axis(variances, upper[None], 0)[0]
+            T_low, T_high = self.maturities[lower], self.maturities[upper]
+            weight = (T - T_low) / (T_high - T_low)
+            total_variance = w_low + weight * (w_high - w_low)
+            # Flat volatility before the first and after the last maturity
+            total_variance = np.where(T < self.maturities[0], variances[0] * T / self.maturities[0], total_variance)
+            total_variance = np.where(T > self.maturities[-1], variances[-1] * T / self.maturities[-1], total_variance)
+        return np.sqrt(np.maximum(total_variance, 0.0) / T)[()]
+
+    def grid(self, moneyness, maturities) -> np.ndarray:
+        """Volatilities on a moneyness x maturity grid, shape (len(moneyness), len(maturities))"""
+        return self.volatility(np.asarray(moneyness, dtype=float)[:, None], np.asarray(maturities, dtype=float)[None])
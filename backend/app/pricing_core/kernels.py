@@ -0,0 +1,99 @@
+"""
+Compiled path kernels
+Boucles par trajectoire compilées avec Numba (optionnel), repli sur le moteur NumPy sinon
+
+Payoffs with early exits are awkward to vectorize: the NumPy engine builds
+the whole path matrix and scans it for the first autocall date. A compiled
+kernel walks each path once and stops testing at its autocall date, paths
+running in parallel (numba.prange). Numba is an optional dependency: without
+it every backend request resolves to "numpy" and the vectorized engine runs.
+"""
+
+import math
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Optional: the NumPy engine does not need it
+    numba = None
+
+KERNEL_BACKENDS = ("numpy", "numba")
+
+
+def available_backends() -> tuple:
+    """Backends usable in this environment"""
+    return KERNEL_BACKENDS if numba is not None else ("numpy",)
+
+def resolve_backend(backend: str) -> str:
+    """Backend that will run a request for `backend` ("numba" falls back to "numpy" when not installed)"""
+    if backend not in KERNEL_BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' (expected one of {KERNEL_BACKENDS})")
+    return backend if backend in available_backends() else "numpy"
+
+def autocall_paths(z, shift, drift, scale, first_scale, time_shift, dt, log_autocall, log_knock, monitored,
+                   inv_var_dt, coupon, principal, T, log_coupon, phoenix, memory, payoffs, growth):
+    """
+    Autocall payoffs of one scenario, path by path (compiled by Numba when installed)
+
+    ln(S_k / S0) = shift + drift t_k + scale W_k with W the cumulated draws,
+    the first one multiplied by first_scale and t_k = k dt - time_shift, as in
+    _autocall_greek_payoffs(). log_autocall and log_coupon hold ln(level / S0)
+    per observation date, log_knock is ln(B / S0) of the (shifted) knock-in
+    barrier when monitored, the protection level ln(K_barrier / S0)
+    otherwise. phoenix pays the coupons of the dates at or above log_coupon
+    (memory: missed ones too) instead of the snowball coupon. Writes payoffs
+    and S_T / S0 and returns the autocall steps (n_steps: held to maturity).
+    """
+    n_paths, n_steps = z.shape
+    protected = principal if phoenix else principal * (1 + coupon * T)
+    call_step = np.full(n_paths, n_steps, dtype=np.int64)
+    for i in _prange(n_paths):
+        W = 0.0
+        log_growth = shift
+        survival = 1.0
+        previous = shift - log_knock
+        if monitored and previous <= 0:
+            survival = 0.0
+        step = n_steps
+        periods = 0
+        for k in range(n_steps):
+            W += z[i, k] * (first_scale if k == 0 else 1.0)
+            log_growth = shift + drift * (dt * (k + 1) - time_shift) + scale * W
+            if phoenix and log_growth >= log_coupon[k]:
+                periods = k + 1 if memory else periods + 1
+            if log_growth >= log_autocall[k]:
+                step = k
+                break
+            if monitored:
+                # Brownian bridge crossing between two observations (see _knock_in_survival)
+                distance = log_growth - log_knock
+                if distance <= 0:
+                    survival = 0.0
+                elif survival > 0:
+                    survival *= min(max(1 - math.exp(-2 * previous * distance * inv_var_dt), 0.0), 1.0)
+                previous = distance
+
+        if step < n_steps:
+            # Called: no more tests, only the terminal spot (control variate) is still needed
+            for k in range(step + 1, n_steps):
+                W += z[i, k]
+            growth[i] = math.exp(shift + drift * (dt * n_steps - time_shift) + scale * W)
+            payoffs[i] = (principal * (1 + coupon * dt * periods) if phoenix
+                          else principal * (1 + coupon * dt * (step + 1)))
+            call_step[i] = step
+            continue
+
+        growth[i] = math.exp(log_growth)
+        if not monitored:
+            payoffs[i] = protected if log_growth >= log_knock else principal * growth[i]
+        else:
+            knocked_in = principal * growth[i] if growth[i] < 1 else protected
+            payoffs[i] = survival * protected + (1 - survival) * knocked_in
+        payoffs[i] += principal * coupon * dt * periods
+    return call_step
+
+if numba is not None:
+    _prange = numba.prange
+    autocall_paths = numba.njit(parallel=True, cache=True)(autocall_paths)
+else:
+    _prange = range
@@ -0,0 +1,1036 @@
+"""
+Monte Carlo engine for Autocall pricing
+Chemins vectorisés, flux aléatoires indépendants (SeedSequence.spawn) et répartition multi-cœurs
+Échantillonnage pseudo-aléatoire ou quasi-aléatoire (Sobol + pont brownien)
+"""
+
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.stats import norm, qmc
+from app.pricing_core.black_scholes import black_scholes_put
+from app.pricing_core.kernels import autocall_paths, resolve_backend
+
+SAMPLERS = ("pseudo", "sobol")
+PRECISIONS = ("float64", "float32")
+
+# Peak working set per observation date (measured with tracemalloc): drawing the
+# normals (Sobol adds the uniforms, inverse cdf and Brownian bridge buffers),
+# then the in-place float64 path matrix and autocall mask for every row
+_GENERATION_BYTES_PER_STEP = {"pseudo": 8, "sobol": 56}
+_PATH_BYTES_PER_STEP = 12
+# Log distance to the barrier and crossing probabilities (Brownian bridge correction)
+_BRIDGE_BYTES_PER_STEP = 16
+# Same working sets with single-precision normals and paths. Sobol peaks on its
+# float64 uniforms and inverse cdf either way, so its total does not shrink
+_FLOAT32_GENERATION_BYTES_PER_STEP = {"pseudo": 4, "sobol": 60}
+_FLOAT32_PATH_BYTES_PER_STEP = 8
+_FLOAT32_BRIDGE_BYTES_PER_STEP = 8
+
+# Bumps of the common random number Greeks: relative spot, absolute volatility, one calendar day
+_SPOT_BUMP = 0.02
+_VOL_BUMP = 0.01
+_TIME_BUMP = 1 / 365
+
+# Broadie-Glasserman-Kou: a barrier observed every dt behaves like a continuous
+# barrier shifted away from the spot by exp(beta * sigma * sqrt(dt)), beta = -zeta(1/2)/sqrt(2 pi)
+_BGK_BETA = 0.5826
+
+_process_pool = None
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared Monte Carlo process pool (created on first use)"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+def _split_paths(n_sims: int, n_workers: int) -> list:
+    """Split n_sims paths into n_workers near-equal shares"""
+    base, extra = divmod(n_sims, n_workers)
+    return [base + (1 if i < extra else 0) for i in range(n_workers)]
+
+def _brownian_bridge(z: np.ndarray) -> np.ndarray:
+    """
+    Brownian bridge construction on a uniform grid
+
+    Column 0 of z fixes the terminal value, the next columns fill midpoints
+    breadth-first, so the leading (best distributed) Sobol dimensions drive
+    the coarse shape of each path. Returns standard normal increments per step.
+    """
+    n_paths, n_steps = z.shape
+    W = np.empty_like(z)
+    W[:, -1] = np.sqrt(n_steps) * z[:, 0]
+
+    k = 1
+    intervals = [(-1, n_steps - 1)]  # Index -1 stands for W(0) = 0
+    while intervals:
+        next_intervals = []
+        for left, right in intervals:
+            if right - left < 2:
+                continue
+            mid = (left + right) // 2
+            W_left = W[:, left] if left >= 0 else 0.0
+            weight = (mid - left) / (right - left)
+            std = np.sqrt((mid - left) * (right - mid) / (right - left))
+            W[:, mid] = W_left + weight * (W[:, right] - W_left) + std * z[:, k]
+            k += 1
+            next_intervals += [(left, mid), (mid, right)]
+        intervals = next_intervals
+
+    # Increments written back into z (fully consumed above)
+    np.subtract(W[:, 1:], W[:, :-1], out=z[:, 1:])
+    z[:, 0] = W[:, 0]
+    return z
+
+def _standard_normals(rng, sobol, n_paths: int, n_steps: int, n_assets: int = 1, dtype=np.float64) -> np.ndarray:
+    """
+    Standard normal increments, one row per path and one column per step (sobol=None for pseudo-random)
+
+    With n_assets > 1 a trailing asset axis is added. Sobol dimension
+    k * n_assets + a then drives Brownian bridge point k of asset a, so the
+    leading dimensions fix the terminal values of every asset. dtype=np.float32
+    draws single-precision normals (Ziggurat in float32, half the memory traffic).
+    """
+    if sobol is None:
+        return rng.standard_normal((n_paths, n_steps) if n_assets == 1 else (n_paths, n_steps, n_assets),
+                                   dtype=dtype)
+
+    with warnings.catch_warnings():
+        # Balance is best for powers of two, any n is still a valid RQMC sample
+        warnings.simplefilter("ignore", UserWarning)
+        u = sobol.random(n_paths)
+    np.clip(u, 1e-12, 1 - 1e-12, out=u)
+    z = norm.ppf(u).astype(dtype, copy=False)
+    if n_assets == 1:
+        return _brownian_bridge(z)
+
+    per_asset = z.reshape(n_paths, n_steps, n_assets).transpose(0, 2, 1).reshape(n_paths * n_assets, n_steps)
+    return _brownian_bridge(per_asset).reshape(n_paths, n_assets, n_steps).transpose(0, 2, 1)
+
+def _chunk_sizes(n_units: int, rows_per_unit: int, n_steps: int, sampler: str, max_chunk_mb: float,
+                 path_bytes_per_step: int = _PATH_BYTES_PER_STEP, precision: str = "float64") -> list:
+    """Split n_units into chunks whose working set fits in max_chunk_mb"""
+    generation = _FLOAT32_GENERATION_BYTES_PER_STEP if precision == "float32" else _GENERATION_BYTES_PER_STEP
+    bytes_per_step = generation[sampler] + rows_per_unit * path_bytes_per_step
+    bytes_per_unit = max(n_steps, 1) * bytes_per_step
+    per_chunk = max(1, int(max_chunk_mb * 2**20 // bytes_per_unit))
+    full, rest = divmod(n_units, per_chunk)
+    return [per_chunk] * full + ([rest] if rest else [])
+
+class RunningMoments:
+    """
+    Streaming means and co-moments of a few payoff columns
+
+    Chunks and workers are combined with the pairwise update of Chan et al.,
+    so nothing but (n, mean, M2) is kept in memory.
+    """
+
+    def __init__(self, dim: int = 1):
+        self.n = 0
+        self.mean = np.zeros(dim)
+        self.m2 = np.zeros((dim, dim))
+
+    def update(self, *columns) -> None:
+        """Add one chunk of observations (one array per column)"""
+        batch = np.stack([np.asarray(c, dtype=float) for c in columns])
+        n_batch = batch.shape[1]
+        if n_batch == 0:
+            return
+        mean = batch.mean(axis=1)
+        centered = batch - mean[:, None]
+        self._combine(n_batch, mean, centered @ centered.T)
+
+    def merge(self, other: "RunningMoments") -> None:
+        """Fold in the moments accumulated by another chunk or worker"""
+        if other.n:
+            self._combine(other.n, other.mean, other.m2)
+
+    def _combine(self, n_other, mean_other, m2_other) -> None:
+        n = self.n + n_other
+        delta = mean_other - self.mean
+        self.m2 = self.m2 + m2_other + np.outer(delta, delta) * self.n * n_other / n
+        self.mean = self.mean + delta * n_other / n
+        self.n = n
+
+    def covariance(self) -> np.ndarray:
+        return self.m2 / max(self.n - 1, 1)
+
+class PayoffDistribution:
+    """
+    Streaming histogram of per-path payoffs
+
+    Bins are fixed on [low, high] up front (payoffs outside land in the end
+    bins), n_bins for the reported histogram, each split in `resolution`
+    finer bins for the statistics. Every fine bin keeps the sum, minimum and
+    maximum of its payoffs and how many paths sit exactly on them: the atoms of
+    structured payoffs (coupon redemptions, protected capital, worthless
+    options) come out exactly, and quantiles only interpolate between them.
+    Paths paying more than `reference` (the amount invested) are counted
+    exactly. Memory is O(n_bins * resolution) whatever the number of paths;
+    chunks and workers are merged.
+    """
+
+    def __init__(self, low: float, high: float, reference: float, n_bins: int = 50, resolution: int = 40):
+        size = n_bins * resolution
+        self.n_bins = n_bins
+        self.edges = np.linspace(low, max(high, low + 1e-9), size + 1)
+        self.reference = reference
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.sums = np.zeros(size)
+        self.minimums = np.full(size, np.inf)
+        self.maximums = np.full(size, -np.inf)
+        self.at_minimum = np.zeros(size, dtype=np.int64)
+        self.at_maximum = np.zeros(size, dtype=np.int64)
+        self.n_above = 0
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, payoffs) -> None:
+        """Add one chunk of path payoffs"""
+        payoffs = np.asarray(payoffs, dtype=float)
+        size = len(self.counts)
+        width = self.edges[1] - self.edges[0]
+        index = np.clip(np.floor((payoffs - self.edges[0]) / width), 0, size - 1).astype(np.intp)
+        minimums, maximums = np.full(size, np.inf), np.full(size, -np.inf)
+        np.minimum.at(minimums, index, payoffs)
+        np.maximum.at(maximums, index, payoffs)
+        self._combine(np.bincount(index, minlength=size), np.bincount(index, weights=payoffs, minlength=size),
+                      minimums, np.bincount(index[payoffs == minimums[index]], minlength=size),
+                      maximums, np.bincount(index[payoffs == maximums[index]], minlength=size),
+                      int(np.count_nonzero(payoffs > self.reference)))
+
+    def merge(self, other: "PayoffDistribution") -> None:
+        """Fold in the histogram of another chunk or worker (same bins)"""
+        self._combine(other.counts, other.sums, other.minimums, other.at_minimum, other.maximums,
+                      other.at_maximum, other.n_above)
+
+    def _combine(self, counts, sums, minimums, at_minimum, maximums, at_maximum, n_above) -> None:
+        merged_min, merged_max = np.minimum(self.minimums, minimums), np.maximum(self.maximums, maximums)
+        self.at_minimum = (np.where(self.minimums == merged_min, self.at_minimum, 0)
+                           + np.where(minimums == merged_min, at_minimum, 0))
+        self.at_maximum = (np.where(self.maximums == merged_max, self.at_maximum, 0)
+                           + np.where(maximums == merged_max, at_maximum, 0))
+        self.minimums, self.maximums = merged_min, merged_max
+        self.counts = self.counts + counts
+        self.sums = self.sums + sums
+        self.n_above += n_above
+
+    def _lower_tail(self, q):
+        """
+        Quantile of level q and mean of the payoffs below it
+
+        Inside the quantile's fine bin, the paths on its minimum and maximum
+        are point masses and the others are spread uniformly in between.
+        """
+        target = q * self.n
+        cumulative = np.cumsum(self.counts)
+        b = min(int(np.searchsorted(cumulative, target)), len(self.counts) - 1)
+        k = target - (cumulative[b] - self.counts[b])  # Paths taken from bin b
+        low, high = self.minimums[b], self.maximums[b]
+        n_low = self.at_minimum[b]
+        n_high = self.at_maximum[b] if high > low else 0
+        n_spread = self.counts[b] - n_low - n_high
+
+        from_low = min(k, n_low)
+        from_spread = min(max(k - n_low, 0), n_spread)
+        from_high = max(k - n_low - n_spread, 0)
+        quantile = (low if k <= n_low or high == low else
+                    high if from_high > 0 or n_spread == 0 else
+                    low + from_spread / n_spread * (high - low))
+        tail_sum = (self.sums[:b].sum() + from_low * low + from_spread * (low + quantile) / 2
+                    + from_high * high)
+        return float(quantile), float(tail_sum / target) if target > 0 else float(low)
+
+    def quantile(self, q: float) -> float:
+        return self._lower_tail(q)[0]
+
+    def summary(self, quantiles=(1, 5, 25, 50, 75, 95, 99), levels=(95, 99)) -> dict:
+        """
+        Histogram, payoff quantiles and risk metrics (undiscounted payoffs)
+
+        VaR and expected shortfall at each level are losses against the
+        reference: reference minus the payoff quantile / mean payoff in the
+        worst (100 - level)% of paths (negative when even the tail makes a gain).
+        """
+        n = self.n
+        var, es = {}, {}
+        for level in levels:
+            quantile, tail_mean = self._lower_tail(1 - level / 100)
+            var[f"{level}"] = self.reference - quantile
+            es[f"{level}"] = self.reference - tail_mean
+        resolution = len(self.counts) // self.n_bins
+        return {
+            "bin_edges": self.edges[::resolution].tolist(),
+            "probabilities": (self.counts.reshape(self.n_bins, resolution).sum(axis=1) / n).tolist(),
+            "mean": float(self.sums.sum() / n),
+            "minimum": float(self.minimums.min()),
+            "maximum": float(self.maximums.max()),
+            "quantiles": {f"p{q}": self.quantile(q / 100) for q in quantiles},
+            "value_at_risk": var,
+            "expected_shortfall": es,
+            "probability_profit": self.n_above / n
+        }
+
+def _knock_in_survival(log_distance, start, sigma, dt):
+    """
+    Probability that each path never touched the barrier, continuously monitored
+
+    log_distance holds ln(S_k / B) on the observation dates (overwritten) and
+    start is ln(S_0 / B). Between two observations S_a, S_b above the barrier B,
+    a Brownian bridge crosses it with probability
+    exp(-2 ln(S_a/B) ln(S_b/B) / (sigma^2 dt)). Paths observed at or below B
+    are knocked in (survival 0).
+    """
+    knocked = (log_distance <= 0).any(axis=1) | (start <= 0)
+
+    crossing = np.empty_like(log_distance)
+    crossing[:, 0] = start * log_distance[:, 0]
+    np.multiply(log_distance[:, :-1], log_distance[:, 1:], out=crossing[:, 1:])
+    del log_distance
+    crossing *= float(-2 / (sigma**2 * dt))
+    np.exp(crossing, out=crossing)
+    np.subtract(1, crossing, out=crossing)
+    survival = np.prod(np.clip(crossing, 0, 1, out=crossing), axis=1)
+    return np.where(knocked, 0.0, survival)
+
+def _phoenix_periods(values, levels, exit_step, memory=False):
+    """
+    Coupon periods paid to each path, dates paying where values >= levels (one level per date)
+
+    Only dates up to the exit step (autocall date, or last date) count. With
+    memory, a coupon paid on date k also settles every missed one before it:
+    k + 1 periods in total as of the last paying date. Most paths pay on their
+    exit date (the autocall level is above the coupon barrier), only the others
+    are searched backwards.
+    """
+    n_paths, n_steps = values.shape
+    levels = np.broadcast_to(np.asarray(levels, dtype=values.dtype), n_steps)
+    if n_steps == 0:
+        return np.zeros(n_paths, dtype=int)
+    # Dates still alive, compared in int16: the mask costs a quarter of an int64 comparison
+    dates, last_date = np.arange(n_steps, dtype=np.int16), exit_step.astype(np.int16)
+    if not memory:
+        paid = values >= levels
+        paid &= dates <= last_date[:, None]
+        return paid.sum(axis=1, dtype=np.int32)
+
+    periods = np.where(values[np.arange(n_paths), exit_step] >= levels[exit_step], exit_step + 1, 0)
+    rest = np.flatnonzero(periods == 0)
+    paid = values[rest] >= levels
+    paid &= dates <= last_date[rest, None]
+    last_paid = n_steps - 1 - paid[:, ::-1].argmax(axis=1)
+    periods[rest] = np.where(paid[np.arange(len(rest)), last_paid], last_paid + 1, 0)
+    return periods
+
+def _check_autocall_schedule(K_autocall, n_steps):
+    """Reject a step-down schedule that does not give one autocall level per observation date"""
+    if np.ndim(K_autocall) > 0 and np.shape(K_autocall) != (n_steps,):
+        raise ValueError(f"K_autocall schedule needs one level per observation date ({n_steps})")
+
+def _autocall_redemptions(paths, S0, K_autocall, K_barrier, T, coupon, principal, frequency, survival=None,
+                          coupon_barrier=None, memory=False):
+    """
+    Autocall payoffs from the spots on the observation dates (one row per path, any dynamics)
+
+    K_autocall is one level, or one per observation date (step-down schedule).
+    survival=None checks the protection barrier at maturity only. Otherwise
+    survival is the probability that each path never touched the knock-in
+    barrier; a knocked-in note redeems S_T / S0 below the initial fixing.
+
+    coupon_barrier=None accrues the coupon until the call or maturity
+    (snowball). Otherwise the note is a Phoenix: a coupon of coupon * frequency
+    is paid on each date at or above coupon_barrier (missed ones included with
+    memory), on top of the principal or of the maturity redemption.
+
+    Returns payoffs (total cash), terminal spots and the autocall step of each
+    path (n_steps when the product runs to maturity).
+    """
+    n_paths, n_steps = paths.shape
+    dt = frequency
+
+    # First observation date where the autocall condition is met
+    hit = paths >= np.asarray(K_autocall, dtype=paths.dtype)
+    autocalled = hit.any(axis=1)
+    first_hit = hit.argmax(axis=1) if n_steps > 0 else np.zeros(n_paths, dtype=int)
+    del hit
+
+    S_T = paths[:, -1].copy() if n_steps > 0 else np.full(n_paths, float(S0))
+    call_step = np.where(autocalled, first_hit, n_steps)
+    if coupon_barrier is not None:
+        # Phoenix: conditional coupons until the exit date, principal at the call
+        periods = _phoenix_periods(paths, coupon_barrier, np.minimum(call_step, n_steps - 1), memory)
+        coupons = principal * coupon * dt * periods
+        if survival is None:
+            final_payoff = np.where(S_T >= K_barrier, principal, principal * (S_T / S0))
+        else:
+            knocked_in = np.where(S_T < S0, principal * (S_T / S0), principal)
+            final_payoff = survival * principal + (1 - survival) * knocked_in
+        return coupons + np.where(autocalled, principal, final_payoff), S_T, call_step
+
+    autocall_payoff = principal * (1 + coupon * (first_hit + 1) * dt)
+    # If not autocalled, check final payoff
+    if survival is None:
+        final_payoff = np.where(S_T >= K_barrier, principal * (1 + coupon * T), principal * (S_T / S0))
+    else:
+        protected = principal * (1 + coupon * T)
+        knocked_in = np.where(S_T < S0, principal * (S_T / S0), protected)
+        final_payoff = survival * protected + (1 - survival) * knocked_in
+
+    return np.where(autocalled, autocall_payoff, final_payoff), S_T, call_step
+
+def _autocall_payoffs(z, S0, K_autocall, K_barrier, T, r, sigma, coupon, principal, frequency,
+                      barrier_monitoring=None, coupon_barrier=None, memory=False):
+    """
+    Autocall payoffs for a matrix of standard normal increments (overwritten in place)
+
+    barrier_monitoring=None checks the protection barrier at maturity only.
+    Otherwise the barrier is a knock-in observed continuously (0) or every
+    barrier_monitoring years: touching it before maturity exposes the holder to
+    S_T / S0 below the initial fixing. Only the autocall dates are simulated;
+    the knock-in uses the Brownian bridge survival probability between them
+    (a conditional expectation, no extra draws), and discrete monitoring is
+    mapped to a continuous barrier with the Broadie-Glasserman-Kou shift.
+    K_autocall, coupon_barrier and memory as in _autocall_redemptions().
+
+    Returns payoffs, terminal spots and the autocall step of each path
+    (n_steps when the product runs to maturity).
+    """
+    n_paths, n_steps = z.shape
+    dt = frequency
+
+    # Path matrix built in place: one row per simulation, one column per observation date.
+    # Scalars as Python floats, NumPy float64 scalars would run float32 paths through float64 loops
+    paths = z
+    paths *= float(sigma * np.sqrt(dt))
+    paths += float((r - 0.5 * sigma**2) * dt)
+    np.cumsum(paths, axis=1, out=paths)
+    np.exp(paths, out=paths)
+    paths *= float(S0)
+
+    survival = None
+    if barrier_monitoring is not None:
+        barrier = float(K_barrier * np.exp(-_BGK_BETA * sigma * np.sqrt(barrier_monitoring)))
+        survival = (_knock_in_survival(np.log(paths / barrier), np.log(S0 / barrier), sigma, dt) if n_steps > 0
+                    else np.full(n_paths, float(S0 > barrier)))
+    return _autocall_redemptions(paths, S0, K_autocall, K_barrier, T, coupon, principal, frequency, survival,
+                                 coupon_barrier, memory)
+
+def _autocall_greek_payoffs(z, S0, K_autocall, K_barrier, T, r, sigma, coupon, principal, frequency,
+                            barrier_monitoring=None, coupon_barrier=None, memory=False):
+    """
+    Autocall payoffs of the price and of the bumped scenarios used for the Greeks (z is overwritten)
+
+    Every scenario reuses the same draws (common random numbers). With W_k
+    the cumulated draws, ln(S_k / S0) = shift + vol sqrt(dt) W_k + drift t_k,
+    so each autocall (and Phoenix coupon) test is a comparison of W against
+    one threshold per date: no path matrix is rebuilt for a spot or volatility
+    bump. The one day theta shortens the first observation period. Strikes and
+    the initial fixing S0 stay where they were set.
+
+    Returns the (payoffs, terminal spots, autocall steps) of the price, as
+    _autocall_payoffs(), and the payoffs for spot up, spot down (relative
+    _SPOT_BUMP), volatility up, volatility down (_VOL_BUMP) and one day later
+    (_TIME_BUMP, compounded by exp(r h) so that every column is discounted from
+    T like the price).
+    """
+    n_paths, n_steps = z.shape
+    dt = frequency
+    phoenix = coupon_barrier is not None
+    # Phoenix coupons are added on top of the principal, snowball coupons accrue in the redemption
+    protected = principal if phoenix else principal * (1 + coupon * T)
+    first_draw = z[:, :1].copy()
+    W = np.cumsum(z, axis=1, out=z)
+
+    redemptions = (np.full(n_steps, float(principal)) if phoenix
+                   else principal * (1 + coupon * dt * np.arange(1, n_steps + 1)))
+
+    def payoffs(vol, shift=0.0, time_shift=0.0):
+        """Payoffs, terminal spots and autocall flags for a spot S0 * exp(shift), valued time_shift years later"""
+        drift = r - 0.5 * vol**2
+        scale = vol * np.sqrt(dt)
+        times = dt * np.arange(1, n_steps + 1) - time_shift
+        if n_steps > 0:
+            hit = W >= ((np.log(K_autocall / S0) - shift - drift * times) / scale).astype(W.dtype)
+            # argmax is 0 both for a hit on the first date and for no hit at all
+            first_hit = hit.argmax(axis=1)
+            autocalled = hit[:, 0] | (first_hit > 0)
+            del hit
+            growth = W[:, -1] * scale
+            growth += shift + drift * times[-1]
+            np.exp(growth, out=growth)  # S_T / S0
+        else:
+            first_hit = np.zeros(n_paths, dtype=int)
+            autocalled = np.zeros(n_paths, dtype=bool)
+            growth = np.full(n_paths, np.exp(shift))
+
+        if barrier_monitoring is None:
+            final_payoff = np.where(growth >= K_barrier / S0, protected, principal * growth)
+        else:
+            # Survival only matters for the paths held to maturity
+            start = shift - np.log(K_barrier / S0) + _BGK_BETA * vol * np.sqrt(barrier_monitoring)
+            survival = np.zeros(n_paths) if n_steps > 0 else np.full(n_paths, float(start > 0))
+            if n_steps > 0:
+                held = ~autocalled
+                log_distance = W[held] * W.dtype.type(scale) + (drift * times + start).astype(W.dtype)
+                survival[held] = _knock_in_survival(log_distance, start, vol, dt)
+            knocked_in = np.where(growth < 1, principal * growth, protected)
+            final_payoff = survival * protected + (1 - survival) * knocked_in
+        if n_steps > 0:
+            final_payoff = np.where(autocalled, redemptions[first_hit], final_payoff)
+        if phoenix and n_steps > 0:
+            levels = (np.log(coupon_barrier / S0) - shift - drift * times) / scale
+            periods = _phoenix_periods(W, levels, np.where(autocalled, first_hit, n_steps - 1), memory)
+            final_payoff += principal * coupon * dt * periods
+        return final_payoff, growth, autocalled, first_hit
+
+    payoff, growth, autocalled, first_hit = payoffs(sigma)
+    price = (payoff, S0 * growth, np.where(autocalled, first_hit, n_steps))
+    bumped = [payoffs(sigma, np.log(1 + _SPOT_BUMP))[0], payoffs(sigma, np.log(1 - _SPOT_BUMP))[0],
+              payoffs(sigma + _VOL_BUMP)[0], payoffs(max(sigma - _VOL_BUMP, 1e-4))[0]]
+
+    # One day later the first period lasts dt - h: its draw is rescaled, later dates keep theirs
+    h = min(_TIME_BUMP, dt)
+    W -= (1 - np.sqrt((dt - h) / dt)) * first_draw
+    bumped.append(payoffs(sigma, time_shift=h)[0] * np.exp(r * h))
+    return price, bumped
+
+def _compiled_autocall_payoffs(z, S0, K_autocall, K_barrier, T, r, sigma, coupon, principal, frequency,
+                               barrier_monitoring=None, coupon_barrier=None, memory=False, greeks=False):
+    """
+    Compiled backend of _autocall_payoffs() / _autocall_greek_payoffs() (z is left untouched)
+
+    Each scenario is one parallel pass of kernels.autocall_paths() over the
+    draws, so the bumped scenarios share the draws of the price as in the NumPy
+    engine. Returns the same tuples.
+    """
+    n_paths, n_steps = z.shape
+    dt = frequency
+    log_autocall = np.log(np.broadcast_to(np.asarray(K_autocall, dtype=float), n_steps) / S0)
+    log_coupon = np.log(np.full(n_steps, np.inf if coupon_barrier is None else float(coupon_barrier)) / S0)
+
+    def payoffs(vol, shift=0.0, time_shift=0.0, first_scale=1.0):
+        """Payoffs, S_T / S0 and autocall steps for a spot S0 * exp(shift), valued time_shift years later"""
+        log_knock = np.log(K_barrier / S0)
+        if barrier_monitoring is not None:
+            log_knock -= _BGK_BETA * vol * np.sqrt(barrier_monitoring)
+        payoff, growth = np.empty(n_paths), np.empty(n_paths)
+        call_step = autocall_paths(z, float(shift), float(r - 0.5 * vol**2), float(vol * np.sqrt(dt)),
+                                   float(first_scale), float(time_shift), float(dt), log_autocall,
+                                   float(log_knock), barrier_monitoring is not None, float(1 / (vol**2 * dt)),
+                                   float(coupon), float(principal), float(T), log_coupon,
+                                   coupon_barrier is not None, bool(memory), payoff, growth)
+        return payoff, growth, call_step
+
+    payoff, growth, call_step = payoffs(sigma)
+    price = (payoff, S0 * growth, call_step)
+    if not greeks:
+        return price
+    h = min(_TIME_BUMP, dt)
+    bumped = [payoffs(sigma, np.log(1 + _SPOT_BUMP))[0], payoffs(sigma, np.log(1 - _SPOT_BUMP))[0],
+              payoffs(sigma + _VOL_BUMP)[0], payoffs(max(sigma - _VOL_BUMP, 1e-4))[0],
+              payoffs(sigma, time_shift=h, first_scale=np.sqrt((dt - h) / dt))[0] * np.exp(r * h)]
+    return price, bumped
+
+def _simulate_autocall(seed_seq, n_paths, S0, K_autocall, K_barrier, T, r, sigma, coupon, principal, frequency,
+                       sampler="pseudo", antithetic=False, max_chunk_mb=64, barrier_monitoring=None,
+                       greeks=False, histogram_bins=50, precision="float64", backend="numpy",
+                       coupon_barrier=None, memory=False):
+    """
+    Simulate n_paths autocall payoffs on an independent random stream
+
+    Paths are generated and reduced in chunks of at most max_chunk_mb, so memory
+    does not grow with n_paths. Returns (units, paths, autocall_counts,
+    distribution): units are antithetic pair averages (or single paths) with the
+    European put control payoff as second column, paths holds the plain per-path
+    payoff moments used to measure the variance reduction, autocall_counts is the
+    histogram of autocall dates (last bin: held to maturity) and distribution the
+    PayoffDistribution of the redemptions. With greeks=True the units carry the
+    five bumped payoffs of _autocall_greek_payoffs() as extra columns.
+
+    precision="float32" draws the normals and builds the paths in single
+    precision; payoffs are reduced into the float64 moments and histogram.
+    backend="numba" runs the payoffs through _compiled_autocall_payoffs().
+    K_autocall, coupon_barrier and memory as in _autocall_redemptions().
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_steps = int(T / frequency)
+    n_units = (n_paths + 1) // 2 if antithetic else n_paths
+    rows_per_unit = 2 if antithetic else 1
+
+    # Scrambled Sobol points: each stream is an independent randomization,
+    # continued from chunk to chunk
+    sobol = qmc.Sobol(d=n_steps, scramble=True, seed=rng) if sampler == "sobol" and n_steps > 0 else None
+
+    unit_moments, path_moments = RunningMoments(7 if greeks else 2), RunningMoments(1)
+    autocall_counts = np.zeros(n_steps + 1, dtype=np.int64)
+    distribution = PayoffDistribution(0.0, principal * (1 + coupon * T), principal, histogram_bins)
+    single = precision == "float32"
+    path_bytes = ((_FLOAT32_PATH_BYTES_PER_STEP if single else _PATH_BYTES_PER_STEP)
+                  + (0 if barrier_monitoring is None else
+                     _FLOAT32_BRIDGE_BYTES_PER_STEP if single else _BRIDGE_BYTES_PER_STEP))
+    for chunk in _chunk_sizes(n_units, rows_per_unit, n_steps, sampler, max_chunk_mb, path_bytes, precision):
+        z = _standard_normals(rng, sobol, chunk, n_steps, dtype=np.float32 if single else np.float64)
+        if antithetic:
+            z = np.concatenate([z, -z])
+        if backend == "numba":
+            result = _compiled_autocall_payoffs(z, S0, K_autocall, K_barrier, T, r, sigma, coupon, principal,
+                                                frequency, barrier_monitoring, coupon_barrier, memory, greeks)
+            (payoffs, S_T, call_step), bumped = result if greeks else (result, [])
+        elif greeks:
+            (payoffs, S_T, call_step), bumped = _autocall_greek_payoffs(z, S0, K_autocall, K_barrier, T, r, sigma,
+                                                                        coupon, principal, frequency,
+                                                                        barrier_monitoring, coupon_barrier, memory)
+        else:
+            bumped = []
+            payoffs, S_T, call_step = _autocall_payoffs(z, S0, K_autocall, K_barrier, T, r, sigma, coupon, principal,
+                                                        frequency, barrier_monitoring, coupon_barrier, memory)
+        del z
+        control = np.maximum(K_barrier - S_T, 0)
+        autocall_counts += np.bincount(call_step, minlength=n_steps + 1)
+        path_moments.update(payoffs)
+        distribution.update(payoffs)
+
+        columns = [payoffs, control, *bumped]
+        if antithetic:
+            columns = [0.5 * (column[:chunk] + column[chunk:]) for column in columns]
+        unit_moments.update(*columns)
+
+    return unit_moments, path_moments, autocall_counts, distribution
+
+def _run_round(simulate, root, n_paths, n_workers, params, options):
+    """Simulate one round of n_paths on n_workers fresh streams spawned from root"""
+    streams = root.spawn(n_workers)
+    shares = _split_paths(n_paths, n_workers)
+
+    if n_workers == 1:
+        return [simulate(streams[0], shares[0], *params, **options)]
+
+    pool = _get_process_pool()
+    futures = [pool.submit(simulate, stream, share, *params, **options)
+               for stream, share in zip(streams, shares)]
+    return [future.result() for future in futures]
+
+def _estimate(units, control_mean=None):
+    """Undiscounted estimate and variance of one unit, with the control variate correction if given"""
+    cov = units.covariance()
+    estimate, variance = units.mean[0], cov[0, 0]
+    if control_mean is not None and cov[1, 1] > 0:
+        beta = cov[0, 1] / cov[1, 1]
+        estimate = estimate - beta * (units.mean[1] - control_mean)
+        variance = variance - cov[0, 1]**2 / cov[1, 1]
+    return estimate, max(variance, 0.0)
+
+def _run_monte_carlo(simulate, params, options, n_steps, discount, n_sims, seed, n_workers,
+                     control_mean=None, target_std_error=None, batch_size=5000):
+    """
+    Rounds of simulate() on independent streams until the path budget or the standard error target is met
+
+    simulate(stream, n_paths, *params, **options) returns (unit moments,
+    per-path moments, autocall date histogram, PayoffDistribution or None).
+    Returns the result dict of monte_carlo_autocall(), the merged per-path
+    moments and the merged unit moments.
+    """
+    if target_std_error is not None and not target_std_error > 0:
+        raise ValueError("target_std_error must be positive")
+    n_workers = max(1, min(int(n_workers), n_sims))
+    root = np.random.SeedSequence(seed)
+
+    units, paths, distribution = None, None, None
+    autocall_counts = np.zeros(n_steps + 1, dtype=np.int64)
+    n_round = n_sims if target_std_error is None else min(batch_size, n_sims)
+    while n_round > 0:
+        for unit_moments, path_moments, counts, histogram in _run_round(simulate, root, n_round, n_workers,
+                                                                        params, options):
+            if units is None:
+                units, paths = RunningMoments(len(unit_moments.mean)), RunningMoments(len(path_moments.mean))
+            units.merge(unit_moments)
+            paths.merge(path_moments)
+            autocall_counts += counts
+            if histogram is not None:
+                if distribution is None:
+                    distribution = histogram
+                else:
+                    distribution.merge(histogram)
+
+        estimate, variance = _estimate(units, control_mean)
+        std_error = np.sqrt(variance / units.n) * discount
+        if target_std_error is None or std_error <= target_std_error:
+            break
+
+        # Paths still needed for the target at the current variance estimate
+        needed = int(np.ceil(paths.n * (std_error / target_std_error)**2)) - paths.n
+        n_round = min(max(needed, batch_size), n_sims - paths.n)
+
+    achieved_variance = variance / units.n
+    plain_variance = paths.covariance()[0, 0] / paths.n
+    price = estimate * discount
+    return {
+        "price": price,
+        "std_error": std_error,
+        "ci_lower": price - 1.96 * std_error,
+        "ci_upper": price + 1.96 * std_error,
+        "n_paths": paths.n,
+        "variance_reduction": plain_variance / achieved_variance if achieved_variance > 0 else 1.0,
+        "autocall_probabilities": autocall_counts / autocall_counts.sum(),
+        "payoff_distribution": None if distribution is None else distribution.summary()
+    }, paths, units
+
+def monte_carlo_autocall(S0, K_autocall, K_barrier, T, r, sigma, coupon, principal, frequency,
+                         n_sims=10000, seed=42, n_workers=1, sampler="pseudo",
+                         antithetic=False, control_variate=False,
+                         target_std_error=None, batch_size=5000, max_chunk_mb=64, barrier_monitoring=None,
+                         greeks=False, histogram_bins=50, precision="float64", backend="numpy",
+                         coupon_barrier=None, memory=False):
+    """
+    Monte Carlo simulation for Autocall
+
+    Paths are split across n_workers independent streams spawned from the seed.
+    With n_workers > 1 the streams run on the shared process pool. The result is
+    reproducible for a given (seed, n_workers) pair.
+
+    sampler="sobol" uses scrambled Sobol points with Brownian bridge path
+    construction over the observation grid (randomized quasi-Monte Carlo).
+    antithetic=True simulates (z, -z) path pairs. control_variate=True regresses
+    the payoff on a European put struck at the protection barrier, whose
+    Black-Scholes value is known in closed form.
+
+    With target_std_error set, n_sims becomes a path budget: rounds of at least
+    batch_size paths are simulated until the standard error of the (discounted)
+    price drops below the target. Each round is sized from the variance observed
+    so far, so easy products stop after the first batch.
+
+    Each worker generates its paths in chunks of at most max_chunk_mb, so peak
+    memory stays flat whatever n_sims. precision="float32" generates normals
+    and paths in single precision, halving the memory traffic of the path
+    matrix (chunks hold twice the paths); every average, standard error and
+    Greek is still accumulated in float64. Prices move by a small fraction of
+    the standard error (benchmarks/float32_paths.py).
+
+    barrier_monitoring turns the protection barrier into a knock-in observed
+    continuously (0) or every barrier_monitoring years (1/252: daily), priced
+    on the autocall dates alone with a Brownian bridge crossing correction.
+
+    greeks=True adds the Greeks of the note by bump-and-revalue on common
+    random numbers: the bumped scenarios are priced on the very draws of the
+    price (same chunk, no extra simulation), so the differences are free of
+    independent sampling noise and cost a fraction of a repricing.
+
+    The redemption of every path also feeds a streaming histogram of
+    histogram_bins bins (see PayoffDistribution), in the same pass.
+
+    backend="numba" prices each path in a compiled loop that stops testing at
+    its autocall date, paths in parallel (kernels.py), on the same draws as the
+    NumPy engine: results agree to rounding. Without Numba installed it falls
+    back to "numpy"; the backend that ran is returned.
+
+    Phoenix terms: K_autocall may be a step-down schedule (one level per
+    observation date), coupon_barrier pays the coupon of each observation date
+    at or above it instead of accruing it until the call, and memory=True pays
+    the missed coupons on the next paying date. All are masks over the
+    observation grid, the paths cost the same (see _autocall_redemptions()).
+
+    Returns:
+        dict with price, std_error, 95% confidence interval (ci_lower, ci_upper),
+        n_paths, variance_reduction (variance of plain Monte Carlo with the same
+        number of paths / achieved variance), autocall_probabilities (one
+        entry per observation date, last entry: held to maturity) and
+        payoff_distribution (PayoffDistribution.summary() of the undiscounted
+        redemptions, against the principal) and backend. With greeks=True
+        also greeks (delta, gamma per unit of spot, vega per vol point, theta
+        per day, for the whole note) and greeks_std_error
+    """
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler '{sampler}' (expected one of {SAMPLERS})")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}' (expected one of {PRECISIONS})")
+    if barrier_monitoring is not None and barrier_monitoring < 0:
+        raise ValueError("barrier_monitoring must be >= 0 (0: continuous) or None")
+    backend = resolve_backend(backend)
+    _check_autocall_schedule(K_autocall, int(T / frequency))
+
+    params = (S0, K_autocall, K_barrier, T, r, sigma, coupon, principal, frequency)
+    options = {"sampler": sampler, "antithetic": antithetic, "max_chunk_mb": max_chunk_mb,
+               "barrier_monitoring": barrier_monitoring, "greeks": greeks, "histogram_bins": histogram_bins,
+               "precision": precision, "backend": backend, "coupon_barrier": coupon_barrier, "memory": memory}
+
+    control_mean = None
+    if control_variate:
+        # Closed-form value of the control on the simulated grid (undiscounted)
+        T_grid = int(T / frequency) * frequency
+        control_mean = black_scholes_put(S0, K_barrier, T_grid, r, sigma) * np.exp(r * T_grid)
+
+    result, _, units = _run_monte_carlo(_simulate_autocall, params, options, int(T / frequency), np.exp(-r * T),
+                                        n_sims, seed, n_workers, control_mean, target_std_error, batch_size)
+    result["backend"] = backend
+    if greeks:
+        vol_points = (sigma + _VOL_BUMP - max(sigma - _VOL_BUMP, 1e-4)) / 0.01
+        result["greeks"], result["greeks_std_error"] = _bump_greeks(units, S0, vol_points, np.exp(-r * T))
+    return result
+
+def _bump_greeks(units, S0, vol_points, discount):
+    """
+    Finite-difference Greeks from the unit means (columns: price, control, spot up,
+    spot down, vol up, vol down, one day later) and their standard errors
+
+    vol_points is the distance between the two volatility scenarios, in vol points.
+    """
+    h = _SPOT_BUMP * S0
+    weights = {
+        "delta": np.array([0, 0, 1, -1, 0, 0, 0]) / (2 * h),
+        "gamma": np.array([-2, 0, 1, 1, 0, 0, 0]) / h**2,
+        "vega": np.array([0, 0, 0, 0, 1, -1, 0]) / vol_points,
+        "theta": np.array([-1, 0, 0, 0, 0, 0, 1])
+    }
+    cov = units.covariance()
+    estimates = {key: float(w @ units.mean * discount) for key, w in weights.items()}
+    std_errors = {key: float(np.sqrt(max(w @ cov @ w, 0.0) / units.n) * discount) for key, w in weights.items()}
+    return estimates, std_errors
+
+def monte_carlo_autocall_scenarios(spots, vols, maturities, rates, S_ref, K_autocall, K_barrier,
+                                   coupon, principal, frequency, n_sims=10000, seed=42,
+                                   sampler="pseudo", antithetic=False, max_chunk_mb=64, greeks=False):
+    """
+    Autocall prices on a spot x volatility x maturity x rate grid with common random numbers
+
+    One set of normal increments, drawn for the longest maturity, is shared by
+    every scenario point: shorter maturities use its first observation dates and
+    the spot only shifts the log barriers. Strikes and the initial fixing S_ref
+    stay where they were set, so the grid shows how the issued product reprices.
+    Because all points see the same draws, differences between neighbouring
+    points carry far less noise than independent pricings.
+
+    Each chunk is priced on the whole grid in one broadcast pass: one log path
+    per (volatility, rate) pair, whose running maximum serves every maturity
+    (a shorter one stops counting at its last date) and every spot.
+
+    greeks=True adds the note's delta and gamma at every point, from spots
+    bumped by _SPOT_BUMP on the same draws: a wider spot axis, not extra passes.
+
+    Returns:
+        dict with price and std_error arrays of shape
+        (len(spots), len(vols), len(maturities), len(rates)), n_paths and,
+        with greeks=True, delta and gamma arrays of the same shape
+    """
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler '{sampler}' (expected one of {SAMPLERS})")
+
+    spots, vols, maturities, rates = (np.atleast_1d(np.asarray(a, dtype=float))
+                                      for a in (spots, vols, maturities, rates))
+    n_spots = len(spots)
+    if greeks:
+        # Bumped spots priced alongside: [spots, spots up, spots down]
+        spots = np.concatenate([spots, spots * (1 + _SPOT_BUMP), spots * (1 - _SPOT_BUMP)])
+    shape = (len(spots), len(vols), len(maturities), len(rates))
+    dt = frequency
+    n_max = int(maturities.max() / frequency)
+
+    # Same stream as a single-worker monte_carlo_autocall() with this seed
+    rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+    sobol = qmc.Sobol(d=n_max, scramble=True, seed=rng) if sampler == "sobol" and n_max > 0 else None
+    n_units = (n_sims + 1) // 2 if antithetic else n_sims
+    rows_per_unit = 2 if antithetic else 1
+
+    # Grid axes broadcast as (spots, vols, maturities, rates, paths)
+    spot_grid = spots[:, None, None, None, None]
+    T_grid = maturities[None, None, :, None, None]
+    r_grid = rates[None, None, None, :, None]
+    n_steps = (maturities / frequency).astype(int)
+    n_steps_grid = n_steps[None, None, :, None, None]
+    matured = principal * (1 + coupon * T_grid)
+    discount = np.exp(-r_grid * T_grid)
+    # Autocall condition S * exp(X_k) >= K_autocall, i.e. X_k >= ln(K_autocall / S)
+    log_autocall = np.log(K_autocall / spots)[:, None, None, None, None]
+    sigma = vols[:, None, None, None]
+    rate = rates[None, :, None, None]
+    steps = np.arange(1, n_max + 1)
+
+    # Per-point running mean and M2 (Chan et al. merge across chunks)
+    n_done = 0
+    mean = np.zeros(shape)
+    m2 = np.zeros(shape)
+    # Cumulated draws, then per (vol, rate) pair a log path, its running max and one comparison
+    # per spot for each step, plus the payoff arrays of every grid point spread over the steps
+    n_pairs = len(vols) * len(rates)
+    n_points = int(np.prod(shape))
+    path_bytes = 8 + n_pairs * (16 + len(spots)) + int(np.ceil(8 * (n_pairs * len(spots) + 5 * n_points) / max(n_max, 1)))
+    for chunk in _chunk_sizes(n_units, rows_per_unit, n_max, sampler, max_chunk_mb, path_bytes):
+        z = _standard_normals(rng, sobol, chunk, n_max)
+        if antithetic:
+            z = np.concatenate([z, -z])
+        W = np.cumsum(z, axis=1)
+        del z
+
+        # Log paths of every (vol, rate) pair on the shared draws: (vols, rates, paths, dates)
+        X = sigma * np.sqrt(dt) * W + (rate - 0.5 * sigma**2) * dt * steps
+        del W
+        running_max = np.maximum.accumulate(X, axis=-1) if n_max > 0 else X
+        # Dates before the first hit up to the longest maturity; a shorter maturity stops at its
+        # last date (the running max only grows, so the count is min(first hit, n_steps))
+        first_hit = np.minimum((running_max[None] < log_autocall).sum(axis=-1)[:, :, None], n_steps_grid)
+        del running_max
+        # S_T / S on each maturity's last date (X = 0 before the first one)
+        X = np.concatenate([np.zeros(X.shape[:-1] + (1,)), X], axis=-1)
+        S_T = spot_grid * np.exp(np.moveaxis(X[..., n_steps], -1, 1))[None]
+        del X
+
+        final_payoff = np.where(S_T >= K_barrier, matured, principal * (S_T / S_ref))
+        payoffs = np.where(first_hit < n_steps_grid, principal * (1 + coupon * (first_hit + 1) * dt),
+                           final_payoff) * discount
+        if antithetic:
+            payoffs = 0.5 * (payoffs[..., :chunk] + payoffs[..., chunk:])
+
+        chunk_mean = payoffs.mean(axis=-1)
+        chunk_m2 = ((payoffs - chunk_mean[..., None])**2).sum(axis=-1)
+
+        n_total = n_done + chunk
+        delta = chunk_mean - mean
+        m2 += chunk_m2 + delta**2 * n_done * chunk / n_total
+        mean += delta * chunk / n_total
+        n_done = n_total
+
+    std_error = np.sqrt(m2 / max(n_done - 1, 1) / n_done)
+    result = {"price": mean[:n_spots], "std_error": std_error[:n_spots], "n_paths": n_done * rows_per_unit}
+    if greeks:
+        price, up, down = mean[:n_spots], mean[n_spots:2 * n_spots], mean[2 * n_spots:]
+        h = (_SPOT_BUMP * spots[:n_spots])[:, None, None, None]
+        result["delta"] = (up - down) / (2 * h)
+        result["gamma"] = (up - 2 * price + down) / h**2
+    return result
+
+# ==================== WORST-OF BASKETS ====================
+
+# Correlated copy of the normals and cumulated log performances, per asset and date
+_BASKET_BYTES_PER_STEP = 16
+
+def correlation_factor(correlation) -> np.ndarray:
+    """
+    Matrix L with L @ L.T = correlation (Cholesky, eigen-decomposition if only semi-definite)
+
+    Raises ValueError if the matrix is not a valid correlation matrix.
+    """
+    correlation = np.asarray(correlation, dtype=float)
+    if correlation.ndim != 2 or correlation.shape[0] != correlation.shape[1]:
+        raise ValueError("correlation must be a square matrix")
+    if not np.allclose(correlation, correlation.T) or not np.allclose(np.diag(correlation), 1):
+        raise ValueError("correlation must be symmetric with a unit diagonal")
+    try:
+        return np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        # Perfectly correlated assets: semi-definite, factor from the eigenvectors
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        if eigenvalues.min() < -1e-8:
+            raise ValueError("correlation matrix is not positive semi-definite")
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+def _worst_of_payoffs(z, vols, factor, autocall_level, barrier_level, T, r, coupon, principal, frequency):
+    """
+    Worst-of autocall payoffs for normals z of shape (n_paths, n_steps, n_assets)
+
+    Levels are fractions of the initial fixing of each asset. Returns payoffs,
+    worst terminal performance and the autocall step of each path.
+    """
+    n_paths, n_steps, _ = z.shape
+    dt = frequency
+
+    # Correlated, scaled shocks in one matmul: (z @ L.T) * sigma * sqrt(dt)
+    log_performance = z @ (factor.T * (vols * np.sqrt(dt)))
+    log_performance += (r - 0.5 * vols**2) * dt
+    np.cumsum(log_performance, axis=1, out=log_performance)
+    worst = log_performance.min(axis=2)
+
+    # First observation date where every asset is above the autocall level
+    hit = worst >= np.log(autocall_level)
+    autocalled = hit.any(axis=1)
+    first_hit = hit.argmax(axis=1) if n_steps > 0 else np.zeros(n_paths, dtype=int)
+    autocall_payoff = principal * (1 + coupon * (first_hit + 1) * dt)
+
+    worst_T = np.exp(worst[:, -1]) if n_steps > 0 else np.ones(n_paths)
+    final_payoff = np.where(worst_T >= barrier_level, principal * (1 + coupon * T), principal * worst_T)
+
+    call_step = np.where(autocalled, first_hit, n_steps)
+    return np.where(autocalled, autocall_payoff, final_payoff), worst_T, call_step
+
+def _simulate_worst_of(seed_seq, n_paths, vols, factor, autocall_level, barrier_level, T, r, coupon, principal,
+                       frequency, sampler="pseudo", antithetic=False, max_chunk_mb=64, histogram_bins=50):
+    """
+    Simulate n_paths worst-of autocall payoffs on an independent random stream
+
+    Same chunking and outputs as _simulate_autocall(), without control column.
+    The per-path moments carry a second column, the loss indicator
+    (redemption below principal).
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_steps = int(T / frequency)
+    n_assets = len(vols)
+    n_units = (n_paths + 1) // 2 if antithetic else n_paths
+    rows_per_unit = 2 if antithetic else 1
+
+    n_dims = n_steps * n_assets
+    sobol = qmc.Sobol(d=n_dims, scramble=True, seed=rng) if sampler == "sobol" and n_dims > 0 else None
+
+    unit_moments, path_moments = RunningMoments(1), RunningMoments(2)
+    autocall_counts = np.zeros(n_steps + 1, dtype=np.int64)
+    distribution = PayoffDistribution(0.0, principal * (1 + coupon * T), principal, histogram_bins)
+    for chunk in _chunk_sizes(n_units, rows_per_unit, n_dims, sampler, max_chunk_mb, _BASKET_BYTES_PER_STEP):
+        z = _standard_normals(rng, sobol, chunk, n_steps, n_assets).reshape(chunk, n_steps, n_assets)
+        if antithetic:
+            z = np.concatenate([z, -z])
+        payoffs, _, call_step = _worst_of_payoffs(z, vols, factor, autocall_level, barrier_level,
+                                                  T, r, coupon, principal, frequency)
+        del z
+        autocall_counts += np.bincount(call_step, minlength=n_steps + 1)
+        path_moments.update(payoffs, payoffs < principal)
+        distribution.update(payoffs)
+
+        if antithetic:
+            payoffs = 0.5 * (payoffs[:chunk] + payoffs[chunk:])
+        unit_moments.update(payoffs)
+
+    return unit_moments, path_moments, autocall_counts, distribution
+
+def monte_carlo_worst_of_autocall(vols, correlation, autocall_level, barrier_level, T, r, coupon, principal,
+                                  frequency, n_sims=10000, seed=42, n_workers=1, sampler="pseudo",
+                                  antithetic=False, target_std_error=None, batch_size=5000, max_chunk_mb=64,
+                                  histogram_bins=50):
+    """
+    Monte Carlo simulation for a worst-of Autocall on a basket of correlated assets
+
+    Each asset follows its own GBM, correlated through the factor of the
+    correlation matrix. The product autocalls on the first observation date
+    where the worst performance is at or above autocall_level and, at
+    maturity, pays principal * worst performance if it ends below
+    barrier_level (levels as fractions of the initial fixings). With a single
+    asset this is monte_carlo_autocall() with strikes as fractions of S0.
+
+    Workers, samplers, antithetic pairs, adaptive stopping and chunking work
+    as in monte_carlo_autocall(); the European put control variate has no
+    basket counterpart.
+
+    Returns:
+        dict with the monte_carlo_autocall() outputs (payoff_distribution
+        included) plus loss_probability (risk-neutral probability of
+        redeeming below principal)
+    """
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler '{sampler}' (expected one of {SAMPLERS})")
+
+    vols = np.atleast_1d(np.asarray(vols, dtype=float))
+    factor = correlation_factor(correlation)
+    if factor.shape[0] != len(vols):
+        raise ValueError(f"correlation is {factor.shape[0]}x{factor.shape[0]} for {len(vols)} assets")
+
+    params = (vols, factor, autocall_level, barrier_level, T, r, coupon, principal, frequency)
+    options = {"sampler": sampler, "antithetic": antithetic, "max_chunk_mb": max_chunk_mb,
+               "histogram_bins": histogram_bins}
+    result, paths, _ = _run_monte_carlo(_simulate_worst_of, params, options, int(T / frequency), np.exp(-r * T),
+                                     n_sims, seed, n_workers, None, target_std_error, batch_size)
+    result["loss_probability"] = paths.mean[1]
+    return result
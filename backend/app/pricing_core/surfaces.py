@@ -0,0 +1,240 @@
+"""
+Precomputed vanilla pricing surfaces
+Prix et Greeks Black-Scholes normalisés, interpolés sur une grille dense
+
+Divided by the discounted strike, a vanilla option only depends on the forward
+log-moneyness k = ln(S e^rT / K) and the total volatility v = sigma * sqrt(T)
+(Black's formula), so rate and maturity do not need their own grid axes.
+The grid uses standardized moneyness u = k / v and ln v, where every stored
+field is smooth, and holds:
+
+    otm     out-of-the-money normalized price (call if u <= 0, put otherwise),
+            bounded by 1; the other side follows from put-call parity
+    cdf_d1  N(d1)
+    pdf_d1  n(d1), normal density
+    cdf_d2  N(d2)
+"""
+
+import math
+import os
+import numpy as np
+from scipy.stats import norm
+from app.pricing_core.black_scholes import _as_arrays, black_scholes
+
+FIELDS = ("otm", "cdf_d1", "pdf_d1", "cdf_d2")
+# Measured interpolation errors: one per field, then the OTM price error relative to the price
+ERROR_FIELDS = FIELDS + ("otm_relative",)
+
+def _normalized_fields(u, v):
+    """Exact normalized quantities at standardized moneyness u and total volatility v"""
+    d1 = u + 0.5 * v
+    d2 = u - 0.5 * v
+    forward_moneyness = np.exp(u * v)
+    cdf_d1 = norm.cdf(d1)
+    cdf_d2 = norm.cdf(d2)
+    otm = np.where(u <= 0,
+                   forward_moneyness * cdf_d1 - cdf_d2,
+                   (1 - cdf_d2) - forward_moneyness * (1 - cdf_d1))
+    pdf_d1 = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi)
+    return np.stack([otm, cdf_d1, pdf_d1, cdf_d2], axis=-1)
+
+
+class VanillaSurface:
+    """
+    Bilinear interpolation of normalized Black-Scholes quantities on a (u, ln v) grid
+
+    Both axes are uniform so locating a point is O(1), and all fields are
+    gathered together. max_error holds the largest interpolation error of each
+    field measured at every cell center when the surface was built (units of
+    discounted strike for otm, probability/density units otherwise), and
+    otm_relative the largest error of the OTM price relative to that price,
+    which bounds deep out-of-the-money quotes the absolute error does not.
+    """
+
+    def __init__(self, u_axis: tuple, log_v_axis: tuple, values: np.ndarray, max_error: dict):
+        self.u_axis = u_axis  # (start, step, n)
+        self.log_v_axis = log_v_axis  # (start, step, n)
+        self.values = np.ascontiguousarray(values, dtype=float)  # shape (n_u, n_v, len(FIELDS))
+        self.max_error = max_error
+        # Zero-copy flat view: indexing it returns Python floats without NumPy dispatch
+        self._cells = memoryview(self.values.reshape(-1))
+
+    # ==================== BUILD / PERSIST ====================
+
+    @classmethod
+    def build(cls, u_range=(-6.0, 6.0), n_u=1201, v_range=(0.01, 2.5), n_v=401) -> "VanillaSurface":
+        """Evaluate the exact formulas on the grid and measure the interpolation error at cell centers"""
+        u_grid = np.linspace(u_range[0], u_range[1], n_u)
+        log_v_grid = np.linspace(np.log(v_range[0]), np.log(v_range[1]), n_v)
+        u_axis = (float(u_grid[0]), float(u_grid[1] - u_grid[0]), n_u)
+        log_v_axis = (float(log_v_grid[0]), float(log_v_grid[1] - log_v_grid[0]), n_v)
+
+        U, L = np.meshgrid(u_grid, log_v_grid, indexing="ij")
+        surface = cls(u_axis, log_v_axis, _normalized_fields(U, np.exp(L)), max_error={})
+
+        # Cell centers are where bilinear interpolation is least accurate
+        U_c, L_c = np.meshgrid(0.5 * (u_grid[1:] + u_grid[:-1]),
+                               0.5 * (log_v_grid[1:] + log_v_grid[:-1]), indexing="ij")
+        exact = _normalized_fields(U_c.ravel(), np.exp(L_c.ravel()))
+        errors = np.abs(surface._interpolate(U_c.ravel(), L_c.ravel()) - exact)
+        relative = errors[:, 0] / np.maximum(exact[:, 0], np.finfo(float).tiny)
+        surface.max_error = dict(zip(ERROR_FIELDS, [*errors.max(axis=0).tolist(), float(relative.max())]))
+        return surface
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            u_axis=np.array(self.u_axis),
+            log_v_axis=np.array(self.log_v_axis),
+            max_error=np.array([self.max_error[field] for field in ERROR_FIELDS]),
+            values=self.values
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "VanillaSurface":
+        with np.load(path) as data:
+            u_axis = (float(data["u_axis"][0]), float(data["u_axis"][1]), int(data["u_axis"][2]))
+            log_v_axis = (float(data["log_v_axis"][0]), float(data["log_v_axis"][1]), int(data["log_v_axis"][2]))
+            max_error = dict(zip(ERROR_FIELDS, data["max_error"].tolist()))
+            values = data["values"]
+        return cls(u_axis, log_v_axis, values, max_error)
+
+    # ==================== EVALUATION ====================
+
+    def _locate(self, values, axis):
+        start, step, n = axis
+        position = (values - start) / step
+        index = np.clip(np.floor(position).astype(int), 0, n - 2)
+        return index, position - index
+
+    def contains(self, u, log_v) -> np.ndarray:
+        """Mask of points inside the grid"""
+        inside = np.ones(np.shape(u), dtype=bool)
+        for values, (start, step, n) in ((u, self.u_axis), (log_v, self.log_v_axis)):
+            inside &= (values >= start) & (values <= start + step * (n - 1))
+        return inside
+
+    def _interpolate(self, u, log_v) -> np.ndarray:
+        """Bilinear interpolation of every field, shape (n_points, len(FIELDS))"""
+        i, wu = self._locate(u, self.u_axis)
+        j, wv = self._locate(log_v, self.log_v_axis)
+        n_v = self.log_v_axis[2]
+        flat = self.values.reshape(-1, len(FIELDS))
+        corner = i * n_v + j
+        wu, wv = wu[:, None], wv[:, None]
+        low = flat[corner] * (1 - wu) + flat[corner + n_v] * wu
+        high = flat[corner + 1] * (1 - wu) + flat[corner + n_v + 1] * wu
+        return low * (1 - wv) + high * wv
+
+    def evaluate(self, S, K, T, r, sigma, option_type="call") -> dict:
+        """
+        Same outputs as black_scholes(), interpolated from the surface
+
+        Points outside the grid (or already expired) are priced with the exact kernel.
+        """
+        S, K, T, r, sigma = _as_arrays(S, K, T, r, sigma)
+        option_type = np.asarray(option_type, dtype=str)
+        if option_type.ndim == 0:
+            is_call = np.full(S.shape, str(option_type).lower() == "call")
+        else:
+            is_call = np.broadcast_to(np.char.lower(option_type) == "call", S.shape)
+        live = T > 0
+        T_live = np.where(live, T, 1.0)
+        sqrt_T = np.sqrt(T_live)
+        v = sigma * sqrt_T
+        u = (np.log(S / K) + r * T_live) / v
+        inside = live & self.contains(u, np.log(v))
+
+        result = {key: np.empty(S.shape) for key in ("price", "delta", "gamma", "vega", "theta", "prob_itm")}
+        outside = ~inside
+        if outside.any():
+            exact = black_scholes(S[outside], K[outside], T[outside], r[outside], sigma[outside],
+                                  np.where(is_call[outside], "call", "put"))
+            for key, value in exact.items():
+                result[key][outside] = value
+
+        s, k, t, rate, vol, call = (a[inside] for a in (S, K, T, r, sigma, is_call))
+        otm, cdf_d1, pdf_d1, cdf_d2 = self._interpolate(u[inside], np.log(v[inside])).T
+        sqrt_t = sqrt_T[inside]
+
+        # Put-call parity on the OTM price: C - P = S - K e^-rT
+        discounted_k = k * np.exp(-rate * t)
+        forward_gap = s - discounted_k
+        otm_price = discounted_k * otm
+        call_price = np.where(u[inside] <= 0, otm_price, otm_price + forward_gap)
+        decay = -(s * pdf_d1 * vol) / (2 * sqrt_t)
+
+        result["price"][inside] = np.where(call, call_price, call_price - forward_gap)
+        result["delta"][inside] = np.where(call, cdf_d1, cdf_d1 - 1)
+        result["gamma"][inside] = pdf_d1 / (s * vol * sqrt_t)
+        result["vega"][inside] = s * pdf_d1 * sqrt_t / 100
+        result["theta"][inside] = np.where(call, decay - rate * discounted_k * cdf_d2,
+                                           decay + rate * discounted_k * (1 - cdf_d2)) / 365
+        result["prob_itm"][inside] = np.where(call, cdf_d2, 1 - cdf_d2)
+        return {key: value[()] for key, value in result.items()}
+
+    def quote(self, S: float, K: float, T: float, r: float, sigma: float, option_type: str = "call") -> dict:
+        """
+        Scalar fast path of evaluate() for interactive quotes (plain floats, no NumPy dispatch)
+        """
+        if T <= 0 or sigma <= 0:
+            return {key: float(value) for key, value in black_scholes(S, K, T, r, sigma, option_type).items()}
+
+        sqrt_T = math.sqrt(T)
+        v = sigma * sqrt_T
+        u = (math.log(S / K) + r * T) / v
+        u_start, u_step, n_u = self.u_axis
+        v_start, v_step, n_v = self.log_v_axis
+        position_u = (u - u_start) / u_step
+        position_v = (math.log(v) - v_start) / v_step
+        if not (0 <= position_u <= n_u - 1 and 0 <= position_v <= n_v - 1):
+            return {key: float(value) for key, value in black_scholes(S, K, T, r, sigma, option_type).items()}
+
+        i = min(int(position_u), n_u - 2)
+        j = min(int(position_v), n_v - 2)
+        wu = position_u - i
+        wv = position_v - j
+        n_fields = len(FIELDS)
+        cells = self._cells
+        corner = (i * n_v + j) * n_fields
+        row = n_v * n_fields
+        otm, cdf_d1, pdf_d1, cdf_d2 = (
+            (cells[corner + f] * (1 - wu) + cells[corner + row + f] * wu) * (1 - wv)
+            + (cells[corner + n_fields + f] * (1 - wu) + cells[corner + row + n_fields + f] * wu) * wv
+            for f in range(n_fields)
+        )
+
+        # Put-call parity on the OTM price: C - P = S - K e^-rT
+        discounted_K = K * math.exp(-r * T)
+        forward_gap = S - discounted_K
+        call_price = discounted_K * otm + (forward_gap if u > 0 else 0.0)
+        decay = -(S * pdf_d1 * sigma) / (2 * sqrt_T)
+        if option_type.lower() == "call":
+            return {
+                "price": call_price, "delta": cdf_d1,
+                "gamma": pdf_d1 / (S * v), "vega": S * pdf_d1 * sqrt_T / 100,
+                "theta": (decay - r * discounted_K * cdf_d2) / 365, "prob_itm": cdf_d2
+            }
+        return {
+            "price": call_price - forward_gap, "delta": cdf_d1 - 1,
+            "gamma": pdf_d1 / (S * v), "vega": S * pdf_d1 * sqrt_T / 100,
+            "theta": (decay + r * discounted_K * (1 - cdf_d2)) / 365, "prob_itm": 1 - cdf_d2
+        }
+
+
+# ==================== SHARED INSTANCE ====================
+
+_surface = None
+
+def get_vanilla_surface(path: str = "") -> VanillaSurface:
+    """Load the surface from path if it exists and is complete, otherwise build it (and cache it to path)"""
+    global _surface
+    if _surface is None:
+        if path and os.path.exists(path):
+            _surface = VanillaSurface.load(path)
+        if _surface is None or set(_surface.max_error) != set(ERROR_FIELDS):
+            # Missing or saved without every error measure: rebuild
+            _surface = VanillaSurface.build()
+            if path:
+                _surface.save(path)
+    return _surface
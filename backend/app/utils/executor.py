@@ -0,0 +1,139 @@
+"""
+Executors for CPU-bound work
+Exécute les calculs de pricing hors de la boucle asyncio (thread pool ou process pool)
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict
+from app.config import settings
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a pool already holds its maximum number of pending tasks"""
+
+
+def _timed_call(fn, args, kwargs):
+    """Run fn in the worker and measure how long it kept the worker busy"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a bounded queue and utilization counters
+
+    Tasks are submitted from the event loop with `await executor.run(fn, ...)`.
+    At most max_workers tasks run at once and at most max_queue more may wait;
+    beyond that new tasks are rejected with ExecutorSaturated.
+    With kind="process", fn and its arguments must be picklable.
+    """
+
+    def __init__(self, name: str, kind: str = "thread", max_workers: int = 4, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind '{kind}' (expected 'thread' or 'process')")
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+
+        self._started_at = time.monotonic()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+        self._wait_seconds = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and await its result"""
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise ExecutorSaturated(
+                f"Executor '{self.name}' saturated ({self._in_flight} tasks pending)"
+            )
+
+        self._in_flight += 1
+        self._submitted += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        submitted_at = time.perf_counter()
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, busy = await loop.run_in_executor(self._pool, _timed_call, fn, args, kwargs)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        self._completed += 1
+        self._busy_seconds += busy
+        self._wait_seconds += max(0.0, time.perf_counter() - submitted_at - busy)
+        return result
+
+    def stats(self) -> dict:
+        """Utilization statistics since the pool was created"""
+        uptime = time.monotonic() - self._started_at
+        capacity = uptime * self.max_workers
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self.max_workers),
+            "peak_in_flight": self._peak_in_flight,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "busy_seconds": round(self._busy_seconds, 4),
+            "utilization": round(self._busy_seconds / capacity, 4) if capacity > 0 else 0.0,
+            "avg_task_ms": round(self._busy_seconds / self._completed * 1000, 3) if self._completed else 0.0,
+            "avg_wait_ms": round(self._wait_seconds / self._completed * 1000, 3) if self._completed else 0.0,
+            "uptime_seconds": round(uptime, 1)
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+# ==================== POOLS ====================
+
+_executors: Dict[str, BoundedExecutor] = {}
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Get a named pool ("pricing" or "product_builder"), created from settings on first use"""
+    if name not in _executors:
+        workers = {
+            "pricing": settings.PRICING_EXECUTOR_WORKERS,
+            "product_builder": settings.PRODUCT_BUILDER_EXECUTOR_WORKERS,
+        }
+        if name not in workers:
+            raise ValueError(f"Unknown executor '{name}'")
+        _executors[name] = BoundedExecutor(
+            name=name,
+            kind=settings.EXECUTOR_KIND,
+            max_workers=workers[name],
+            max_queue=settings.EXECUTOR_MAX_QUEUE
+        )
+    return _executors[name]
+
+def executor_stats() -> Dict[str, dict]:
+    """Utilization statistics for every pool created so far"""
+    return {name: executor.stats() for name, executor in _executors.items()}
@@ -0,0 +1,140 @@
+"""
+Pricing result cache
+Cache LRU avec TTL et plafond mémoire, indexé par un hash canonique des entrées normalisées
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from pydantic import BaseModel
+from app.config import settings
+
+
+def _quantize(value: float, step: float) -> float:
+    """Round value to the nearest multiple of step (float noise removed)"""
+    if step <= 0:
+        return value
+    return round(round(value / step) * step, 10)
+
+
+class PricingCache:
+    """
+    LRU cache of pricing outputs
+
+    Entries expire after ttl_seconds. The least recently used entries are
+    evicted once max_entries or max_bytes (size of the serialized outputs)
+    is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 32 * 2**20, ttl_seconds: float = 300,
+                 spot_tolerance: float = 0.01, vol_tolerance: float = 0.0001):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.spot_tolerance = spot_tolerance
+        self.vol_tolerance = vol_tolerance
+
+        self._entries = OrderedDict()  # key -> (expires_at, size, output)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def normalize(self, input_data: BaseModel) -> BaseModel:
+        """Copy of the input with spot and volatility on the tolerance grid and text fields canonicalized"""
+        update = {}
+        if getattr(input_data, "spot_price", None) is not None:
+            update["spot_price"] = _quantize(input_data.spot_price, self.spot_tolerance)
+        if getattr(input_data, "volatility", None) is not None:
+            update["volatility"] = _quantize(input_data.volatility, self.vol_tolerance)
+        if getattr(input_data, "volatilities", None) is not None:
+            update["volatilities"] = [_quantize(vol, self.vol_tolerance) for vol in input_data.volatilities]
+        if hasattr(input_data, "ticker"):
+            update["ticker"] = input_data.ticker.strip().upper()
+        if hasattr(input_data, "tickers"):
+            update["tickers"] = [ticker.strip().upper() for ticker in input_data.tickers]
+        if hasattr(input_data, "warrant_type"):
+            update["warrant_type"] = input_data.warrant_type.strip().lower()
+        return input_data.model_copy(update=update)
+
+    @staticmethod
+    def make_key(product: str, normalized: BaseModel) -> str:
+        """Canonical hash of a normalized input"""
+        payload = json.dumps({"product": product, "inputs": normalized.model_dump()}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[BaseModel]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, size, output = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return output
+
+    def set(self, key: str, output: BaseModel) -> None:
+        size = len(key) + len(output.model_dump_json())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, output)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        """Hit/miss metrics and current footprint"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+pricing_cache = PricingCache(
+    max_entries=settings.PRICING_CACHE_MAX_ENTRIES,
+    max_bytes=int(settings.PRICING_CACHE_MAX_MB * 2**20),
+    ttl_seconds=settings.PRICING_CACHE_TTL_SECONDS,
+    spot_tolerance=settings.PRICING_CACHE_SPOT_TOLERANCE,
+    vol_tolerance=settings.PRICING_CACHE_VOL_TOLERANCE
+)
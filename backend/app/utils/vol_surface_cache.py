@@ -0,0 +1,179 @@
+"""
+Implied volatility surface cache
+Une surface par ticker, construite à partir de la chaîne d'options et conservée une journée
+"""
+
+import threading
+import time
+from datetime import date
+from functools import partial
+from typing import Callable, Optional
+import numpy as np
+import yfinance as yf
+from app.config import settings
+from app.pricing_core.heston import calibrate_heston
+from app.pricing_core.implied_vol import ImpliedVolSurface
+
+
+def load_option_chain(ticker: str, max_expiries: int = 12) -> dict:
+    """
+    Listed option chain of a ticker from yfinance
+
+    Mid quotes when both sides are quoted, last trade otherwise. Returns a dict
+    with spot and flat arrays of maturities (years), strikes, prices and option_types.
+    """
+    stock = yf.Ticker(ticker)
+    hist = stock.history(period="5d")
+    if hist.empty:
+        raise ValueError(f"No price history for {ticker}")
+    spot = float(hist["Close"].iloc[-1])
+
+    today = date.today()
+    maturities, strikes, prices, option_types = [], [], [], []
+    for expiry in stock.options[:max_expiries]:
+        T = (date.fromisoformat(expiry) - today).days / 365
+        if T <= 0:
+            continue
+        chain = stock.option_chain(expiry)
+        for frame, option_type in ((chain.calls, "call"), (chain.puts, "put")):
+            bid, ask = frame["bid"].to_numpy(float), frame["ask"].to_numpy(float)
+            mid = np.where((bid > 0) & (ask > 0), 0.5 * (bid + ask), frame["lastPrice"].to_numpy(float))
+            quoted = np.isfinite(mid) & (mid > 0)
+            strikes.append(frame["strike"].to_numpy(float)[quoted])
+            prices.append(mid[quoted])
+            maturities.append(np.full(quoted.sum(), T))
+            option_types.append(np.full(quoted.sum(), option_type))
+
+    if not strikes:
+        raise ValueError(f"No listed options for {ticker}")
+    return {
+        "spot": spot,
+        "maturities": np.concatenate(maturities),
+        "strikes": np.concatenate(strikes),
+        "prices": np.concatenate(prices),
+        "option_types": np.concatenate(option_types)
+    }
+
+
+class VolSurfaceCache:
+    """
+    Implied volatility surfaces keyed by ticker
+
+    A surface is built on first use from the chain returned by loader(ticker),
+    inverted in one vectorized pass, then served until it is ttl_seconds old
+    (one day by default). Concurrent requests for the same ticker wait for a
+    single build, and a ticker whose build failed is not retried before
+    retry_seconds. Heston parameters calibrated to a surface are kept with it.
+    """
+
+    def __init__(self, loader: Callable[[str], dict] = load_option_chain, rate: float = 0.04,
+                 ttl_seconds: float = 86400, retry_seconds: float = 300):
+        self.loader = loader
+        self.rate = rate
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+
+        self._surfaces = {}  # ticker -> (expires_at, surface)
+        self._heston = {}  # ticker -> (surface, calibrated parameters)
+        self._failed = {}  # ticker -> retry_at
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._builds = 0
+        self._failures = 0
+
+    def get(self, ticker: str) -> ImpliedVolSurface:
+        """Cached surface of ticker, built if missing or expired (ValueError if no usable chain)"""
+        ticker = ticker.strip().upper()
+        with self._lock:
+            surface = self._fresh(ticker)
+            if surface is not None:
+                self._hits += 1
+                return surface
+            build_lock = self._locks.setdefault(ticker, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                surface = self._fresh(ticker)
+                if surface is not None:
+                    self._hits += 1
+                    return surface
+                if self._failed.get(ticker, 0) > time.monotonic():
+                    raise ValueError(f"No implied volatility surface for {ticker} (last build failed)")
+            try:
+                chain = self.loader(ticker)
+                surface = ImpliedVolSurface.from_quotes(chain["spot"], self.rate, chain["maturities"],
+                                                        chain["strikes"], chain["prices"], chain["option_types"])
+            except Exception:
+                with self._lock:
+                    self._failures += 1
+                    self._failed[ticker] = time.monotonic() + self.retry_seconds
+                raise
+            with self._lock:
+                self._surfaces[ticker] = (time.monotonic() + self.ttl_seconds, surface)
+                self._builds += 1
+            return surface
+
+    def volatility(self, ticker: str, moneyness, T) -> Optional[float]:
+        """Smile-consistent volatility at strike moneyness K/S and maturity T, None if no surface can be built"""
+        try:
+            return float(self.get(ticker).volatility(moneyness, T))
+        except Exception:
+            return None
+
+    def heston(self, ticker: str, max_maturity: float = 5.0) -> Optional[dict]:
+        """Heston parameters calibrated to the ticker's current surface (once per surface), None if unavailable"""
+        try:
+            surface = self.get(ticker)
+        except Exception:
+            return None
+        ticker = ticker.strip().upper()
+        with self._lock:
+            build_lock = self._locks.setdefault(ticker, threading.Lock())
+        with build_lock:
+            entry = self._heston.get(ticker)
+            if entry is not None and entry[0] is surface:
+                return entry[1]
+            try:
+                parameters = calibrate_heston(surface, max_maturity=max_maturity)
+            except Exception:
+                return None
+            with self._lock:
+                self._heston[ticker] = (surface, parameters)
+            return parameters
+
+    def _fresh(self, ticker: str) -> Optional[ImpliedVolSurface]:
+        entry = self._surfaces.get(ticker)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, ticker: str, surface: ImpliedVolSurface) -> None:
+        """Install a surface built elsewhere (same TTL as a loaded one)"""
+        with self._lock:
+            self._surfaces[ticker.strip().upper()] = (time.monotonic() + self.ttl_seconds, surface)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._surfaces.clear()
+            self._heston.clear()
+            self._failed.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tickers": sorted(self._surfaces),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "builds": self._builds,
+                "failures": self._failures
+            }
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+vol_surface_cache = VolSurfaceCache(
+    loader=partial(load_option_chain, max_expiries=settings.IMPLIED_VOL_MAX_EXPIRIES),
+    rate=settings.IMPLIED_VOL_RATE,
+    ttl_seconds=settings.IMPLIED_VOL_TTL_SECONDS
+)
@@ -0,0 +1,65 @@
+"""
+Benchmark: single vs double precision autocall paths
+Précision et débit du mode float32 du moteur Monte Carlo
+
+Run from backend/:  python -m benchmarks.float32_paths
+
+Accuracy. With Sobol points both precisions see the same draws (the inverse
+cdf runs in float64 and is rounded to float32), so the gap is pure rounding:
+1e-8 to 1e-6 standard errors on the price, Greeks equal to 4 decimals.
+Pseudo-random float32 normals come from a different stream (float32
+Ziggurat), so prices differ by ordinary sampling noise (0.04 to 0.4 standard
+errors here) and Greeks within their standard errors.
+
+Throughput, pseudo-random, greeks=True, 400k paths, one core:
+
+    case                            float64 paths/s   float32 paths/s   gain
+    quarterly 3y (12 dates)              1.42M             1.38M         -3%
+    weekly 3y (156 dates)                196k              249k         +27%
+    quarterly 3y, daily knock-in         860k              912k          +6%
+
+The path matrix, cumsum, exp and autocall scans halve their memory traffic
+and run about 1.4x faster, but the normal generator is compute-bound (~10%
+faster in float32). On short grids the per-chunk reductions (moments,
+histogram, Greeks) dominate and nothing is gained; the mode pays off on long
+observation grids, and halves the memory of every chunk.
+"""
+
+import time
+from app.pricing_core import monte_carlo_autocall
+
+AUTOCALL = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25)
+CASES = {
+    "quarterly 3y (12 dates)": {},
+    "weekly 3y (156 dates)": {"frequency": 1 / 52},
+    "quarterly 3y, daily knock-in": {"barrier_monitoring": 1 / 252},
+}
+N_SIMS = 400000
+
+
+def _timed(**kwargs):
+    best, result = float("inf"), None
+    for _ in range(3):
+        start = time.perf_counter()
+        result = monte_carlo_autocall(**kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    print(f"{'case':<38}{'precision':>10}{'price':>11}{'diff/se':>9}{'delta':>9}{'vega':>9}{'paths/s':>11}")
+    for label, case in CASES.items():
+        for sampler in ("pseudo", "sobol"):
+            reference = None
+            for precision in ("float64", "float32"):
+                result, seconds = _timed(**{**AUTOCALL, **case}, n_sims=N_SIMS, seed=1, sampler=sampler,
+                                         greeks=True, precision=precision)
+                reference = reference or result
+                gap = (result["price"] - reference["price"]) / reference["std_error"]
+                print(f"{f'{label} {sampler}':<38}{precision:>10}{result['price']:>11.3f}{gap:>9.2g}"
+                      f"{result['greeks']['delta']:>9.4f}{result['greeks']['vega']:>9.4f}{N_SIMS / seconds:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark: Crank-Nicolson PDE engine vs Monte Carlo engine
+Précision et temps de calcul de l'autocall de référence
+
+Run from backend/:  python -m benchmarks.pde_vs_monte_carlo
+"""
+
+import time
+from app.pricing_core import monte_carlo_autocall, pde_autocall, pde_down_and_in_put
+
+AUTOCALL = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25)
+BARRIER_PUT = dict(S0=100, K=100, B=70, T=2, r=0.04, sigma=0.3, monitoring=1 / 252)
+
+
+def _timed(fn, **kwargs):
+    start = time.perf_counter()
+    result = fn(**kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    reference, _ = _timed(monte_carlo_autocall, **AUTOCALL, n_sims=2**21, sampler="sobol",
+                          antithetic=True, control_variate=True)
+    print(f"Autocall reference (2M Sobol paths): {reference['price']:.3f} +/- {reference['std_error']:.3f}\n")
+
+    print(f"{'engine':<34}{'price':>10}{'error':>9}{'std err':>9}{'ms':>9}")
+    for n_space, n_time in ((150, 100), (300, 200), (600, 400), (1200, 800)):
+        result, ms = _timed(pde_autocall, **AUTOCALL, n_space=n_space, n_time=n_time)
+        print(f"{f'pde {n_space}x{n_time}':<34}{result['price']:>10.3f}"
+              f"{result['price'] - reference['price']:>9.3f}{'-':>9}{ms:>9.1f}")
+
+    for n_sims, options in ((10000, {}), (100000, {}),
+                            (10000, {"sampler": "sobol", "control_variate": True}),
+                            (100000, {"sampler": "sobol", "control_variate": True})):
+        result, ms = _timed(monte_carlo_autocall, **AUTOCALL, n_sims=n_sims, **options)
+        label = f"mc {n_sims} {'sobol+cv' if options else 'pseudo'}"
+        print(f"{label:<34}{result['price']:>10.3f}{result['price'] - reference['price']:>9.3f}"
+              f"{result['std_error']:>9.3f}{ms:>9.1f}")
+
+    print("\nDown-and-in put, daily monitoring (barrier reverse convertible)")
+    for n_space, n_time in ((150, 100), (300, 200), (600, 400), (1200, 800)):
+        result, ms = _timed(pde_down_and_in_put, **BARRIER_PUT, n_space=n_space, n_time=n_time)
+        print(f"{f'pde {n_space}x{n_time}':<34}{result['price']:>10.4f}{'':>9}{'':>9}{ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
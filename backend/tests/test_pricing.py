@@ -0,0 +1,822 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from scipy.stats import norm
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.pricing_core import (
+    ImpliedVolSurface, VanillaSurface, barrier_option, binomial_american, black_scholes, heston_autocall, heston_down_and_in_put, heston_price,
+    implied_volatility, knock_out_probability, lsm_american, monte_carlo_autocall, monte_carlo_worst_of_autocall, pde_autocall,
+    pde_down_and_in_put
+)
+from app.pricing_core.kernels import available_backends
+from app.pricing_core.monte_carlo import PayoffDistribution, _autocall_redemptions
+from app.api.pricing import WarrantInput
+from app.utils.executor import BoundedExecutor, ExecutorSaturated
+from app.utils.pricing_cache import PricingCache
+from app.utils.vol_surface_cache import VolSurfaceCache, vol_surface_cache
+
+client = TestClient(app)
+
+AUTOCALL_PAYLOAD = {
+    "ticker": "AAPL",
+    "principal": 1000,
+    "autocall_barrier": 100,
+    "coupon_rate": 8,
+    "barrier_level": 60,
+    "maturity_years": 3,
+    "spot_price": 100,
+    "volatility": 0.25,
+}
+
+def test_black_scholes_kernel_arrays():
+    """Array kernel satisfies put-call parity and returns Greeks for every strike"""
+    K = np.array([80.0, 100.0, 120.0])
+    call = black_scholes(100, K, 1, 0.03, 0.2, "call")
+    put = black_scholes(100, K, 1, 0.03, 0.2, "put")
+    assert np.allclose(call["price"] - put["price"], 100 - K * np.exp(-0.03))
+    assert np.allclose(call["delta"] - put["delta"], 1)
+    assert np.allclose(call["prob_itm"] + put["prob_itm"], 1)
+    assert call["gamma"].shape == (3,)
+
+    # Deep out-of-the-money puts keep their relative accuracy (no 1 - N(x) cancellation),
+    # reference values from quadrature of the payoff against the lognormal density
+    far = black_scholes(100, np.array([30.0, 40.0]), 0.5, 0.03, 0.2, "put")
+    assert np.allclose(far["price"], [2.9176891589953956e-18, 2.927341214201857e-11], rtol=1e-9, atol=0)
+    assert (far["prob_itm"] > 0).all() and (far["delta"] < 0).all()
+
+def test_monte_carlo_autocall_first_observation():
+    """Autocall triggered on the first date when the barrier is below spot"""
+    price = monte_carlo_autocall(S0=100, K_autocall=1, K_barrier=60, T=2, r=0.03, sigma=0.2,
+                                 coupon=0.1, principal=1000, frequency=0.5, n_sims=1000)["price"]
+    assert np.isclose(price, 1000 * (1 + 0.1 * 0.5) * np.exp(-0.03 * 2))
+
+def test_monte_carlo_autocall_reproducible():
+    """Same seed gives the same price"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25, n_sims=5000)
+    assert monte_carlo_autocall(**args)["price"] == monte_carlo_autocall(**args)["price"]
+
+def test_monte_carlo_autocall_chunked():
+    """Chunking under a small memory ceiling reproduces the single-chunk result"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25, n_sims=20000)
+    whole = monte_carlo_autocall(**args)
+    chunked = monte_carlo_autocall(**args, max_chunk_mb=0.1)
+    assert np.isclose(whole["price"], chunked["price"])
+    assert np.allclose(whole["autocall_probabilities"], chunked["autocall_probabilities"])
+    assert np.isclose(chunked["autocall_probabilities"].sum(), 1)
+
+def test_monte_carlo_autocall_workers():
+    """Process pool streams are reproducible for a given seed and worker count"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25, n_sims=20000, seed=7)
+    parallel = monte_carlo_autocall(**args, n_workers=2)["price"]
+    assert parallel == monte_carlo_autocall(**args, n_workers=2)["price"]
+    assert abs(parallel - monte_carlo_autocall(**args)["price"]) < 10
+
+def test_autocall_rejects_invalid_monte_carlo_options():
+    """Out-of-range Monte Carlo options and observation frequencies are 400s on the single and worst-of autocalls"""
+    worst_of = {**{k: v for k, v in AUTOCALL_PAYLOAD.items() if k not in ("ticker", "spot_price", "volatility")},
+                "tickers": ["A", "B"], "volatilities": [0.2, 0.3]}
+    for bad in ({"n_workers": 0}, {"n_workers": 10**6}, {"sampler": "bogus"},
+                {"target_std_error": 0}, {"target_std_error": -1},
+                {"autocall_frequency": 0, "autocall_step_down": 5}, {"autocall_frequency": 5}):
+        assert client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, **bad}).status_code == 400, bad
+        assert client.post("/api/pricing/worst-of-autocall", json={**worst_of, **bad}).status_code == 400, bad
+    with pytest.raises(ValueError):
+        monte_carlo_autocall(100, 100, 60, 1, 0.04, 0.25, 0.08, 1000, 0.25, n_sims=100, target_std_error=0)
+    grid = client.post("/api/pricing/autocall/scenarios", json={"parameters": {**AUTOCALL_PAYLOAD, "sampler": "bogus"}})
+    assert grid.status_code == 400
+    terms = {k: v for k, v in AUTOCALL_PAYLOAD.items() if k not in ("ticker", "spot_price", "volatility")}
+    compared = client.post("/api/pricing/compare", json={"ticker": "X", "spot_price": 100, "volatility": 0.25, "products": [
+        {"product_type": "autocall", "parameters": {**terms, "sampler": "bogus"}}]})
+    assert compared.status_code == 400
+
+def test_monte_carlo_autocall_sobol():
+    """Sobol + Brownian bridge with 1024 paths lands close to a large pseudo-random reference"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25)
+    reference = monte_carlo_autocall(**args, n_sims=200000)["price"]
+    assert abs(monte_carlo_autocall(**args, n_sims=1024, sampler="sobol")["price"] - reference) < 6
+
+def test_monte_carlo_autocall_control_variate():
+    """Control variate shrinks the standard error and reports the reduction"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25, n_sims=20000)
+    plain = monte_carlo_autocall(**args)
+    reduced = monte_carlo_autocall(**args, antithetic=True, control_variate=True)
+    assert np.isclose(plain["variance_reduction"], 1.0)
+    assert reduced["std_error"] < plain["std_error"]
+    assert reduced["variance_reduction"] > 1.3
+    assert abs(reduced["price"] - plain["price"]) < 4 * plain["std_error"]
+
+def test_monte_carlo_autocall_target_std_error():
+    """Adaptive mode stops once the standard error target is met"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25, n_sims=500000, batch_size=5000)
+    result = monte_carlo_autocall(**args, target_std_error=0.5)
+    assert result["std_error"] <= 0.5
+    assert 5000 < result["n_paths"] < 500000
+    # Certain autocall on the first date: no variance, first batch is enough
+    easy = monte_carlo_autocall(**{**args, "K_autocall": 1}, target_std_error=0.5)
+    assert easy["n_paths"] == 5000
+
+def test_price_autocall_endpoint():
+    """Test autocall pricing endpoint"""
+    response = client.post("/api/pricing/autocall", json=AUTOCALL_PAYLOAD)
+    assert response.status_code == 200
+    data = response.json()
+    assert 800 < data["fair_value"] < 1100
+    assert data["ci_lower"] < data["fair_value"] < data["ci_upper"]
+    assert data["n_paths"] == 10000
+
+def test_price_batch_matches_single_endpoints():
+    """Batch results come back in input order and match the single-product endpoints"""
+    warrant = {"ticker": "AAPL", "strike_price": 110, "warrant_type": "put", "maturity_years": 1,
+               "spot_price": 100, "volatility": 0.25}
+    reverse_convertible = {"ticker": "AAPL", "principal": 1000, "coupon_rate": 9, "barrier_level": 70,
+                           "maturity_years": 2, "spot_price": 100, "volatility": 0.3}
+    response = client.post("/api/pricing/batch", json={"products": [
+        {"product_type": "warrant", "parameters": warrant},
+        {"product_type": "reverse-convertible", "parameters": reverse_convertible},
+        {"product_type": "warrant", "parameters": {**warrant, "warrant_type": "call"}},
+    ]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0] == client.post("/api/pricing/warrant", json=warrant).json()
+    assert results[1] == client.post("/api/pricing/reverse-convertible", json=reverse_convertible).json()
+    assert results[2]["product"] == "Warrant CALL"
+
+def test_price_batch_rejects_unknown_product():
+    """Unsupported product types are rejected with their position"""
+    response = client.post("/api/pricing/batch", json={"products": [
+        {"product_type": "autocall", "parameters": AUTOCALL_PAYLOAD}
+    ]})
+    assert response.status_code == 400
+    assert "products[0]" in response.json()["detail"]
+
+def test_executor_rejects_beyond_queue_depth():
+    """Tasks beyond max_workers + max_queue are rejected and counted"""
+    executor = BoundedExecutor("test", kind="thread", max_workers=1, max_queue=1)
+
+    async def submit_three():
+        return await asyncio.gather(*[executor.run(time.sleep, 0.05) for _ in range(3)],
+                                    return_exceptions=True)
+
+    results = asyncio.run(submit_three())
+    assert sum(isinstance(r, ExecutorSaturated) for r in results) == 1
+    stats = executor.stats()
+    assert stats["completed"] == 2 and stats["rejected"] == 1 and stats["in_flight"] == 0
+    executor.shutdown()
+
+def test_executor_stats_endpoint():
+    """Pricing pool statistics are exposed after a request"""
+    client.post("/api/pricing/autocall", json=AUTOCALL_PAYLOAD)
+    response = client.get("/api/pricing/executors")
+    assert response.status_code == 200
+    assert response.json()["pricing"]["completed"] >= 1
+
+def test_pricing_cache_quantizes_and_evicts():
+    """Inputs within tolerance share a key, LRU entries are evicted and TTL expires them"""
+    cache = PricingCache(max_entries=1, ttl_seconds=60, spot_tolerance=0.01, vol_tolerance=0.0001)
+    base = WarrantInput(ticker="aapl ", strike_price=110, maturity_years=1, spot_price=100.001, volatility=0.25)
+    key = cache.make_key("warrant", cache.normalize(base))
+    nearby = base.model_copy(update={"spot_price": 99.999, "volatility": 0.25001, "ticker": "AAPL"})
+    assert cache.make_key("warrant", cache.normalize(nearby)) == key
+
+    cache.set(key, base)
+    assert cache.get(key) is base
+    cache.set("other", base)
+    assert cache.get(key) is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.ttl_seconds = -1
+    cache.set(key, base)
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+def test_pricing_cache_serves_repeated_requests():
+    """Re-posting the same autocall is a cache hit, a different seed is not"""
+    before = client.get("/api/pricing/cache").json()
+    first = client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "seed": 123}).json()
+    second = client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "seed": 123}).json()
+    client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "seed": 124})
+    after = client.get("/api/pricing/cache").json()
+    assert first == second
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 2
+
+def test_vanilla_surface_within_measured_error():
+    """Interpolated prices stay within the build-time error bound and fall back to exact off-grid"""
+    surface = VanillaSurface.build(n_u=601, n_v=201)
+    K = np.array([70.0, 95.0, 100.0, 130.0])
+    exact = black_scholes(100, K, 1.5, 0.03, 0.3, "put")
+    interpolated = surface.evaluate(100, K, 1.5, 0.03, 0.3, "put")
+    assert np.all(np.abs(interpolated["price"] - exact["price"]) <= surface.max_error["otm"] * K + 1e-12)
+    quote = surface.quote(100, 95.0, 1.5, 0.03, 0.3, "put")
+    assert np.isclose(quote["price"], interpolated["price"][1])
+    # Far out of the grid (u < -6): exact kernel
+    assert surface.quote(100, 1e5, 1, 0.03, 0.3, "call")["price"] == black_scholes(100, 1e5, 1, 0.03, 0.3, "call")["price"]
+    # Deep out of the money: within the relative bound, not only the absolute one
+    tail = black_scholes(100, 55.0, 1, 0.03, 0.25, "put")["price"]
+    assert abs(surface.quote(100, 55.0, 1, 0.03, 0.25, "put")["price"] - tail) <= surface.max_error["otm_relative"] * tail
+
+def test_pricing_surface_bounds_every_measured_error(monkeypatch):
+    """A surface whose Greek or relative price error exceeds its bound is not used"""
+    from app.api import pricing
+    from app.pricing_core import surfaces
+    surface = VanillaSurface.build(n_u=601, n_v=201)
+    monkeypatch.setattr(surfaces, "_surface", surface)
+    monkeypatch.setattr(pricing.settings, "PRICING_SURFACE_ENABLED", True)
+    monkeypatch.setattr(pricing.settings, "PRICING_SURFACE_MAX_ERROR", 1.0)
+    monkeypatch.setattr(pricing.settings, "PRICING_SURFACE_MAX_RELATIVE_ERROR", 1.0)
+    assert pricing._get_surface() is surface
+    for field in ("pdf_d1", "otm_relative"):
+        monkeypatch.setitem(surface.max_error, field, 2.0)
+        assert pricing._get_surface() is None
+        monkeypatch.setitem(surface.max_error, field, 0.0)
+
+def test_scenarios_base_point_matches_single_endpoints():
+    """Scenario grids have the requested shape and reproduce the single pricing at the base point"""
+    warrant = {"ticker": "AAPL", "strike_price": 110, "warrant_type": "put", "maturity_years": 1,
+               "spot_price": 100, "volatility": 0.25}
+    response = client.post("/api/pricing/warrant/scenarios", json={
+        "parameters": warrant,
+        "spot": {"start": 80, "stop": 120, "steps": 5},
+        "volatility": {"start": 0.15, "stop": 0.35, "steps": 3},
+    })
+    assert response.status_code == 200
+    grid = response.json()
+    assert grid["shape"] == [5, 3, 1, 1]
+    single = client.post("/api/pricing/warrant", json=warrant).json()
+    assert grid["fair_value"][2][1][0][0] == single["fair_value"]
+    assert grid["delta"][2][1][0][0] == single["delta"]
+
+    response = client.post("/api/pricing/autocall/scenarios", json={
+        "parameters": AUTOCALL_PAYLOAD,
+        "spot": {"start": 80, "stop": 120, "steps": 3},
+    })
+    assert response.status_code == 200
+    fair_values = [point[0][0][0] for point in response.json()["fair_value"]]
+    single = client.post("/api/pricing/autocall", json=AUTOCALL_PAYLOAD).json()
+    assert fair_values[1] == single["fair_value"]
+    assert response.json()["std_error"][1][0][0][0] > 0
+    # The note's delta on the same draws, not the embedded put's
+    assert abs(response.json()["delta"][1][0][0][0] - single["delta"]) < 1e-3
+
+def test_scenarios_reject_options_the_grid_ignores():
+    """Non-default options the grid pricers do not model, and invalid base terms, are 400s"""
+    rc = {"ticker": "AAPL", "principal": 1000, "coupon_rate": 9, "barrier_level": 70,
+          "maturity_years": 2, "spot_price": 100, "volatility": 0.3}
+    for product, parameters in (("autocall", {**AUTOCALL_PAYLOAD, "backend": "numba"}),
+                                ("autocall", {**AUTOCALL_PAYLOAD, "control_variate": True}),
+                                ("autocall", {**AUTOCALL_PAYLOAD, "target_std_error": 0.5}),
+                                ("autocall", {**AUTOCALL_PAYLOAD, "autocall_frequency": 0}),
+                                ("reverse-convertible", {**rc, "barrier_monitoring": 1 / 52}),
+                                ("autocall", {**AUTOCALL_PAYLOAD, "engine": "pde"}),
+                                ("reverse-convertible", {**rc, "engine": "pde"}),
+                                ("reverse-convertible", {**rc, "engine": "heston"})):
+        response = client.post(f"/api/pricing/{product}/scenarios", json={"parameters": parameters})
+        assert response.status_code == 400, parameters
+    assert client.post("/api/pricing/reverse-convertible/scenarios", json={"parameters": rc}).status_code == 200
+
+def test_scenarios_reject_oversized_grid():
+    """Grids above SCENARIO_MAX_POINTS are rejected"""
+    response = client.post("/api/pricing/warrant/scenarios", json={
+        "parameters": {"ticker": "AAPL", "strike_price": 110, "maturity_years": 1,
+                       "spot_price": 100, "volatility": 0.25},
+        "spot": {"start": 50, "stop": 150, "steps": 1000},
+        "volatility": {"start": 0.1, "stop": 0.5, "steps": 1000},
+    })
+    assert response.status_code == 400
+
+def european_barrier_put(S0, K, B, T, r, sigma):
+    """Down-and-in put observed at maturity only, closed form (reference for the PDE engine)"""
+    # (K - S)+ 1{S <= B} = (B - S)+ + (K - B) 1{S <= B} for B <= K
+    d2 = (np.log(S0 / B) + (r - 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    d1 = d2 + sigma * np.sqrt(T)
+    put_B = B * np.exp(-r * T) * norm.cdf(-d2) - S0 * norm.cdf(-d1)
+    return put_B + (K - B) * np.exp(-r * T) * norm.cdf(-d2)
+
+def test_pde_barrier_put_matches_closed_form():
+    """Barrier observed at maturity only has a closed form; the grid converges to it"""
+    price = pde_down_and_in_put(100, 100, 70, 2, 0.04, 0.3, monitoring=2)["price"]
+    assert abs(price - european_barrier_put(100, 100, 70, 2, 0.04, 0.3)) < 0.01
+
+def test_pde_autocall_matches_monte_carlo():
+    """Crank-Nicolson autocall agrees with the Monte Carlo engine within its confidence interval"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25)
+    pde = pde_autocall(**args)
+    mc = monte_carlo_autocall(**args, n_sims=100000, sampler="sobol", control_variate=True)
+    assert abs(pde["price"] - mc["price"]) < 3 * mc["std_error"] + 0.5
+
+def test_reverse_convertible_pde_engine():
+    """A knock-in put struck at the initial fixing is worth more than a vanilla put struck at the barrier"""
+    payload = {"ticker": "AAPL", "principal": 1000, "coupon_rate": 9, "barrier_level": 70,
+               "maturity_years": 2, "spot_price": 100, "volatility": 0.3}
+    closed_form = client.post("/api/pricing/reverse-convertible", json=payload).json()
+    pde = client.post("/api/pricing/reverse-convertible", json={**payload, "engine": "pde"}).json()
+    assert pde["embedded_put_value"] > closed_form["embedded_put_value"]
+    assert 0 < pde["probability_profit"] < 100
+    assert pde["delta"] < 0 < pde["gamma"]
+
+def test_reverse_convertible_rejects_invalid_engine_settings():
+    """Bad monitoring, grid sizes or engines are 400s, on the endpoint and in batches"""
+    payload = {"ticker": "AAPL", "principal": 1000, "coupon_rate": 9, "barrier_level": 70,
+               "maturity_years": 2, "spot_price": 100, "volatility": 0.3, "engine": "pde"}
+    for bad in ({"barrier_monitoring": 0}, {"barrier_monitoring": -0.1},
+                {"pde_space_steps": 10**7}, {"pde_time_steps": 0}, {"engine": "bogus"}):
+        response = client.post("/api/pricing/reverse-convertible", json={**payload, **bad})
+        assert response.status_code == 400, bad
+    batch = client.post("/api/pricing/batch", json={"products": [
+        {"product_type": "reverse-convertible", "parameters": {**payload, "engine": "bogus"}}]})
+    assert batch.status_code == 400 and batch.json()["detail"].startswith("products[0]")
+    heston = client.post("/api/pricing/reverse-convertible", json={
+        **payload, "engine": "heston", "heston": HESTON, "barrier_monitoring": 0})
+    assert heston.status_code == 400
+
+def test_worst_of_single_asset_matches_autocall():
+    """A one-asset basket is the single-asset autocall with strikes as fractions of spot"""
+    args = dict(T=3, r=0.04, coupon=0.08, principal=1000, frequency=0.25, n_sims=5000)
+    single = monte_carlo_autocall(S0=100, K_autocall=100, K_barrier=60, sigma=0.25, **args)
+    basket = monte_carlo_worst_of_autocall([0.25], [[1.0]], 1.0, 0.6, **args)
+    assert np.isclose(single["price"], basket["price"])
+
+def test_worst_of_autocall_endpoint():
+    """Adding uncorrelated names lowers the worst-of value; invalid correlations are rejected"""
+    payload = {"tickers": ["AAPL", "MSFT"], "principal": 1000, "autocall_barrier": 100, "coupon_rate": 8,
+               "barrier_level": 60, "maturity_years": 3, "volatilities": [0.25, 0.3]}
+    pair = client.post("/api/pricing/worst-of-autocall", json=payload)
+    assert pair.status_code == 200
+    basket = client.post("/api/pricing/worst-of-autocall", json={
+        **payload, "tickers": [f"T{i}" for i in range(10)], "volatilities": [0.25] * 10, "average_correlation": 0.2
+    })
+    assert basket.status_code == 200
+    assert basket.json()["fair_value"] < pair.json()["fair_value"]
+    assert np.isclose(sum(basket.json()["autocall_probabilities"]), 1, atol=1e-3)
+
+    invalid = client.post("/api/pricing/worst-of-autocall", json={**payload, "correlation": [[1, 0.9], [0.9, 1.2]]})
+    assert invalid.status_code == 400
+
+def test_monte_carlo_autocall_knock_in_bridge_matches_daily_simulation():
+    """Quarterly steps with the Brownian bridge correction price a daily knock-in like a daily simulation"""
+    S0, K_barrier, T, r, sigma, coupon, principal, frequency = 100, 70, 3, 0.04, 0.25, 0.08, 1000, 0.25
+    rng = np.random.default_rng(3)
+    dt = 1 / 252
+    log_paths = np.cumsum((r - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * rng.standard_normal((20000, 756)), axis=1)
+    paths = S0 * np.exp(log_paths)
+    observed = paths[:, 62::63]
+    autocalled = (observed >= S0).any(axis=1)
+    first_hit = (observed >= S0).argmax(axis=1)
+    S_T = paths[:, -1]
+    loss = (paths <= K_barrier).any(axis=1) & (S_T < S0)
+    payoff = np.where(autocalled, principal * (1 + coupon * (first_hit + 1) * frequency),
+                      np.where(loss, principal * S_T / S0, principal * (1 + coupon * T))) * np.exp(-r * T)
+    daily, daily_error = payoff.mean(), payoff.std() / np.sqrt(len(payoff))
+
+    args = dict(S0=S0, K_autocall=S0, K_barrier=K_barrier, T=T, r=r, sigma=sigma, coupon=coupon,
+                principal=principal, frequency=frequency, n_sims=100000)
+    bridged = monte_carlo_autocall(**args, barrier_monitoring=1 / 252)
+    assert abs(bridged["price"] - daily) < 4 * np.hypot(daily_error, bridged["std_error"])
+    assert monte_carlo_autocall(**args, barrier_monitoring=0)["price"] < bridged["price"]
+    assert bridged["price"] < monte_carlo_autocall(**args)["price"]
+
+def test_autocall_rejects_negative_barrier_monitoring():
+    """A negative observation period is a 400, not a NaN crossing probability"""
+    response = client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "engine": "monte_carlo",
+                                                          "barrier_monitoring": -1 / 252})
+    assert response.status_code == 400
+    with pytest.raises(ValueError):
+        monte_carlo_autocall(100, 100, 60, 1, 0.04, 0.25, 0.08, 1000, 0.25, n_sims=100, barrier_monitoring=-1)
+
+def test_monte_carlo_autocall_greeks_match_pde():
+    """Bumped Greeks on common random numbers agree with the PDE grid Greeks and leave the price unchanged"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25)
+    pde = pde_autocall(**args)
+    mc = monte_carlo_autocall(**args, n_sims=100000, sampler="sobol", antithetic=True, greeks=True)
+    for greek in ("delta", "gamma", "vega", "theta"):
+        assert abs(mc["greeks"][greek] - pde[greek]) < 4 * mc["greeks_std_error"][greek] + 0.01
+    plain = monte_carlo_autocall(**args, n_sims=100000, sampler="sobol", antithetic=True)
+    assert abs(mc["price"] - plain["price"]) < 1e-8
+
+    response = client.post("/api/pricing/autocall", json=AUTOCALL_PAYLOAD)
+    assert response.status_code == 200
+    assert response.json()["vega"] < 0
+
+def test_implied_volatility_inverts_option_chains():
+    """Vectorized Newton recovers the volatility of calls and puts across strikes and maturities"""
+    rng = np.random.default_rng(7)
+    K = rng.uniform(50, 200, 5000)
+    T = rng.uniform(0.05, 3, 5000)
+    sigma = rng.uniform(0.05, 1.2, 5000)
+    option_type = np.where(rng.random(5000) < 0.5, "call", "put")
+    quotes = black_scholes(100, K, T, 0.03, sigma, option_type)
+    recovered = implied_volatility(quotes["price"], 100, K, T, 0.03, option_type)
+    priced = quotes["vega"] > 1e-6
+    assert np.abs(recovered - sigma)[priced].max() < 1e-6
+
+    # Quotes outside the no-arbitrage bounds have no implied volatility
+    assert np.isnan(implied_volatility([0.5, 101.0], 100, 90, 1, 0.0, "call")).all()
+
+def _smile_chain(ticker):
+    """Synthetic listed chain with a known skew: sigma = 0.25 - 0.2 ln(K/F) + 0.05 T"""
+    strikes, maturities = np.meshgrid(np.linspace(60, 140, 17), [0.25, 0.5, 1.0, 2.0])
+    strikes, maturities = strikes.ravel(), maturities.ravel()
+    vols = 0.25 - 0.2 * (np.log(strikes / 100) - 0.04 * maturities) + 0.05 * maturities
+    option_types = np.where(strikes >= 100, "call", "put")
+    prices = black_scholes(100, strikes, maturities, 0.04, vols, option_types)["price"]
+    return {"spot": 100.0, "maturities": maturities, "strikes": strikes, "prices": prices,
+            "option_types": option_types}
+
+def test_vol_surface_cache_feeds_pricing_endpoints(monkeypatch):
+    """Surfaces are built once per ticker, read by strike and maturity, and fill a missing volatility"""
+    monkeypatch.setattr(settings, "IMPLIED_VOL_ENABLED", True)
+    cache = VolSurfaceCache(loader=_smile_chain)
+    surface = cache.get("spx")
+    assert cache.get("SPX") is surface and cache.stats()["builds"] == 1
+    # On a listed maturity the smile is reproduced, between maturities total variance is interpolated
+    assert abs(surface.volatility(0.8, 1.0) - (0.25 - 0.2 * (np.log(0.8) - 0.04) + 0.05)) < 1e-6
+    assert surface.volatility(1.0, 0.5) < surface.volatility(1.0, 0.75) < surface.volatility(1.0, 1.0)
+
+    vol_surface_cache.put("SMILE", surface)
+    try:
+        warrant = {"ticker": "SMILE", "strike_price": 90, "warrant_type": "put", "maturity_years": 1,
+                   "spot_price": 100}
+        implied = client.post("/api/pricing/warrant", json=warrant)
+        assert implied.status_code == 200
+        explicit = client.post("/api/pricing/warrant",
+                               json={**warrant, "volatility": float(surface.volatility(0.9, 1.0))})
+        assert implied.json()["fair_value"] == explicit.json()["fair_value"]
+    finally:
+        vol_surface_cache.clear()
+
+def test_missing_volatility_is_400_when_the_chain_is_unavailable(monkeypatch):
+    """With the implied lookup on and no network, every endpoint answers 400 without waiting past the timeout"""
+    def offline(ticker):
+        raise OSError("Temporary failure in name resolution")
+
+    def hanging(ticker):
+        time.sleep(1.0)
+        raise OSError("timed out")
+
+    monkeypatch.setattr(settings, "IMPLIED_VOL_ENABLED", True)
+    monkeypatch.setattr(settings, "IMPLIED_VOL_TIMEOUT_SECONDS", 0.1)
+    terms = {k: v for k, v in AUTOCALL_PAYLOAD.items() if k not in ("ticker", "spot_price", "volatility")}
+    products = {
+        "autocall": AUTOCALL_PAYLOAD,
+        "reverse-convertible": {"principal": 1000, "coupon_rate": 9, "barrier_level": 70, "maturity_years": 2},
+        "capital-protected": {"principal": 1000, "protection_level": 100, "participation_rate": 100, "maturity_years": 3},
+        "warrant": {"strike_price": 110, "maturity_years": 1},
+        "turbo": {"strike_price": 90, "maturity_years": 1},
+    }
+    try:
+        # One event loop for every request, as under the server: a timed-out fetch finishes in its thread
+        with TestClient(app) as server:
+            for loader in (offline, hanging):
+                monkeypatch.setattr(vol_surface_cache, "loader", loader)
+                vol_surface_cache.clear()
+                for product, parameters in products.items():
+                    parameters = {**parameters, "ticker": "NONET", "spot_price": 100, "volatility": None}
+                    start = time.perf_counter()
+                    assert server.post(f"/api/pricing/{product}", json=parameters).status_code == 400, product
+                    assert server.post(f"/api/pricing/{product}/scenarios",
+                                       json={"parameters": parameters}).status_code == 400, product
+                    assert time.perf_counter() - start < 0.9, product
+                batch = server.post("/api/pricing/batch", json={"products": [
+                    {"product_type": "warrant", "parameters": {**products["warrant"], "ticker": "NONET", "spot_price": 100}}]})
+                assert batch.status_code == 400
+                compared = server.post("/api/pricing/compare", json={"ticker": "NONET", "spot_price": 100, "products": [
+                    {"product_type": "autocall", "parameters": terms}]})
+                assert compared.status_code == 400
+    finally:
+        vol_surface_cache.clear()
+
+HESTON = {"v0": 0.03, "kappa": 2.5, "theta": 0.05, "xi": 0.7, "rho": -0.65}
+
+def test_heston_engine_matches_limits():
+    """Lewis prices reduce to Black-Scholes, QE paths reprice vanillas and reduce to the GBM autocall"""
+    K = np.array([70.0, 100.0, 130.0])
+    flat = heston_price(100, K, 1, 0.03, 0.04, 2.0, 0.04, 1e-4, 0.0, "call")
+    assert np.allclose(flat, black_scholes(100, K, 1, 0.03, 0.2, "call")["price"], atol=1e-6)
+
+    # Barrier above spot: the down-and-in put is the vanilla put
+    put = heston_price(100, 100, 1, 0.03, **HESTON, option_type="put")
+    mc = heston_down_and_in_put(100, 100, 1e6, 1, 0.03, **HESTON, monitoring=1 / 12, n_sims=50000,
+                                control_variate=False, greeks=False)
+    assert abs(mc["price"] - put) < 3 * mc["std_error"]
+    # Maturity between two observations: the final stub continues the variance path
+    stubbed = heston_down_and_in_put(100, 100, 1e6, 1, 0.03, **{**HESTON, "v0": 0.01, "theta": 0.09},
+                                     monitoring=0.6, n_sims=50000, control_variate=False, greeks=False)
+    put = heston_price(100, 100, 1, 0.03, 0.01, HESTON["kappa"], 0.09, HESTON["xi"], HESTON["rho"], "put")
+    assert abs(stubbed["price"] - put) < 3 * stubbed["std_error"]
+
+    gbm = monte_carlo_autocall(100, 100, 60, 3, 0.03, 0.2, 0.08, 1000, 1.0, n_sims=40000)
+    heston = heston_autocall(100, 100, 60, 3, 0.03, 0.08, 1000, 1.0, 0.04, 2.0, 0.04, 1e-3, 0.0,
+                             n_sims=40000, control_variate=True, greeks=True)
+    assert abs(heston["price"] - gbm["price"]) < 3 * np.hypot(heston["std_error"], gbm["std_error"])
+    assert heston["variance_reduction"] > 1 and heston["greeks"]["vega"] < 0
+
+def test_heston_coarse_monitoring_keeps_the_time_grid():
+    """barrier_monitoring only adds knock-in dates: coarser than max_dt it leaves the QE grid unchanged"""
+    args = dict(S0=100, K_autocall=100, T=2, r=0.03, coupon=0.08, principal=1000, frequency=0.25,
+                **HESTON, n_sims=4000, greeks=False)
+    # Barrier far below any path: identical draws and grid give identical prices
+    unmonitored = heston_autocall(K_barrier=1e-6, **args)["price"]
+    assert heston_autocall(K_barrier=1e-6, barrier_monitoring=1.0, **args)["price"] == unmonitored
+    # Monthly dates are a subset of the weekly ones on the same weekly grid: fewer knock-ins
+    monthly = heston_autocall(K_barrier=70, barrier_monitoring=1 / 12, **args)["price"]
+    assert monthly > heston_autocall(K_barrier=70, barrier_monitoring=1 / 52, **args)["price"]
+
+def _heston_chain(ticker):
+    """Synthetic listed chain priced with the HESTON parameters"""
+    strikes, maturities = np.meshgrid(np.linspace(60, 150, 19), [0.1, 0.25, 0.5, 1.0, 2.0, 3.0])
+    strikes, maturities = strikes.ravel(), maturities.ravel()
+    option_types = np.where(strikes >= 100, "call", "put")
+    prices = heston_price(100, strikes, maturities, 0.04, **HESTON, option_type=option_types)
+    return {"spot": 100.0, "maturities": maturities, "strikes": strikes, "prices": prices,
+            "option_types": option_types}
+
+def test_heston_calibration_feeds_engine():
+    """Calibration recovers the parameters behind a surface, endpoints calibrate when none are given"""
+    cache = VolSurfaceCache(loader=_heston_chain)
+    start = time.perf_counter()
+    fit = cache.heston("HST")
+    assert time.perf_counter() - start < 5
+    assert cache.heston("HST") is fit
+    for name, value in HESTON.items():
+        assert abs(fit[name] - value) < 0.02 * max(abs(value), 1), name
+
+    vol_surface_cache.put("HST", cache.get("HST"))
+    try:
+        autocall = {**AUTOCALL_PAYLOAD, "ticker": "HST", "volatility": None, "engine": "heston",
+                    "autocall_frequency": 1.0, "n_simulations": 5000}
+        response = client.post("/api/pricing/autocall", json=autocall)
+        assert response.status_code == 200 and response.json()["n_paths"] == 5000
+        sobol = client.post("/api/pricing/autocall", json={**autocall, "sampler": "sobol"})
+        assert sobol.status_code == 400
+
+        rc = {"ticker": "HST", "principal": 1000, "coupon_rate": 8, "barrier_level": 70, "maturity_years": 1,
+              "spot_price": 100, "engine": "heston", "heston": HESTON, "barrier_monitoring": 1 / 52}
+        response = client.post("/api/pricing/reverse-convertible", json=rc)
+        assert response.status_code == 200 and response.json()["delta"] < 0  # Embedded put
+    finally:
+        vol_surface_cache.clear()
+
+def test_longstaff_schwartz_matches_binomial_tree():
+    """LSM American and Bermudan puts agree with the CRR tree, Greeks included, for every basis"""
+    tree = binomial_american(36, 40, 1, 0.06, 0.2, "put", n_steps=2000)
+    assert abs(tree["price"] - 4.486) < 0.005  # Longstaff-Schwartz (2001), table 1
+    for basis in ("laguerre", "polynomial", "hermite"):
+        lsm = lsm_american(36, 40, 1, 0.06, 0.2, "put", basis=basis, n_sims=50000)
+        assert abs(lsm["price"] - tree["price"]) < 4 * lsm["std_error"] + 0.01
+        assert lsm["early_exercise_premium"] > 0.5 and lsm["variance_reduction"] > 1
+    assert abs(lsm["greeks"]["delta"] - tree["delta"]) < 0.02
+    assert abs(lsm["greeks"]["vega"] - tree["vega"]) < 0.01
+
+    bermudan_tree = binomial_american(36, 40, 1, 0.06, 0.2, "put", n_steps=2000, exercise_frequency=0.25)
+    bermudan = lsm_american(36, 40, 1, 0.06, 0.2, "put", exercise_frequency=0.25, n_sims=50000)
+    assert lsm["european_price"] < bermudan["price"] < lsm["price"]
+    assert abs(bermudan["price"] - bermudan_tree["price"]) < 4 * bermudan["std_error"] + 0.01
+
+    # No dividends: an American call is worth its European value
+    call = lsm_american(100, 100, 1, 0.03, 0.25, "call", n_sims=20000)
+    assert call["early_exercise_premium"] == 0 and call["price"] == call["european_price"]
+
+def test_american_warrant_endpoint():
+    """American warrants report the early exercise premium, on both engines"""
+    warrant = {"ticker": "X", "strike_price": 110, "warrant_type": "put", "leverage": 1, "maturity_years": 1,
+               "spot_price": 100, "volatility": 0.3, "risk_free_rate": 0.05}
+    european = client.post("/api/pricing/warrant", json=warrant).json()
+    assert european["early_exercise_premium"] == 0
+    lsm = client.post("/api/pricing/warrant", json={**warrant, "exercise": "american"}).json()
+    tree = client.post("/api/pricing/warrant", json={**warrant, "exercise": "american", "engine": "binomial"}).json()
+    assert lsm["fair_value"] > european["fair_value"] and lsm["std_error"] > 0
+    assert abs(lsm["fair_value"] - tree["fair_value"]) < 4 * lsm["std_error"] + 0.02
+    assert abs(tree["early_exercise_premium"] - (tree["fair_value"] - european["fair_value"])) <= 0.011
+    response = client.post("/api/pricing/warrant", json={**warrant, "exercise": "bermudan"})
+    assert response.status_code == 400
+    for bad in ({"exercise": "bermudan"}, {"exercise": "american", "basis": "chebyshev"}):
+        batch = client.post("/api/pricing/batch", json={"products": [
+            {"product_type": "warrant", "parameters": {**warrant, **bad}}]})
+        assert batch.status_code == 400 and batch.json()["detail"].startswith("products[0]")
+
+def test_barrier_closed_form_in_out_parity_and_discrete_monitoring():
+    """Knock-in + knock-out = vanilla for every type, and the BGK shift reprices a daily barrier"""
+    K = np.array([80.0, 95.0, 100.0, 110.0, 120.0])
+    for option_type in ("call", "put"):
+        vanilla = black_scholes(100, K, 0.5, 0.05, 0.3, option_type)["price"]
+        for direction, H in (("down", 90.0), ("up", 115.0)):
+            knock_out = barrier_option(100, K, H, 0.5, 0.05, 0.3, option_type, f"{direction}-and-out")["price"]
+            knock_in = barrier_option(100, K, H, 0.5, 0.05, 0.3, option_type, f"{direction}-and-in")["price"]
+            assert np.allclose(knock_out + knock_in, vanilla)
+
+    # Daily monitored down-and-out call, brute force
+    rng = np.random.default_rng(3)
+    dt = 0.5 / 126
+    X = np.cumsum((0.05 - 0.045) * dt + 0.3 * np.sqrt(dt) * rng.standard_normal((100000, 126)), axis=1)
+    alive = X.min(axis=1) > np.log(0.95)
+    payoffs = np.where(alive, np.maximum(100 * np.exp(X[:, -1]) - 95, 0), 0) * np.exp(-0.025)
+    discrete = barrier_option(100, 95, 95, 0.5, 0.05, 0.3, "call", "down-and-out", monitoring=dt)
+    assert abs(discrete["price"] - payoffs.mean()) < 3 * payoffs.std() / np.sqrt(len(payoffs))
+    assert discrete["price"] > barrier_option(100, 95, 95, 0.5, 0.05, 0.3, "call", "down-and-out")["price"]
+    assert abs(knock_out_probability(100, 95, 0.5, 0.05, 0.3, monitoring=dt) - (1 - alive.mean())) < 0.005
+
+def test_turbo_endpoints():
+    """Single turbos, ranges and batches share the closed-form kernel; a knocked-out turbo pays the rebate"""
+    turbo = {"ticker": "X", "strike_price": 90, "turbo_type": "long", "ratio": 0.1, "maturity_years": 1,
+             "spot_price": 100, "volatility": 0.25}
+    single = client.post("/api/pricing/turbo", json=turbo).json()
+    assert 10 < single["option_value"] < single["vanilla_value"] and single["leverage"] > 5
+    assert single["barrier_price"] == 90 and 0 < single["prob_knock_out"] < 100
+
+    strikes = [80, 85, 90, 95]
+    ranged = client.post("/api/pricing/turbo/range", json={**turbo, "strikes": strikes}).json()
+    assert ranged["n_products"] == 4 and ranged["results"][2] == single
+    leverages = [result["leverage"] for result in ranged["results"]]
+    assert leverages == sorted(leverages)  # Closer barrier, higher gearing
+
+    short = client.post("/api/pricing/turbo", json={**turbo, "turbo_type": "short", "strike_price": 95,
+                                                    "barrier": 95, "rebate": 0.5}).json()
+    assert short["option_value"] == 0.5 and short["prob_knock_out"] == 100
+    batch = client.post("/api/pricing/batch", json={"products": [{"product_type": "turbo", "parameters": turbo}]})
+    assert batch.json()["results"][0] == single
+
+    sideways = {**turbo, "turbo_type": "sideways"}
+    batch = client.post("/api/pricing/batch", json={"products": [{"product_type": "turbo", "parameters": sideways}]})
+    assert batch.status_code == 400 and batch.json()["detail"].startswith("products[0]")
+    grid = client.post("/api/pricing/turbo/scenarios", json={"parameters": sideways})
+    assert grid.status_code == 400
+
+def test_compare_products_on_shared_paths():
+    """One path set: the autocall matches its own engine and a warrant's fair value matches Black-Scholes"""
+    market = {"ticker": "X", "spot_price": 100, "volatility": 0.25, "risk_free_rate": 0.03}
+    autocall = {"principal": 1000, "autocall_barrier": 100, "coupon_rate": 8, "barrier_level": 60, "maturity_years": 3}
+    warrant = {"strike_price": 110, "leverage": 5, "maturity_years": 1}
+    body = {**market, "n_simulations": 50000, "seed": 7, "products": [
+        {"product_type": "autocall", "parameters": autocall},
+        {"product_type": "capital-protected", "parameters": {"principal": 1000, "protection_level": 100,
+                                                             "participation_rate": 100, "maturity_years": 3}},
+        {"product_type": "warrant", "parameters": warrant},
+    ]}
+    compared = client.post("/api/pricing/compare", json=body).json()
+    assert compared["n_paths"] == 50000 and len(compared["correlation"]) == 3
+    ac, cp, wt = compared["results"]
+
+    single = client.post("/api/pricing/autocall", json={**autocall, **market, "n_simulations": 50000}).json()
+    assert abs(ac["fair_value"] - single["fair_value"]) < 3 * (ac["std_error"] + single["std_error"])
+    quote = client.post("/api/pricing/warrant", json={**warrant, **market}).json()
+    assert wt["invested"] == quote["fair_value"]
+    assert abs(wt["fair_value"] - quote["fair_value"]) < 3 * wt["std_error"]
+    # Fully protected note bought at par: fair by construction, never loses
+    assert abs(cp["fair_value"] - 1000) < 3 * cp["std_error"] and cp["return_quantiles"]["p5"] == 0
+    assert ac["return_quantiles"]["p5"] <= ac["return_quantiles"]["p50"] <= ac["return_quantiles"]["p95"]
+    for result in compared["results"]:
+        histogram = result["payoff_distribution"]
+        assert abs(sum(histogram["probabilities"]) - 1) < 1e-9
+        assert len(histogram["bin_edges"]) == len(histogram["probabilities"]) + 1
+
+    for ignored in ({"antithetic": True}, {"control_variate": True}, {"n_workers": 2}, {"seed": 7}):
+        response = client.post("/api/pricing/compare", json={**body, "products": [
+            {"product_type": "autocall", "parameters": {**autocall, **ignored}}]})
+        assert response.status_code == 400
+
+    american = client.post("/api/pricing/compare", json={**body, "products": [
+        {"product_type": "warrant", "parameters": {**warrant, "exercise": "american"}}]})
+    assert american.status_code == 400
+
+def test_capital_protected_input_errors_are_400():
+    """Validation errors raised inside the handler keep their status code"""
+    response = client.post("/api/pricing/capital-protected", json={
+        "ticker": "X", "principal": 1000, "protection_level": 100, "participation_rate": 100, "maturity_years": 3})
+    assert response.status_code == 400
+
+def test_payoff_distribution_streams_exact_risk_metrics():
+    """Merged chunk histograms reproduce sorted-sample quantiles, VaR / ES and the atoms of the payoff"""
+    rng = np.random.default_rng(0)
+    payoffs = np.where(rng.random(100000) < 0.8, 1080.0, np.minimum(1000 * rng.lognormal(-0.3, 0.2, 100000), 1000))
+    streamed, other = PayoffDistribution(0, 1080, 1000), PayoffDistribution(0, 1080, 1000)
+    for i, chunk in enumerate(np.array_split(payoffs, 9)):
+        (streamed if i % 2 else other).update(chunk)
+    streamed.merge(other)
+    summary = streamed.summary()
+
+    worst = np.sort(payoffs)[:5000]
+    assert abs(summary["value_at_risk"]["95"] - (1000 - np.quantile(payoffs, 0.05))) < 0.5
+    assert abs(summary["expected_shortfall"]["95"] - (1000 - worst.mean())) < 0.05
+    assert summary["quantiles"]["p50"] == 1080 and summary["probability_profit"] == np.mean(payoffs > 1000)
+    assert abs(sum(summary["probabilities"]) - 1) < 1e-12 and len(summary["bin_edges"]) == 51
+
+    autocall = {"ticker": "X", "principal": 1000, "autocall_barrier": 100, "coupon_rate": 8, "barrier_level": 60,
+                "maturity_years": 3, "spot_price": 100, "volatility": 0.25, "n_simulations": 20000}
+    priced = client.post("/api/pricing/autocall", json=autocall).json()
+    distribution = priced["payoff_distribution"]
+    assert abs(distribution["mean"] * np.exp(-0.04 * 3) - priced["fair_value"]) < 0.05
+    assert len(priced["autocall_probabilities"]) == 13 and distribution["value_at_risk"]["99"] > 0
+    assert client.post("/api/pricing/autocall", json={**autocall, "engine": "pde"}).json()["payoff_distribution"] is None
+
+def test_float32_paths_match_float64():
+    """Single-precision paths on the same Sobol draws only add rounding; pseudo streams agree within noise"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25, n_sims=50000, greeks=True)
+    for options in ({"sampler": "sobol"}, {"sampler": "sobol", "barrier_monitoring": 1 / 252}):
+        double = monte_carlo_autocall(**args, **options)
+        single = monte_carlo_autocall(**args, **options, precision="float32")
+        assert abs(single["price"] - double["price"]) < 1e-3 * double["std_error"]
+        for greek in ("delta", "gamma", "vega", "theta"):
+            assert abs(single["greeks"][greek] - double["greeks"][greek]) < 1e-2 * double["greeks_std_error"][greek]
+
+    double = monte_carlo_autocall(**args)
+    single = monte_carlo_autocall(**args, precision="float32")
+    assert abs(single["price"] - double["price"]) < 4 * double["std_error"]
+
+    response = client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "precision": "float32"})
+    assert response.status_code == 200
+    assert client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "precision": "float32",
+                                                      "engine": "pde"}).status_code == 400
+
+def test_kernel_backends_match_golden_values():
+    """NumPy and compiled (when Numba is installed) backends reproduce the same golden prices and Greeks"""
+    args = dict(S0=100, K_autocall=100, K_barrier=60, T=3, r=0.04, sigma=0.25,
+                coupon=0.08, principal=1000, frequency=0.25, n_sims=20000, seed=7, greeks=True)
+    golden = [
+        ({}, 913.9776247971993, {"delta": -0.060392, "gamma": -0.320449, "vega": -4.38492, "theta": 0.138409}),
+        ({"barrier_monitoring": 1 / 252, "antithetic": True}, 891.0679207143289,
+         {"delta": 1.561646, "gamma": -0.302093, "vega": -5.053387, "theta": 0.187482}),
+    ]
+    for backend in available_backends():
+        for options, price, greeks in golden:
+            result = monte_carlo_autocall(**args, **options, backend=backend)
+            assert result["backend"] == backend
+            assert abs(result["price"] - price) < 1e-9
+            for greek, value in greeks.items():
+                assert abs(result["greeks"][greek] - value) < 1e-6
+
+    response = client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "backend": "numba"})
+    assert response.status_code == 200
+    assert response.json()["backend"] in available_backends()
+    assert client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "backend": "numba",
+                                                      "engine": "pde"}).status_code == 400
+
+def test_phoenix_memory_coupons_and_step_down():
+    """Vectorized Phoenix coupons match a path-by-path term sheet, on every kernel backend"""
+    rng = np.random.default_rng(0)
+    paths = 100 * np.exp(np.cumsum(0.125 * rng.standard_normal((2000, 12)), axis=1))
+    schedule = 100 - 2 * np.arange(12)
+
+    def term_sheet(path, memory):
+        cash, missed = 0.0, 0
+        for k, spot in enumerate(path):
+            if spot >= 70:
+                cash += 1000 * 0.08 * 0.25 * (1 + missed)
+                missed = 0
+            elif memory:
+                missed += 1
+            if spot >= schedule[k]:
+                return cash + 1000
+        return cash + (1000 if path[-1] >= 60 else 10 * path[-1])
+
+    for memory in (False, True):
+        payoffs = _autocall_redemptions(paths, 100, schedule, 60, 3, 0.08, 1000, 0.25,
+                                        coupon_barrier=70, memory=memory)[0]
+        assert np.allclose(payoffs, [term_sheet(path, memory) for path in paths])
+
+    args = dict(S0=100, K_autocall=schedule, K_barrier=60, T=3, r=0.04, sigma=0.25, coupon=0.08,
+                principal=1000, frequency=0.25, n_sims=20000, coupon_barrier=70, greeks=True)
+    plain = monte_carlo_autocall(**args)
+    memory = monte_carlo_autocall(**args, memory=True)
+    assert memory["price"] > plain["price"]
+    for backend in available_backends():
+        result = monte_carlo_autocall(**args, memory=True, barrier_monitoring=1 / 252, backend=backend)
+        reference = monte_carlo_autocall(**args, memory=True, barrier_monitoring=1 / 252)
+        assert abs(result["price"] - reference["price"]) < 1e-9
+        assert abs(result["greeks"]["delta"] - reference["greeks"]["delta"]) < 1e-9
+
+    payload = {**AUTOCALL_PAYLOAD, "coupon_barrier": 70, "memory_coupon": True, "autocall_step_down": 2}
+    response = client.post("/api/pricing/autocall", json=payload)
+    assert response.status_code == 200
+    assert response.json()["autocall_probabilities"][-1] < client.post(
+        "/api/pricing/autocall", json=AUTOCALL_PAYLOAD).json()["autocall_probabilities"][-1]
+    assert client.post("/api/pricing/autocall", json={**payload, "engine": "pde"}).status_code == 400
+    assert client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "memory_coupon": True}).status_code == 400
+    assert client.post("/api/pricing/autocall", json={**payload, "engine": "heston", "heston": HESTON}).status_code == 200
+
+def test_simulation_count_is_bounded(monkeypatch):
+    """Non-positive path counts are rejected, huge ones capped at MC_MAX_SIMULATIONS"""
+    warrant = {"ticker": "AAPL", "strike_price": 100, "maturity_years": 1, "warrant_type": "put",
+               "spot_price": 100, "volatility": 0.25, "exercise": "american", "engine": "lsm"}
+    for path, payload in (("autocall", AUTOCALL_PAYLOAD), ("warrant", warrant)):
+        assert client.post(f"/api/pricing/{path}", json={**payload, "n_simulations": -5}).status_code == 400
+    compare = {"ticker": "AAPL", "spot_price": 100, "volatility": 0.25, "n_simulations": 0,
+               "products": [{"product_type": "autocall", "parameters": {k: v for k, v in AUTOCALL_PAYLOAD.items()
+                                                                        if k not in ("ticker", "spot_price", "volatility")}}]}
+    assert client.post("/api/pricing/compare", json=compare).status_code == 400
+
+    monkeypatch.setattr(settings, "MC_MAX_SIMULATIONS", 2000)
+    response = client.post("/api/pricing/autocall", json={**AUTOCALL_PAYLOAD, "n_simulations": 10**12, "seed": 5})
+    assert response.status_code == 200
+    assert response.json()["n_paths"] == 2000